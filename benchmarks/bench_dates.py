@@ -0,0 +1,72 @@
+"""Micro-benchmark of `src.dates` against the code paths it replaced.
+
+Run from the project root as `python -m benchmarks.bench_dates`.
+"""
+import datetime
+import re
+import timeit
+
+import dateutil.parser
+
+from src import dates
+
+N = 20000
+
+E2G = {
+    "Januar": "January", "Februar": "February", "März": "March",
+    "April": "April", "Mai": "May", "Juni": "June", "Juli": "July",
+    "August": "August", "September": "September", "Oktober": "October",
+    "November": "November", "Dezember": "December"
+}
+
+
+def old_iso():
+    dateutil.parser.parse("2021-05-20T18:00:00Z")
+
+
+def new_iso():
+    dates.parse_iso("2021-05-20T18:00:00Z")
+
+
+def old_german():
+    evt_dt = "20. Mai 2021 | 20.00"
+    for k, v in E2G.items():
+        evt_dt = re.sub(k, v, evt_dt)
+    evt_dt = re.search(
+        r"([0-9]+[.] [A-Za-z]+ [0-9]{4} [–|] [0-9.]{5})", evt_dt
+    ).group(0)
+    evt_dt = re.sub("[–|] ", "", evt_dt)
+    datetime.datetime.strptime(evt_dt, "%d. %B %Y %H.%M")
+
+
+def new_german():
+    evt_dt = dates.translate_months("20. Mai 2021 | 20.00", "de")
+    evt_dt = re.search(
+        r"([0-9]+[.] [A-Za-z]+ [0-9]{4} [–|] [0-9.]{5})", evt_dt
+    ).group(0)
+    evt_dt = re.sub("[–|] ", "", evt_dt)
+    dates.strptime(evt_dt, "%d. %B %Y %H.%M")
+
+
+def old_strptime():
+    datetime.datetime.strptime("Sunday, May 23, 2021 - 03:00 PM",
+                               "%A, %B %d, %Y - %I:%M %p")
+
+
+def new_strptime():
+    dates.strptime("Sunday, May 23, 2021 - 03:00 PM",
+                   "%A, %B %d, %Y - %I:%M %p")
+
+
+def main():
+    for name, old, new in (("iso timestamp", old_iso, new_iso),
+                           ("german date", old_german, new_german),
+                           ("strptime", old_strptime, new_strptime)):
+        t_old = timeit.timeit(old, number=N) / N * 1e6
+        t_new = timeit.timeit(new, number=N) / N * 1e6
+        print(f"{name:>15}: {t_old:8.2f}us -> {t_new:8.2f}us "
+              f"(x{t_old / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
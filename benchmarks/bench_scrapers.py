@@ -0,0 +1,96 @@
+"""Offline parse benchmark of venue scrapers on their archived pages.
+
+Run from the project root as `python -m benchmarks.bench_scrapers`; pass
+`--record` to (re-)archive the pages of the selected scrapers from the web
+first, and scraper class names to restrict the selection.
+"""
+import argparse
+import inspect
+import time
+import tracemalloc
+
+from src import scrapers
+from src.core import PageScraper
+from src.transport import Archive, StaticTransport, record, use_transport
+
+
+def page_scrapers() -> dict:
+    """All `PageScraper` subclasses defined in `src.scrapers`."""
+    return {
+        name: cls for name, cls in inspect.getmembers(scrapers,
+                                                      inspect.isclass)
+        if issubclass(cls, PageScraper) and cls.__module__ == scrapers.__name__
+    }
+
+
+def load(scraper) -> dict:
+    """Archived pages of `scraper`, read into memory: {url: content}."""
+    archive = Archive.of(scraper)
+    return {u_: archive.read(u_) for u_ in archive.index}
+
+
+def bench(scraper, repeat: int = 5) -> dict:
+    """Time, memory and yield of parsing the archived pages of `scraper`.
+
+    Pages are read before, so that no file is read while timed. 'blocks'
+    and 'allocated' are the memory blocks and bytes allocated by one
+    parse (and not freed by its end), from the difference of tracemalloc
+    snapshots taken before and after it.
+    """
+    transport = StaticTransport(load(scraper))
+
+    timings = list()
+    with use_transport(transport):
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            events = scraper.get_events()
+            timings.append(time.perf_counter() - t0)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        events = scraper.get_events()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    return {"time": min(timings), "peak": peak,
+            "blocks": sum(d_.count_diff for d_ in diff),
+            "allocated": sum(d_.size_diff for d_ in diff),
+            "events": len(events)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scrapers", nargs="*")
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    available = page_scrapers()
+    names = args.scrapers or sorted(available)
+
+    print(f"{'scraper':>22} {'pages':>6} {'time, ms':>9} {'peak, KiB':>10} "
+          f"{'blocks':>7} {'alloc, KiB':>10} {'events':>7}")
+    for name in names:
+        try:
+            scraper = available[name]()
+        except TypeError:
+            # not implemented yet
+            continue
+
+        if args.record:
+            record(scraper)
+
+        n_pages = len(Archive.of(scraper))
+        if n_pages < 1:
+            continue
+
+        res = bench(scraper, repeat=args.repeat)
+        print(f"{name:>22} {n_pages:>6} {res['time'] * 1e3:>9.2f} "
+              f"{res['peak'] / 1024:>10.1f} {res['blocks']:>7} "
+              f"{res['allocated'] / 1024:>10.1f} {res['events']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Scale benchmark of `scrape_youtube` against the local api emulator.
+
+Run from the project root as `python -m benchmarks.bench_youtube`, e.g.
+`python -m benchmarks.bench_youtube -n 10 100 1000 --low-quota`.
+"""
+import argparse
+import logging
+import time
+
+from src.emulator import Catalog, FakeYoutube, FakeCalendar
+from src.limits import limits
+from src.quota import ledger
+from src.store import EventStore
+
+import main
+
+
+def bench(n_channels: int, low_quota: bool, latency: float,
+          error_rate: float, quota: int) -> dict:
+    catalog = Catalog.synthetic(n_channels)
+    youtube = FakeYoutube(catalog, latency=latency, error_rate=error_rate,
+                          quota=quota)
+    calendar = FakeCalendar(latency=latency)
+
+    ledger.reset()
+    limits.reset()
+    t0 = time.perf_counter()
+    main.scrape_youtube(catalog.names(), youtube_client=youtube,
+                        calendar_client=calendar, low_quota=low_quota,
+                        store=EventStore(":memory:"))
+    elapsed = time.perf_counter() - t0
+
+    return {"time": elapsed,
+            "youtube": sum(youtube.calls.values()),
+            "calendar": sum(calendar.calls.values()),
+            "quota": youtube.quota_used,
+            "inserted": len(calendar.stored),
+            "rejected": sum(s_["rejected"]
+                            for s_ in limits.states().values())}
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--channels", type=int, nargs="+",
+                        default=[10, 100, 1000])
+    parser.add_argument("--low-quota", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, default=10 ** 9)
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="throttle calls as against the real apis")
+    args = parser.parse_args()
+
+    if not args.rate_limit:
+        limits.rates.update(youtube=None, calendar=None)
+
+    # keep the logs off e-mail and off the terminal
+    logging.getLogger("main").handlers = [logging.NullHandler()]
+
+    print(f"{'channels':>9} {'time, s':>8} {'youtube':>8} {'calendar':>9} "
+          f"{'quota':>8} {'inserted':>9} {'rejected':>9}")
+    for n_ in args.channels:
+        res = bench(n_, args.low_quota, args.latency, args.error_rate,
+                    args.quota)
+        print(f"{n_:>9} {res['time']:>8.2f} {res['youtube']:>8} "
+              f"{res['calendar']:>9} {res['quota']:>8} "
+              f"{res['inserted']:>9} {res['rejected']:>9}")
+
+
+if __name__ == "__main__":
+    main_()
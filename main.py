@@ -1,51 +1,443 @@
+import argparse
+import functools
 import json
+import os
+import signal
 
 from config import *
 
-from src.calendartools import insert_event, get_calendar_client
-from src.youtubetools import get_youtube_client
+from src.calendartools import get_calendar_client, insert_event
+from src.youtubetools import get_youtube_client, get_youtube_pool
 from src.core import YoutubeScraper
-from src.scrapers import StMaryScraper
+from src.daemon import Daemon
+from src.deadline import Deadline, use_deadline
+from src.explain import Planner
+from src.feed import Feed, serve
+from src.registry import registry
+from src.pipeline import pipeline, scrape_stages
+from src.journal import Journal, last_run
+from src.outbox import Outbox
+from src.procpool import ParsePool, set_pool
+from src.quota import ledger
+from src.schedule import Scheduler
+from src.seen import DAY, SeenIndex, attach
+from src.shard import Shard
+from src.store import EventStore
+from src.transport import get_transport
+from src.websub import Subscriber
 from src.utils import logger
 
 
+def scrape(scrapers, calendar_client, store=None, journal=None,
+           scheduler=None, shard=None, source_budget=None, outbox=None,
+           **kwargs) -> int:
+    """Scrape events and write them to the calendar, stage by stage.
+
+    Parameters
+    ----------
+    scrapers : iterable
+        of `ConcertScraper`
+    calendar_client : Resource
+        None to only record events in the `store`, e.g. for feeds
+    store : EventStore
+        optional; events are recorded there, and those inserted before are
+        not written again
+    journal : Journal
+        optional; progress of each scraper is recorded there, and scrapers
+        done before in the journaled run are not scraped again
+    scheduler : Scheduler
+        optional; only sources due are scraped, most promising first
+    shard : Shard
+        optional; only sources of this worker not leased by another are
+        scraped
+    source_budget : float
+        optional; max seconds spent on any one source, within the deadline
+        of the run (see `use_deadline()`)
+    outbox : Outbox
+        optional; events are queued there for the calendar instead of
+        written, see `sync_calendar()`
+    **kwargs
+        passed to each scraper's `iter_events()`
+
+    Returns
+    -------
+    int
+        number of events processed by the calendar (or queued, or scraped
+        without either)
+    """
+    if scheduler is not None:
+        scrapers = scheduler.plan(list(scrapers))
+    if shard is not None:
+        scrapers = shard.claim(list(scrapers))
+
+    stages = scrape_stages(store=store, journal=journal,
+                           calendar_client=calendar_client, outbox=outbox,
+                           source_budget=source_budget, **kwargs)
+    written = pipeline(scrapers, *stages)
+
+    return sum(1 for _ in written)
+
+
+def scrape_venues(names, calendar_client=None, store=None,
+                  journal=None, scheduler=None, shard=None,
+                  source_budget=None, calendar: bool = True,
+                  seen=None, outbox=None) -> None:
+    """Scrape venue websites.
+
+    Parameters
+    ----------
+    names : list or str
+        of scrapers in the registry, or 'all'
+    calendar_client : Resource
+        defaults to `get_calendar_client()`
+    store : EventStore
+        defaults to the one in `data/`
+    journal : Journal
+        optional, see `scrape()`
+    scheduler : Scheduler
+        optional, see `scrape()`
+    shard : Shard
+        optional, see `scrape()`
+    source_budget : float
+        optional, see `scrape()`
+    calendar : bool
+        False to only record events in the store, without credentials
+    seen : SeenIndex
+        optional; event pages fetched before are skipped
+    outbox : Outbox
+        optional, see `scrape()`
+    """
+    if calendar_client is None and calendar and outbox is None:
+        calendar_client = get_calendar_client()
+    if store is None:
+        store = EventStore()
+
+    scrapers = registry.iter_scrapers(names)
+    if seen is not None:
+        scrapers = attach(scrapers, seen)
+    n_events = scrape(scrapers, calendar_client,
+                      store=store, journal=journal, scheduler=scheduler,
+                      shard=shard, source_budget=source_budget,
+                      outbox=outbox)
+    logger.info(f"{n_events} events processed")
+
+
 def scrape_stmary() -> None:
     """Scrape St. Mary's Perivale events (from website)."""
+    scrape_venues(["stmary"])
+
+
+def scrape_youtube(channels: dict = None, youtube_client=None,
+                   calendar_client=None, low_quota: bool = False,
+                   store=None, journal=None, scheduler=None,
+                   shard=None, source_budget=None,
+                   calendar: bool = True, outbox=None) -> None:
+    """Scrape all youtube channels.
+
+    Parameters
+    ----------
+    channels : dict
+        of {name: channel id}; defaults to those in `data/channels.json`
+    youtube_client : Resource
+        defaults to `get_youtube_pool()` if 'GOOGLE_CREDS_FILES' is set,
+        else to `get_youtube_client()`
+    calendar_client : Resource
+        defaults to `get_calendar_client()`
+    low_quota : bool
+        True to scan uploads instead of the (expensive) search
+    store : EventStore
+        defaults to the one in `data/`
+    journal : Journal
+        optional, see `scrape()`
+    scheduler : Scheduler
+        optional, see `scrape()`
+    shard : Shard
+        optional, see `scrape()`
+    source_budget : float
+        optional, see `scrape()`
+    calendar : bool
+        False to only record events in the store, without credentials
+    outbox : Outbox
+        optional, see `scrape()`
+    """
+    if channels is None:
+        with open("data/channels.json", mode="r") as fp:
+            channels = json.load(fp)
+
     # load clients
-    calendar_client = get_calendar_client()
+    if calendar_client is None and calendar and outbox is None:
+        calendar_client = get_calendar_client()
+    if youtube_client is None:
+        youtube_client = get_youtube_pool() \
+            if os.environ.get("GOOGLE_CREDS_FILES") else get_youtube_client()
+    if store is None:
+        store = EventStore()
+
+    # stream events of all channels into the calendar
+    scrapers = (YoutubeScraper(ch_id, client=youtube_client, store=store)
+                for ch_id in channels.values())
+    n_events = scrape(scrapers, calendar_client, store=store,
+                      journal=journal, scheduler=scheduler, shard=shard,
+                      source_budget=source_budget, outbox=outbox,
+                      low_quota=low_quota)
+    logger.info(f"{n_events} events processed")
 
-    events = StMaryScraper().get_events()
+    logger.info("all done!")
 
-    for e_ in events:
-        insert_event(e_, calendar_client)
 
+def sync_calendar(outbox, calendar_client=None, store=None) -> int:
+    """Write the events queued in `outbox` to the calendar.
 
-def scrape_youtube() -> None:
-    """Scrape all youtube channels."""
-    with open("data/channels.json", mode="r") as fp:
-        channels = json.load(fp)
+    Parameters
+    ----------
+    outbox : Outbox
+    calendar_client : Resource
+        defaults to `get_calendar_client()`
+    store : EventStore
+        defaults to that of the outbox
 
-    # load clients
-    calendar_client = get_calendar_client()
-    youtube_client = get_youtube_client()
+    Returns
+    -------
+    int
+        number of events written
+    """
+    if calendar_client is None:
+        calendar_client = get_calendar_client()
+    if store is None:
+        store = outbox.store
 
-    # loop over channels
-    for ch_name in list(channels.keys()):
-        logger.info(f"channel {ch_name}...")
-        try:
-            # get events
-            scr = YoutubeScraper.by_name(ch_name, client=youtube_client)
-            events = scr.get_events(low_quota=False)
+    n_events = outbox.consume(functools.partial(
+        insert_event, client=calendar_client, store=store
+    ))
+    logger.info(f"{n_events} events synced, outbox: {outbox.stats()}")
 
-            # for each event, insert it into the calendar
-            for e_ in events:
-                insert_event(e_, calendar_client)
+    return n_events
 
-        except Exception as err:
-            logger.error(str(err))
 
-    logger.info("all done!")
+def explain(venues=(), channels: dict = None, low_quota: bool = False,
+            store=None, **kwargs):
+    """Plan of scraping `venues` and `channels`, out of the state of
+    `store`: nothing is fetched, and no credentials are needed.
+
+    Parameters
+    ----------
+    venues : list or str
+        of scrapers in the registry, or 'all'
+    channels : dict
+        of {name: channel id}; defaults to those in `data/channels.json`
+    low_quota : bool
+        see `scrape_youtube()`
+    store : EventStore
+        defaults to the one in `data/`
+    **kwargs
+        scheduler, shard, journal, seen, outbox and calendar, see
+        `explain.Planner`
+
+    Returns
+    -------
+    Plan
+    """
+    if channels is None:
+        with open("data/channels.json", mode="r") as fp:
+            channels = json.load(fp)
+    if store is None:
+        store = EventStore()
+
+    planner = Planner(store, low_quota=low_quota, **kwargs)
+    plan = planner.plan(registry.iter_scrapers(venues)) if venues else None
+    plan = planner.plan((YoutubeScraper(ch_id) for ch_id in channels.values()),
+                        plan=plan)
+
+    return planner.queued(plan)
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="scrape livestreams of classical concerts"
+    )
+    parser.add_argument("--venues", nargs="*", metavar="NAME",
+                        help="venues to scrape, or 'all'; see --list")
+    parser.add_argument("--no-youtube", action="store_true",
+                        help="skip youtube channels")
+    parser.add_argument("--low-quota", action="store_true",
+                        help="scan uploads instead of searching channels")
+    parser.add_argument("--store", metavar="PATH",
+                        help="sqlite event store (default: in data/)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last unfinished run")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="only poll sources due according to their "
+                             "history")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="stop polling sources after this long, and "
+                             "write what was found")
+    parser.add_argument("--source-budget", type=float, metavar="SECONDS",
+                        help="max time spent on any one source")
+    parser.add_argument("--shard", action="store_true",
+                        help="share the sources with other workers on the "
+                             "same store")
+    parser.add_argument("--worker-id",
+                        help="id of this worker (default: host:pid)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running, polling each source when due")
+    parser.add_argument("--interval", type=float, default=60.,
+                        help="seconds between ticks of the daemon")
+    parser.add_argument("--port", type=int, default=8377,
+                        help="port of the daemon's /health and /status")
+    parser.add_argument("--websub-callback", metavar="URL",
+                        help="with --daemon, subscribe to uploads of the "
+                             "channels, notified at URL")
+    parser.add_argument("--websub-port", type=int, default=8379,
+                        help="local port behind the websub callback url")
+    parser.add_argument("--websub-secret",
+                        default=os.environ.get("WEBSUB_SECRET"),
+                        help="secret the hub signs notifications with "
+                             "(default: $WEBSUB_SECRET), required with "
+                             "--websub-callback")
+    parser.add_argument("--no-calendar", action="store_true",
+                        help="only record events in the store")
+    parser.add_argument("--feed", metavar="DIR",
+                        help="write events.ics and events.json of the "
+                             "upcoming events to DIR after the run")
+    parser.add_argument("--feed-port", type=int, metavar="PORT",
+                        help="serve events.ics and events.json on PORT")
+    parser.add_argument("--queue", action="store_true",
+                        help="queue events in the store, then write the "
+                             "queue to the calendar")
+    parser.add_argument("--sync", action="store_true",
+                        help="only write the queued events to the calendar")
+    parser.add_argument("--replay", action="store_true",
+                        help="queue the events given up on again")
+    parser.add_argument("--horizon", type=float, default=90., metavar="DAYS",
+                        help="don't fetch event pages listed as starting "
+                             "later than this")
+    parser.add_argument("--refetch", action="store_true",
+                        help="fetch all event pages, even those fetched "
+                             "before")
+    parser.add_argument("--processes", type=int, metavar="N",
+                        help="parse pages in N processes (0: one per core)")
+    parser.add_argument("--explain", action="store_true",
+                        help="print the fetches, api calls, quota and "
+                             "calendar writes a run would take, and exit")
+    parser.add_argument("--compare", action="store_true",
+                        help="run, then compare with the plan of --explain")
+    parser.add_argument("--list", action="store_true",
+                        help="list available venues and exit")
+
+    res = parser.parse_args(args)
+    if res.websub_callback is not None and not res.websub_secret:
+        parser.error("--websub-callback requires --websub-secret")
+
+    return res
 
 
 if __name__ == '__main__':
-    scrape_youtube()
+    args = parse_args()
+
+    if args.list:
+        print("\n".join(registry.names()))
+        raise SystemExit
+
+    event_store = EventStore(args.store)
+    seen_index = None if args.refetch else \
+        SeenIndex(event_store, horizon=args.horizon * DAY,
+                  inserted=not args.no_calendar)
+    if args.processes is not None:
+        set_pool(ParsePool(args.processes or None))
+    run_shard = Shard(event_store, args.worker_id) if args.shard else None
+    run_outbox = Outbox(event_store) \
+        if args.queue or args.sync or args.replay else None
+
+    if args.replay:
+        logger.info(f"{run_outbox.replay()} events queued again")
+    if args.sync:
+        sync_calendar(run_outbox)
+        raise SystemExit
+
+    run_plan = None
+    if args.explain or args.compare:
+        # the run to resume, without opening one
+        resumed = last_run(event_store) if args.resume else None
+        run_plan = explain(
+            args.venues or [], {} if args.no_youtube else None,
+            low_quota=args.low_quota, store=event_store,
+            scheduler=Scheduler(event_store) if args.adaptive else None,
+            shard=run_shard,
+            journal=Journal(event_store, run=resumed) if resumed is not None
+            else None,
+            seen=seen_index, outbox=run_outbox,
+            calendar=not args.no_calendar
+        )
+        print(run_plan.report())
+        if args.explain:
+            raise SystemExit
+
+    event_feed = Feed(event_store)
+
+    if args.daemon:
+        subscriber, youtube = None, None
+        if not args.no_youtube:
+            youtube = get_youtube_pool() \
+                if os.environ.get("GOOGLE_CREDS_FILES") \
+                else get_youtube_client()
+            if args.websub_callback is not None:
+                subscriber = Subscriber(event_store, args.websub_callback,
+                                        args.websub_secret)
+                subscriber.serve(args.websub_port)
+        daemon = Daemon(event_store, youtube,
+                        None if args.no_calendar else get_calendar_client(),
+                        venues=args.venues or [], low_quota=args.low_quota,
+                        shard=run_shard, subscriber=subscriber,
+                        seen=seen_index,
+                        outbox=run_outbox if args.queue else None,
+                        youtube=not args.no_youtube, feed=event_feed,
+                        feed_path=args.feed)
+        signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+        daemon.serve_status(args.port)
+        if args.feed_port is not None:
+            serve(event_feed, args.feed_port, background=True)
+        try:
+            daemon.run(args.interval)
+        except KeyboardInterrupt:
+            daemon.stop()
+    else:
+        run_journal = Journal(event_store, resume=args.resume)
+        run_scheduler = Scheduler(event_store) if args.adaptive else None
+        try:
+            with use_deadline(Deadline(args.deadline)) as run_deadline:
+                if args.venues:
+                    scrape_venues(args.venues, store=event_store,
+                                  journal=run_journal,
+                                  scheduler=run_scheduler, shard=run_shard,
+                                  source_budget=args.source_budget,
+                                  calendar=not args.no_calendar,
+                                  seen=seen_index, outbox=run_outbox)
+                if not args.no_youtube:
+                    scrape_youtube(low_quota=args.low_quota,
+                                   store=event_store, journal=run_journal,
+                                   scheduler=run_scheduler, shard=run_shard,
+                                   source_budget=args.source_budget,
+                                   calendar=not args.no_calendar,
+                                   outbox=run_outbox)
+        finally:
+            # the next run, as another host:pid, takes over right away
+            if run_shard is not None:
+                run_shard.leave()
+
+        if run_deadline.skipped:
+            # the journal keeps the run open, see --resume
+            logger.warning("out of time, skipped:\n" + run_deadline.report())
+        else:
+            run_journal.finish()
+
+        if run_outbox is not None and not args.no_calendar:
+            sync_calendar(run_outbox)
+
+        if run_plan is not None:
+            print(run_plan.compare(
+                ledger.calls, getattr(get_transport(), "fetches", {})))
+
+        if args.feed is not None:
+            event_feed.write(args.feed)
+        if args.feed_port is not None:
+            serve(event_feed, args.feed_port)
@@ -2,15 +2,19 @@ from __future__ import print_function
 import datetime
 import pickle
 import os
-import dateutil.parser
 import logging
 
 # google
 import googleapiclient.discovery
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
+from .events import Event
+from .quota import execute
+from .transport import DeadlineHttp
+
 # id of the calendar with livestreams
 calId = os.environ.get("CALENDAR_ID")
 
@@ -51,56 +55,71 @@ def get_calendar_client():
             token.write(creds.to_json())
 
     service = googleapiclient.discovery.build(
-        api_service_name, api_version, credentials=creds
+        api_service_name, api_version,
+        http=AuthorizedHttp(creds, http=DeadlineHttp())
     )
 
     logger.info("...success!")
     return service
 
 
-def insert_event(event, client) -> None:
+def insert_event(event, client, store=None) -> None:
     """Insert event into calendar
 
     Parameters
     ----------
-    event : dict
+    event : Event or dict
+        if dict, calendar api-like:
         "start": {
-            "dateTime": datetime.datetime
+            "dateTime": str or datetime.datetime
         },
         "end": [
-            "dateTime": datetime.datetimes
+            "dateTime": str or datetime.datetime
         ],
         "summary": str
 
     client :
-
+    store : EventStore
+        optional; events inserted before are skipped without asking the
+        calendar, and insertions are recorded
     """
     # skip empty events
-    if len(event) < 1:
+    if not event:
+        return
+
+    if not isinstance(event, Event):
+        event = Event.from_dict(event)
+
+    if store is not None and store.is_inserted(event.key):
+        logger.info(f"event {event.summary} inserted before")
         return
 
-    logger.info(f"inserting event {event.get('summary')}")
+    logger.info(f"inserting event {event.summary}")
 
     # check if an event exists
     # get all existing events from now
-    time_min = dateutil.parser.parse(event["start"]["dateTime"])
+    time_min = event.start
     time_max = time_min + datetime.timedelta(hours=2)
 
-    events_result = client.events() \
+    events_result = execute(
+        client.events()
         .list(calendarId=calId,
               timeMin=time_min.isoformat(),
               timeMax=time_max.isoformat(),
-              singleEvents=True, orderBy='startTime')\
-        .execute()
+              singleEvents=True, orderBy='startTime')
+    )
 
     events = events_result.get('items', [])
 
     for e_ in events:
-        eq_summary = e_["summary"] == event["summary"]
+        eq_summary = e_["summary"] == event.summary
         if eq_summary:
             logger.info("such an event exists!")
+            if store is not None:
+                store.mark_inserted(event.key, e_.get("id", ""))
             return
 
-    event["start"]["dateTime"] = event["start"]["dateTime"]
-    event["end"]["dateTime"] = event["end"]["dateTime"]
-    client.events().insert(calendarId=calId, body=event).execute()
+    res = execute(client.events().insert(calendarId=calId,
+                                         body=event.to_body()))
+    if store is not None:
+        store.mark_inserted(event.key, (res or {}).get("id", ""))
@@ -0,0 +1,157 @@
+import datetime
+import logging
+import threading
+
+import pytz
+
+from .limits import is_quota_exceeded
+from .quota import execute, ledger
+
+logger = logging.getLogger("main.clientpool")
+
+# daily quota of a google cloud project for the youtube data api
+DAILY_QUOTA = 10000
+
+# youtube quotas are reset at midnight, pacific time
+QUOTA_TZ = pytz.timezone("America/Los_Angeles")
+
+
+class QuotaExhausted(Exception):
+    """Raised when no client of a pool has quota left."""
+    pass
+
+
+def next_quota_reset(now: datetime.datetime = None) -> datetime.datetime:
+    now = now if now is not None else datetime.datetime.now(pytz.utc)
+    local = now.astimezone(QUOTA_TZ)
+    midnight = QUOTA_TZ.localize(datetime.datetime.combine(
+        local.date() + datetime.timedelta(days=1), datetime.time()
+    ))
+    return midnight.astimezone(pytz.utc)
+
+
+class PoolMember:
+    """A client of a pool, with the quota of its project.
+
+    Parameters
+    ----------
+    name : str
+        key of its spend in the quota ledger
+    client : Resource
+    quota : int
+        daily quota units of the project
+    """
+
+    def __init__(self, name: str, client, quota: int = DAILY_QUOTA):
+        self.name = name
+        self.client = client
+        self.quota = quota
+        self.exhausted_until = None
+
+    @property
+    def remaining(self) -> int:
+        """Quota units left, as far as this process spent them."""
+        return self.quota - ledger.units_by_key[self.name]
+
+    @property
+    def available(self) -> bool:
+        if self.exhausted_until is not None and \
+                datetime.datetime.now(pytz.utc) < self.exhausted_until:
+            return False
+        return self.remaining > 0
+
+
+class PooledRequest:
+    """Request of a `ClientPool`, sent with the client having most quota.
+
+    It books each attempt in the ledger itself (see `quota.execute`).
+    """
+
+    self_charging = True
+
+    def __init__(self, pool, collection: str, method: str, kwargs: dict):
+        self.pool = pool
+        self.collection = collection
+        self.method = method
+        self.kwargs = kwargs
+        self.methodId = f"{pool.api}.{collection}.{method}"
+
+    def build(self, client):
+        return getattr(getattr(client, self.collection)(), self.method)(
+            **self.kwargs)
+
+    def execute(self):
+        tried = set()
+        while True:
+            member = self.pool.pick(exclude=tried)
+            try:
+                return execute(self.build(member.client), key=member.name)
+            except Exception as err:
+                if not is_quota_exceeded(err):
+                    raise
+                self.pool.exhausted(member)
+                tried.add(member.name)
+
+
+class _PooledCollection:
+
+    def __init__(self, pool, name: str):
+        self.pool = pool
+        self.name = name
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def make_request(**kwargs):
+            return PooledRequest(self.pool, self.name, method, kwargs)
+
+        return make_request
+
+
+class ClientPool:
+    """Clients of several projects of the same api, used as one client.
+
+    Every request is sent with the client having most quota left, and
+    sent again with the next one if that turns out to be exhausted; the
+    spend of each is booked in the quota ledger under its name.
+
+    Parameters
+    ----------
+    members : list
+        of `PoolMember`
+    api : str
+        e.g. 'youtube'
+    """
+
+    def __init__(self, members: list, api: str = "youtube"):
+        if not members:
+            raise ValueError("a pool needs at least one client")
+        self.members = list(members)
+        self.api = api
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda: _PooledCollection(self, name)
+
+    def pick(self, exclude=()) -> PoolMember:
+        """Available member with most quota left."""
+        with self._lock:
+            candidates = [m_ for m_ in self.members
+                          if m_.available and m_.name not in exclude]
+        if not candidates:
+            raise QuotaExhausted(f"no {self.api} quota left in the pool")
+        return max(candidates, key=lambda m_: m_.remaining)
+
+    def exhausted(self, member: PoolMember) -> None:
+        with self._lock:
+            member.exhausted_until = next_quota_reset()
+        logger.warning(f"{member.name} out of quota, until "
+                       f"{member.exhausted_until:%Y-%m-%d %H:%M} UTC")
+
+    def summary(self) -> dict:
+        """{name: quota units remaining}."""
+        return {m_.name: m_.remaining if m_.available else 0
+                for m_ in self.members}
@@ -1,37 +1,79 @@
 import abc
 import os.path
+import time
 from bs4 import BeautifulSoup
-import requests
-import datetime
 import pytz
-import dateutil.parser
 import json
+import logging
 
-from .youtubetools import get_upcoming_livestreams, get_livestreaming_details
+from .deadline import DeadlineExceeded
+from .events import Event
+from .procpool import get_pool
+from .query import Document
+from .streamparse import stream_extract
+from .transport import get_transport
+from .dates import parse_iso
+from .youtubetools import (get_upcoming_livestreams,
+                           get_upcoming_livestream_details,
+                           get_livestreaming_details)
 
-hourandhalf = datetime.timedelta(hours=1, minutes=30)
+# max number of ids per call to `videos().list`
+MAX_RESULTS = 50
+
+# seconds after which livestreams in the calendar are looked up again,
+# e.g. as a premiere may be rescheduled
+RECHECK = 24 * 3600.
+
+logger = logging.getLogger("main.scrapers")
 
 
 class ConcertScraper:
 
+    def __str__(self):
+        return type(self).__name__
+
+    @abc.abstractmethod
+    def scan(self, *args, **kwargs) -> list:
+        """References of upcoming events, e.g. video ids or urls."""
+        pass
+
     @abc.abstractmethod
-    def get_events(self) -> list:
+    def resolve(self, refs: list):
+        """Generator of events out of references returned by `scan()`."""
+        pass
+
+    def iter_events(self, *args, **kwargs):
+        """Generator of events, yielded as soon as each is parsed.
+
+        Yields
+        ------
+        Event
+        """
+        yield from self.resolve(self.scan(*args, **kwargs))
+
+    def get_events(self, *args, **kwargs) -> list:
         """Wrapper; get livestream schedule and parse all events.
 
         Returns
         -------
         list
-            of events, each ready to be an event in calendar api; dates are
-            in ISO format, time zone-aware
+            of `Event`
         """
-        pass
+        return list(self.iter_events(*args, **kwargs))
 
 
 class YoutubeScraper(ConcertScraper):
 
-    def __init__(self, channel_id=None, client=None):
+    kind = "youtube"
+
+    def __init__(self, channel_id=None, client=None, store=None):
         self.channel_id = channel_id
         self.client = client
+        self.store = store
+        # details of livestreams found by the scan, by video id
+        self._details = dict()
+        # video ids in the calendar, to look up again
+        self._stale = set()
 
     @classmethod
     def by_name(cls, name: str, client):
@@ -46,68 +88,110 @@ class YoutubeScraper(ConcertScraper):
 
         return cls(channels[name.lower()], client=client)
 
-    def get_upcoming_livestreams(self, *args, **kwargs) -> list:
-        """Get upcoming livestreams."""
-        res = get_upcoming_livestreams(self.channel_id, client=self.client,
-                                       *args, **kwargs)
-        return res
+    def get_upcoming_livestreams(self, low_quota: bool = True) -> list:
+        """Get video ids of upcoming livestreams.
+
+        Scanning uploads (`low_quota`) gets the details of the livestreams
+        along; they are kept for `resolve()`, which then needs no api call.
+        """
+        if not low_quota:
+            return get_upcoming_livestreams(self.channel_id,
+                                            client=self.client,
+                                            low_quota=False)
+
+        details = get_upcoming_livestream_details(self.channel_id,
+                                                  client=self.client)
+        self._details.update((d_["videoId"], d_) for d_ in details)
+
+        return [d_["videoId"] for d_ in details]
+
+    def __str__(self):
+        return f"channel {self.channel_id}"
+
+    def details_to_event(self, ls_: dict) -> Event:
+        """Create event from livestream details."""
+        description = "https://www.youtube.com/watch?v={}" \
+            .format(ls_["videoId"])
+
+        event = Event(start=ls_["start"], summary=ls_["title"],
+                      description=description, source=str(self),
+                      ref=ls_["videoId"])
+
+        return event
 
-    def video_to_event(self, video_id: (str, list, tuple)) -> list:
+    def video_to_event(self, video_id: (str, list, tuple),
+                       fresh: bool = False) -> list:
         """Get livestream details and create event accordingly.
 
         Parameters
         ----------
         video_id : str or list-like
+        fresh : bool
+            True to get the details from the api, not from the cache;
+            list-likes are if any of their videos is to be looked up again
 
         Returns
         -------
         list
-            of events as dictionaries
+            of `Event`
 
         """
         if not isinstance(video_id, str):
-            return self.video_to_event(",".join(video_id))
+            fresh = any(v_ in self._stale for v_ in video_id)
+            self._stale.difference_update(video_id)
+            return self.video_to_event(",".join(video_id), fresh=fresh)
 
-        # create event out of each
-        # get details
-        ls_details = get_livestreaming_details(video_id, client=self.client)
+        # get details, create event out of each
+        f = get_livestreaming_details.func if fresh \
+            else get_livestreaming_details
+        ls_details = f(video_id, client=self.client)
 
-        # create calendar api-conformable event from details
-        events = list()
+        return [self.details_to_event(ls_) for ls_ in ls_details]
 
-        for ls_ in ls_details:
-            end_time = (dateutil.parser.parse(ls_["start"]) + hourandhalf) \
-                .isoformat()
-            description = "https://www.youtube.com/watch?v={}" \
-                .format(ls_["videoId"])
+    def scan(self, *args, **kwargs) -> list:
+        # only what this scan finds is kept for `resolve()`
+        self._details.clear()
+        self._stale.clear()
 
-            event = {
-                "start": {
-                    "dateTime": ls_["start"],
-                },
-                "end": {
-                    "dateTime": end_time,
-                },
-                'summary': ls_["title"],
-                'description': description,
-            }
-
-            events.append(event)
-
-        return events
-
-    def get_events(self, *args, **kwargs) -> list:
         # get livestreams first
         livestreams = self.get_upcoming_livestreams(*args, **kwargs)
 
-        if len(livestreams) < 1:
-            # no streams found
-            return []
-
-        # convert all video ids to events
-        res = self.video_to_event(livestreams)
-
-        return res
+        # those already in the calendar need no details, unless they
+        # may have been rescheduled since
+        if self.store is not None:
+            livestreams = [v_ for v_ in livestreams if not self._inserted(v_)]
+            self._details = {v_: self._details[v_] for v_ in livestreams
+                             if v_ in self._details}
+
+        return livestreams
+
+    def _inserted(self, video_id: str) -> bool:
+        """Is the video in the calendar as it is now scheduled? Without
+        details from the scan, only if looked up within `RECHECK`."""
+        details = self._details.get(video_id)
+        if details is not None:
+            return self.store.has_video(video_id, inserted=True,
+                                        start=parse_iso(details["start"]))
+        if not self.store.has_video(video_id, inserted=True,
+                                    since=time.time() - RECHECK):
+            # known details may be stale: not from the cache
+            self._stale.add(video_id)
+            return False
+        return True
+
+    def resolve(self, refs: list):
+        # details known from the scan
+        missing = list()
+        for v_ in refs:
+            details = self._details.pop(v_, None)
+            if details is None:
+                missing.append(v_)
+            else:
+                yield self.details_to_event(details)
+
+        # convert video ids to events, as many at once as the api allows
+        for i_ in range(0, len(missing), MAX_RESULTS):
+            yield from self.video_to_event(missing[i_:i_ + MAX_RESULTS])
 
 
 class PageScraper(ConcertScraper):
@@ -117,11 +201,26 @@ class PageScraper(ConcertScraper):
     ----------
     tz : pytz.timezone
         time zone of the venue
+
+    Attributes
+    ----------
+    seen : SeenIndex
+        optional; event pages fetched before are then skipped, see
+        `seen.SeenIndex`
     """
 
+    kind = "venue"
+    seen = None
+
     def __init__(self, tz: pytz.timezone):
         self.tz = tz
 
+    def __getstate__(self):
+        # pickled for parse workers, which need no index (nor its store)
+        state = dict(self.__dict__)
+        state.pop("seen", None)
+        return state
+
     @abc.abstractmethod
     def get_upcoming_livestreams(self) -> list:
         """Collect links to all events present in respective webpage.
@@ -145,42 +244,78 @@ class PageScraper(ConcertScraper):
 
     @staticmethod
     def get_soup(url: str) -> BeautifulSoup:
-        """Convenience method to soupify a page's html."""
-        page = requests.get(url)
-        soup = BeautifulSoup(page.content, "html.parser")
+        """Convenience method to soupify a page's html.
+
+        The page is fetched with the current transport, which is the web
+        unless recording or replaying archived pages (see `transport`).
+        """
+        content = get_transport().fetch(url)
+        soup = BeautifulSoup(content, "html.parser")
 
         return soup
 
-    def get_events(self) -> list:
-        urls = self.get_upcoming_livestreams()
+    @classmethod
+    def get_document(cls, url: str) -> Document:
+        """Soup of a page indexed for queries, see `query.Selector`."""
+        return Document(cls.get_soup(url))
+
+    @staticmethod
+    def stream_extract(url: str, parser):
+        """Values extracted by `parser` (see `streamparse`) from a page.
+
+        Unlike `get_soup()`, reading stops as soon as the parser has
+        found what it is looking for, and no tree is kept.
+        """
+        return stream_extract(url, parser)
+
+    def get_listing(self) -> list:
+        """Links to all events, as (link, start, version) tuples.
+
+        Scrapers whose listing shows when events start (as localized
+        datetime) or what they are (as version, see `seen.version_of()`)
+        tell here; by default, both are None.
+        """
+        return [(r_, None, None) for r_ in self.get_upcoming_livestreams()]
+
+    def scan(self) -> list:
+        if self.seen is None:
+            return list(self.get_upcoming_livestreams())
+
+        return self.seen.select(str(self), self.get_listing())
 
-        events = list()
+    def resolve(self, refs: list):
+        """Events of the references, parsed in the processes of the
+        current `procpool` pool if any."""
+        pool = get_pool()
+        details = pool.extract(self, refs) if pool is not None else \
+            ((u_, self._details_or_error(u_)) for u_ in refs)
 
-        for u_ in urls:
+        for u_, e_ in details:
+            if isinstance(e_, DeadlineExceeded):
+                raise e_
+            if isinstance(e_, BaseException):
+                logger.warning(f"failed to get {u_}: {e_}")
+                continue
 
             try:
-                e_ = self.get_livestream_details(u_)
-
-                # localize start time, add 1.5 hours to event start time
-                start_time = self.tz.localize(e_["start"]).isoformat()
-                end_time = (self.tz.localize(e_["start"]) + hourandhalf)\
-                    .isoformat()
-
-                # create event
-                event = {
-                    "start": {
-                        "dateTime": start_time,
-                    },
-                    "end": {
-                        "dateTime": end_time,
-                    },
-                    'summary': e_["summary"],
-                    'description': e_["description"],
-                }
-
-                events.append(event)
-
-            except Exception:
-                print(f"failed to get {u_}")
-
-        return events
+                # localize start time; the end is 1.5 hours later
+                event = Event(start=self.tz.localize(e_["start"]),
+                              summary=e_["summary"],
+                              description=e_["description"],
+                              source=str(self),
+                              ref=u_ if isinstance(u_, str) else None)
+
+            except Exception as err:
+                logger.warning(f"failed to get {u_}: {err}")
+                continue
+
+            if self.seen is not None and isinstance(u_, str):
+                self.seen.record(u_, event)
+
+            yield event
+
+    def _details_or_error(self, ref):
+        try:
+            return self.get_livestream_details(ref)
+        except Exception as err:
+            return err
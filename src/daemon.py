@@ -0,0 +1,262 @@
+import functools
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+
+from .core import YoutubeScraper
+from .limits import limits
+from .calendartools import insert_event
+from .pipeline import pipeline, scrape_stages
+from .quota import ledger
+from .registry import registry
+from .schedule import Scheduler
+from .seen import attach
+from .websub import PushScraper
+
+logger = logging.getLogger("main.daemon")
+
+
+def default_channels_path() -> str:
+    return os.path.join(os.environ.get("PROJECT_ROOT", ""),
+                        "data/channels.json")
+
+
+class Daemon:
+    """Long-running scraper polling each source when it is due.
+
+    Clients, scrapers (and with them the http session of the transport)
+    are created once and kept; `channels.json` is read again only when
+    modified. Each tick polls the sources due according to the
+    `scheduler`, such that a poll costs only the requests it needs.
+    Polls are not journaled: a source not done is simply due again.
+
+    Parameters
+    ----------
+    store : EventStore
+    youtube_client : Resource
+        None if `youtube` is False
+    calendar_client : Resource
+        None to only record events in the store, e.g. for feeds
+    venues : list or str
+        names of venue scrapers in the registry, or 'all'
+    channels_path : str
+        json of {name: channel id}; defaults to `data/channels.json`
+    scheduler : Scheduler
+        defaults to one on `store`
+    low_quota : bool
+        True to scan uploads instead of the (expensive) search
+    shard : Shard
+        optional; only sources of this worker are polled
+    subscriber : websub.Subscriber
+        optional; channels are subscribed to, and the videos announced
+        are scraped at every tick, whether channels are due or not
+    seen : SeenIndex
+        optional; event pages of venues fetched before are skipped
+    outbox : Outbox
+        optional; events are queued there, and the queue is written to
+        the calendar at the end of each tick
+    youtube : bool
+        False to poll venues only
+    feed : Feed
+        optional; written to `feed_path` at the end of each tick
+    feed_path : str
+        folder of the feed files
+    """
+
+    def __init__(self, store, youtube_client, calendar_client,
+                 venues=(), channels_path: str = None,
+                 scheduler: Scheduler = None, low_quota: bool = False,
+                 shard=None, subscriber=None, seen=None,
+                 outbox=None, youtube: bool = True, feed=None,
+                 feed_path: str = None):
+        self.store = store
+        self.youtube_client = youtube_client
+        self.calendar_client = calendar_client
+        self.channels_path = channels_path if channels_path is not None \
+            else default_channels_path()
+        self.scheduler = scheduler if scheduler is not None \
+            else Scheduler(store)
+        self.low_quota = low_quota
+        self.shard = shard
+        self.subscriber = subscriber
+        self.push_scraper = PushScraper(subscriber, client=youtube_client,
+                                        store=store) \
+            if subscriber is not None else None
+
+        self.seen = seen
+        self.outbox = outbox
+        self.youtube = youtube
+        self.feed = feed
+        self.feed_path = feed_path
+        self.venue_scrapers = list(registry.iter_scrapers(venues)) \
+            if venues else []
+        if seen is not None:
+            self.venue_scrapers = list(attach(self.venue_scrapers, seen))
+        self.channels = dict()
+        self._channels_mtime = None
+        self._youtube_scrapers = dict()
+
+        self._stop = threading.Event()
+        self._server = None
+        self.status = {
+            "started": time.time(),
+            "ticks": 0,
+            "last_tick": None,
+            "last_error": None,
+            "events": 0,
+        }
+
+    def reload_channels(self) -> bool:
+        """Read the channels again if the file changed; True if so."""
+        try:
+            mtime = os.path.getmtime(self.channels_path)
+        except OSError as err:
+            logger.error(f"channels: {err}")
+            return False
+
+        if mtime == self._channels_mtime:
+            return False
+
+        with open(self.channels_path, mode="r") as fp:
+            channels = json.load(fp)
+        if self.subscriber is not None:
+            for ch_id in set(channels.values()) - set(self.channels.values()):
+                self.subscriber.subscribe(ch_id)
+        self.channels = channels
+        self._channels_mtime = mtime
+        logger.info(f"{len(self.channels)} channels loaded")
+
+        return True
+
+    def youtube_scrapers(self) -> list:
+        """Scrapers of the current channels, kept across ticks."""
+        self.reload_channels()
+
+        scrapers = dict()
+        for ch_id in self.channels.values():
+            scrapers[ch_id] = self._youtube_scrapers.get(ch_id) or \
+                YoutubeScraper(ch_id, client=self.youtube_client,
+                               store=self.store)
+        self._youtube_scrapers = scrapers
+
+        return list(scrapers.values())
+
+    def poll(self, scrapers: list, scheduled: bool = True, **kwargs) -> int:
+        """Scrape the sources of `scrapers` due now (all of them unless
+        `scheduled`); return the number of events."""
+        if scheduled:
+            scrapers = self.scheduler.plan(scrapers)
+        if self.shard is not None:
+            scrapers = self.shard.claim(scrapers)
+        if not scrapers:
+            return 0
+
+        stages = scrape_stages(store=self.store,
+                               calendar_client=self.calendar_client,
+                               outbox=self.outbox, **kwargs)
+
+        return sum(1 for _ in pipeline(scrapers, *stages))
+
+    def tick(self) -> int:
+        """Poll all sources due; number of events processed."""
+        n_events = 0
+        try:
+            if self.shard is not None:
+                # stay in the ring even while no source is due
+                self.shard.join()
+            n_events += self.poll(self.venue_scrapers)
+            if self.youtube:
+                n_events += self.poll(self.youtube_scrapers(),
+                                      low_quota=self.low_quota)
+            if self.subscriber is not None:
+                self.subscriber.renew()
+                n_events += self.poll([self.push_scraper], scheduled=False)
+            if self.outbox is not None and self.calendar_client is not None:
+                self.outbox.consume(functools.partial(
+                    insert_event, client=self.calendar_client,
+                    store=self.store
+                ))
+            if self.feed is not None and self.feed_path is not None:
+                self.feed.write(self.feed_path)
+            self.status["last_error"] = None
+        except Exception as err:
+            logger.error(f"tick failed: {err}")
+            self.status["last_error"] = str(err)
+
+        self.status["ticks"] += 1
+        self.status["last_tick"] = time.time()
+        self.status["events"] += n_events
+
+        return n_events
+
+    def run(self, interval: float = 60.) -> None:
+        """Tick every `interval` seconds until `stop()`."""
+        logger.info("daemon started")
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                self._stop.wait(interval)
+        finally:
+            if self.shard is not None:
+                self.shard.leave()
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        logger.info("daemon stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def get_status(self) -> dict:
+        """Counters of the daemon, sources, quota spent and breakers."""
+        status = dict(self.status)
+        status["sources"] = len(self.venue_scrapers) + len(self.channels)
+        status["quota_units"] = ledger.total_units
+        status["quota_calls"] = ledger.total_calls
+        status["breakers"] = limits.states()
+        if self.outbox is not None:
+            status["outbox"] = self.outbox.stats()
+        return status
+
+    def serve_status(self, port: int = 8377,
+                     host: str = "127.0.0.1") -> http.server.HTTPServer:
+        """Serve '/health' and '/status' in a background thread."""
+        self._server = http.server.ThreadingHTTPServer(
+            (host, port), functools.partial(StatusHandler, self)
+        )
+        threading.Thread(target=self._server.serve_forever,
+                         daemon=True).start()
+        logger.info(f"status on http://{host}:"
+                    f"{self._server.server_address[1]}/status")
+
+        return self._server
+
+
+class StatusHandler(http.server.BaseHTTPRequestHandler):
+    """'/health': 200 unless the last tick failed; '/status': json."""
+
+    def __init__(self, daemon: Daemon, *args, **kwargs):
+        self.daemon = daemon
+        super(StatusHandler, self).__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            ok = self.daemon.status["last_error"] is None
+            code, body = (200, b"ok") if ok else (503, b"failing")
+        elif self.path == "/status":
+            code = 200
+            body = json.dumps(self.daemon.get_status()).encode()
+        else:
+            code, body = 404, b"not found"
+
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(format % args)
@@ -0,0 +1,208 @@
+import datetime
+import functools
+import re
+
+import dateutil.parser
+
+# month names, to be translated to english before `strptime`
+MONTHS = {
+    "de": {
+        "Januar": "January", "Februar": "February", "März": "March",
+        "April": "April", "Mai": "May", "Juni": "June", "Juli": "July",
+        "August": "August", "September": "September", "Oktober": "October",
+        "November": "November", "Dezember": "December",
+    },
+    "hu": {
+        "január": "January", "február": "February", "március": "March",
+        "április": "April", "május": "May", "június": "June",
+        "július": "July", "augusztus": "August", "szeptember": "September",
+        "október": "October", "november": "November", "december": "December",
+    },
+    "sv": {
+        "januari": "January", "februari": "February", "mars": "March",
+        "april": "April", "maj": "May", "juni": "June", "juli": "July",
+        "augusti": "August", "september": "September", "oktober": "October",
+        "november": "November", "december": "December",
+    },
+    "it": {
+        "gennaio": "January", "febbraio": "February", "marzo": "March",
+        "aprile": "April", "maggio": "May", "giugno": "June",
+        "luglio": "July", "agosto": "August", "settembre": "September",
+        "ottobre": "October", "novembre": "November", "dicembre": "December",
+    },
+}
+
+_MONTH_NAMES = ("January", "February", "March", "April", "May", "June",
+                "July", "August", "September", "October", "November",
+                "December")
+_DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+              "Saturday", "Sunday")
+
+# directives which can be compiled; anything else is left to `strptime`
+_DIRECTIVES = {
+    "d": r"(?P<d>[0-9]{1,2})",
+    "m": r"(?P<m>[0-9]{1,2})",
+    "Y": r"(?P<Y>[0-9]{4})",
+    "y": r"(?P<y>[0-9]{2})",
+    "H": r"(?P<H>[0-9]{1,2})",
+    "I": r"(?P<I>[0-9]{1,2})",
+    "M": r"(?P<M>[0-9]{1,2})",
+    "p": r"(?P<p>[ap]m)",
+    "B": r"(?P<B>{})".format("|".join(_MONTH_NAMES)),
+    "b": r"(?P<b>{})".format("|".join(m_[:3] for m_ in _MONTH_NAMES)),
+    "A": r"(?:{})".format("|".join(_DAY_NAMES)),
+    "a": r"(?:{})".format("|".join(d_[:3] for d_ in _DAY_NAMES)),
+    "%": "%",
+}
+
+_MONTH_NUMBERS = {m_.lower(): i_ + 1 for i_, m_ in enumerate(_MONTH_NAMES)}
+_MONTH_NUMBERS.update(
+    {m_[:3].lower(): i_ + 1 for i_, m_ in enumerate(_MONTH_NAMES)}
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _months_pattern(locale: str):
+    """Compile month names of `locale` into one alternation."""
+    names = sorted(MONTHS[locale], key=len, reverse=True)
+    return re.compile(r"\b({})\b".format("|".join(names)), re.IGNORECASE)
+
+
+def translate_months(text: str, locale: str) -> str:
+    """Replace month names of `locale` in `text` by english ones.
+
+    Parameters
+    ----------
+    text : str
+        e.g. '20. Mai 2021'
+    locale : str
+        one of the keys of `MONTHS`, e.g. 'de'
+
+    Returns
+    -------
+    str
+        e.g. '20. May 2021'
+    """
+    table = {k.lower(): v for k, v in MONTHS[locale].items()}
+    return _months_pattern(locale) \
+        .sub(lambda m_: table[m_.group(0).lower()], text)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_format(fmt: str):
+    """Compile a `strptime` format into a regex, or None if unsupported."""
+    res = list()
+    seen = set()
+    i = 0
+    while i < len(fmt):
+        c = fmt[i]
+        if c == "%":
+            if i + 1 >= len(fmt) or fmt[i + 1] not in _DIRECTIVES:
+                return None
+            d = fmt[i + 1]
+            if d in seen and d != "%":
+                return None
+            seen.add(d)
+            res.append(_DIRECTIVES[d])
+            i += 2
+        elif c.isspace():
+            # as in `strptime`, any whitespace matches any whitespace
+            while i < len(fmt) and fmt[i].isspace():
+                i += 1
+            res.append(r"\s+")
+        else:
+            res.append(re.escape(c))
+            i += 1
+
+    return re.compile("".join(res), re.IGNORECASE)
+
+
+def strptime(text: str, fmt: str) -> datetime.datetime:
+    """Drop-in replacement of `datetime.datetime.strptime`.
+
+    The format is compiled once; formats with directives other than those
+    used on the scraped websites fall back to `datetime.strptime`. Unlike
+    the latter, english month and day names are matched regardless of the
+    locale.
+    """
+    pattern = _compile_format(fmt)
+    if pattern is None:
+        return datetime.datetime.strptime(text, fmt)
+
+    match = pattern.fullmatch(text)
+    if match is None:
+        raise ValueError(f"time data {text!r} does not match format {fmt!r}")
+    g = match.groupdict()
+
+    if g.get("Y") is not None:
+        year = int(g["Y"])
+    elif g.get("y") is not None:
+        year = 2000 + int(g["y"]) if int(g["y"]) < 69 \
+            else 1900 + int(g["y"])
+    else:
+        year = 1900
+
+    if g.get("m") is not None:
+        month = int(g["m"])
+    elif g.get("B") is not None:
+        month = _MONTH_NUMBERS[g["B"].lower()]
+    elif g.get("b") is not None:
+        month = _MONTH_NUMBERS[g["b"].lower()]
+    else:
+        month = 1
+
+    if g.get("H") is not None:
+        hour = int(g["H"])
+    elif g.get("I") is not None:
+        hour = int(g["I"]) % 12
+        if (g.get("p") or "am").lower() == "pm":
+            hour += 12
+    else:
+        hour = 0
+
+    return datetime.datetime(year, month, int(g.get("d") or 1), hour,
+                             int(g.get("M") or 0))
+
+
+def parse(text: str, fmt: str, locale: str = None) -> datetime.datetime:
+    """Parse a date in language `locale` with a `strptime` format."""
+    if locale is not None and locale != "en":
+        text = translate_months(text, locale)
+
+    return strptime(text, fmt)
+
+
+def infer_year(dt: datetime.datetime,
+               now: datetime.datetime = None) -> datetime.datetime:
+    """Set the year of a date printed without one.
+
+    Websites list upcoming events only, hence a month earlier than the
+    current one is taken to be in the next year.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+
+    if dt.month < now.month:
+        return dt.replace(year=now.year + 1)
+
+    return dt.replace(year=now.year)
+
+
+def parse_iso(value) -> datetime.datetime:
+    """Parse an ISO-8601 timestamp, such as those returned by google apis.
+
+    Parameters
+    ----------
+    value : str or datetime.datetime
+        e.g. '2021-05-20T18:00:00Z'; datetimes are returned as is
+    """
+    if isinstance(value, datetime.datetime):
+        return value
+
+    try:
+        # `fromisoformat` only learned 'Z' in python 3.11
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return dateutil.parser.isoparse(value)
@@ -0,0 +1,98 @@
+import contextlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger("main.deadline")
+
+# max seconds of any single http request
+REQUEST_TIMEOUT = 30.
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of starting work past the deadline."""
+    pass
+
+
+class Deadline:
+    """Point in time by which work must be done, and what was skipped.
+
+    Parameters
+    ----------
+    seconds : float
+        from now; None for no deadline
+    parent : Deadline
+        optional; never later than the parent's, and skipped work is
+        reported to it
+    """
+
+    def __init__(self, seconds: float = None, parent=None):
+        self.expires = time.monotonic() + seconds if seconds is not None \
+            else float("inf")
+        self.parent = parent
+        if parent is not None:
+            self.expires = min(self.expires, parent.expires)
+        self.skipped = list()
+        self._lock = threading.Lock()
+
+    def child(self, seconds: float = None):
+        """Deadline at most `seconds` from now, within this one."""
+        return Deadline(seconds, parent=self)
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self) -> None:
+        """Raise `DeadlineExceeded` if expired."""
+        if self.expired:
+            raise DeadlineExceeded("deadline exceeded")
+
+    def timeout(self, cap: float = REQUEST_TIMEOUT) -> float:
+        """Seconds left for one request: at most `cap`, or the remaining."""
+        self.check()
+        return min(cap, self.remaining())
+
+    def skip(self, source: str, what: str) -> None:
+        """Report work not done because of the deadline."""
+        if self.parent is not None:
+            self.parent.skip(source, what)
+            return
+        with self._lock:
+            self.skipped.append((source, what))
+
+    def report(self) -> str:
+        """What was skipped, one line per source."""
+        return "\n".join(f"{s_}: {w_}" for s_, w_ in self.skipped)
+
+
+# deadline of the run, and of the current thread if any (e.g. of a source)
+_deadline = Deadline()
+_local = threading.local()
+
+
+def get_deadline() -> Deadline:
+    return getattr(_local, "deadline", None) or _deadline
+
+
+@contextlib.contextmanager
+def use_deadline(deadline: Deadline, local: bool = False):
+    """Run a block under `deadline`, in all threads or only this one."""
+    global _deadline
+
+    if local:
+        previous = getattr(_local, "deadline", None)
+        _local.deadline = deadline
+    else:
+        previous, _deadline = _deadline, deadline
+
+    try:
+        yield deadline
+    finally:
+        if local:
+            _local.deadline = previous
+        else:
+            _deadline = previous
@@ -0,0 +1,167 @@
+import collections
+import datetime
+import re
+import unicodedata
+
+# words saying nothing about which concert it is
+STOPWORDS = frozenset((
+    "a", "and", "at", "by", "concert", "der", "die", "das", "for",
+    "from", "in", "live", "livestream", "of", "on", "online", "premiere",
+    "stream", "the", "to", "und", "with", "mit",
+))
+
+
+def tokenize(title: str) -> list:
+    """Lower-case, accent-free words of a title, without stopwords."""
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(c for c in title if not unicodedata.combining(c))
+    words = re.split(r"[^0-9a-z]+", title.lower())
+    return [w_ for w_ in words
+            if (len(w_) > 1 or w_.isdigit()) and w_ not in STOPWORDS]
+
+
+def shingles(tokens: list, n: int = 3) -> frozenset:
+    """Character n-grams of the tokens, each token padded with spaces."""
+    res = set()
+    for t_ in tokens:
+        t_ = f" {t_} "
+        res.update(t_[i_:i_ + n] for i_ in range(len(t_) - n + 1))
+    return frozenset(res)
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Overlap coefficient of two sets of shingles.
+
+    Unlike jaccard, a title contained in a longer one (e.g. with the name
+    of the orchestra prepended) counts as similar.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def richness(event) -> tuple:
+    """Sort key of the event to keep out of a cluster of duplicates."""
+    return (bool(event.description), len(event.description or ""),
+            len(event.summary))
+
+
+def enrich(kept, other):
+    """`kept`, with the description of its duplicate `other` if richer.
+
+    The start and summary of `kept`, and so its key, are left as they
+    are; `kept` itself is returned if `other` adds nothing.
+    """
+    if richness(other) <= richness(kept) or \
+            other.description == kept.description:
+        return kept
+    return kept.replace(description=other.description)
+
+
+class DedupeIndex:
+    """Clusters of events describing the same concert.
+
+    Events are bucketed by start time; within neighbouring buckets, only
+    events sharing a title word are compared (words frequent in a bucket
+    are not used for lookup), such that the work per event does not grow
+    with the total number of events. Titles with numbers in common with
+    none of the other's numbers are never duplicates.
+
+    Parameters
+    ----------
+    window : datetime.timedelta
+        max difference between starts of duplicates
+    threshold : float
+        min similarity of titles of duplicates, see `similarity()`
+    max_df : int
+        words found in more events of a bucket are not used for lookup
+    """
+
+    def __init__(self, window: datetime.timedelta = None,
+                 threshold: float = 0.6, max_df: int = 50):
+        if window is None:
+            window = datetime.timedelta(minutes=30)
+        self.window = window.total_seconds()
+        self.threshold = threshold
+        self.max_df = max_df
+
+        self.events = list()
+        self._shingles = list()
+        self._nums = list()
+        self._ts = list()
+        self._parent = list()
+        # (bucket, word) -> indexes of events
+        self._postings = collections.defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @staticmethod
+    def _numbers(tokens: list) -> frozenset:
+        return frozenset(t_ for t_ in tokens if t_.isdigit())
+
+    def _find(self, i_: int) -> int:
+        while self._parent[i_] != i_:
+            self._parent[i_] = self._parent[self._parent[i_]]
+            i_ = self._parent[i_]
+        return i_
+
+    def _union(self, i_: int, j_: int) -> None:
+        r_i, r_j = self._find(i_), self._find(j_)
+        if r_i != r_j:
+            self._parent[max(r_i, r_j)] = min(r_i, r_j)
+
+    def _key(self, event) -> tuple:
+        """(start timestamp, tokens, shingles, numbers) of `event`."""
+        tokens = tokenize(event.summary)
+        return (event.start.timestamp(), tokens, shingles(tokens),
+                self._numbers(tokens))
+
+    def _match(self, a: tuple, b: tuple) -> bool:
+        ts_a, _, sh_a, nums_a = a
+        ts_b, _, sh_b, nums_b = b
+        if abs(ts_a - ts_b) > self.window:
+            return False
+        # e.g. 'symphony no 5' and 'symphony no 9'
+        if nums_a and nums_b and not nums_a & nums_b:
+            return False
+        return similarity(sh_a, sh_b) >= self.threshold
+
+    def duplicates(self, a, b) -> bool:
+        """Do events `a` and `b` describe the same concert?"""
+        return self._match(self._key(a), self._key(b))
+
+    def _candidates(self, ts: float, tokens: list) -> set:
+        bucket = int(ts // self.window)
+        candidates = set()
+        for b_ in (bucket - 1, bucket, bucket + 1):
+            for w_ in set(tokens):
+                postings = self._postings.get((b_, w_), ())
+                if len(postings) <= self.max_df:
+                    candidates.update(postings)
+        return candidates
+
+    def add(self, event) -> int:
+        """Add an event; return the id of its cluster, that is the index
+        of its first event added."""
+        idx = len(self.events)
+        ts, tokens, sh, nums = key = self._key(event)
+
+        self.events.append(event)
+        self._shingles.append(sh)
+        self._nums.append(nums)
+        self._ts.append(ts)
+        self._parent.append(idx)
+
+        for j_ in self._candidates(ts, tokens):
+            if self._find(j_) == self._find(idx):
+                continue
+            if self._match(key, (self._ts[j_], None, self._shingles[j_],
+                                 self._nums[j_])):
+                self._union(idx, j_)
+
+        bucket = int(ts // self.window)
+        for w_ in set(tokens):
+            self._postings[(bucket, w_)].append(idx)
+
+        return self._find(idx)
@@ -0,0 +1,335 @@
+import collections
+import datetime
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import types
+import urllib.parse
+import urllib.request
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from .dates import parse_iso
+from .quota import cost_of
+
+
+class Catalog:
+    """Channels and their videos, as served by `FakeYoutube`.
+
+    Parameters
+    ----------
+    channels : dict
+        of {channel_id: {"title": str, "videos": list}}, where each video is
+        a dict as returned by `videos().list(part="snippet,
+        liveStreamingDetails")`
+    """
+
+    def __init__(self, channels: dict = None):
+        self.channels = channels if channels is not None else dict()
+        self.videos = {
+            v_["id"]: v_
+            for ch_ in self.channels.values() for v_ in ch_["videos"]
+        }
+
+    @classmethod
+    def synthetic(cls, n_channels: int, n_videos: int = 60,
+                  share_livestreams: float = 0.2,
+                  share_upcoming: float = 0.5, seed: int = 0):
+        """Generate a catalog of random channels.
+
+        Parameters
+        ----------
+        n_channels : int
+        n_videos : int
+            uploads per channel, newest first
+        share_livestreams : float
+            share of uploads which are livestreams
+        share_upcoming : float
+            share of livestreams which are scheduled in the future
+        seed : int
+        """
+        rng = random.Random(seed)
+        now = datetime.datetime.now(datetime.timezone.utc)\
+            .replace(microsecond=0)
+
+        channels = dict()
+        for i_ch in range(n_channels):
+            ch_id = f"UCfake{i_ch:018d}"
+            title = f"orchestra {i_ch}"
+            videos = list()
+            for i_v in range(n_videos):
+                video = {
+                    "id": f"v{i_ch:06d}x{i_v:04d}",
+                    "snippet": {
+                        "channelId": ch_id,
+                        "channelTitle": title,
+                        "title": f"concert {i_v} of {title}",
+                        "description": "",
+                    },
+                }
+                if rng.random() < share_livestreams:
+                    delta = datetime.timedelta(hours=rng.randint(1, 24 * 60))
+                    start = now + delta if rng.random() < share_upcoming \
+                        else now - delta
+                    video["liveStreamingDetails"] = {
+                        "scheduledStartTime":
+                            start.isoformat().replace("+00:00", "Z")
+                    }
+                videos.append(video)
+            channels[ch_id] = {"title": title, "videos": videos}
+
+        return cls(channels)
+
+    def names(self) -> dict:
+        """Channels as in `data/channels.json`: {title: channel_id}."""
+        return {v_["title"]: k for k, v_ in self.channels.items()}
+
+
+class FakeRequest:
+    """Deferred api call, mimicking `googleapiclient.http.HttpRequest`."""
+
+    def __init__(self, service, method_id: str, fn, **kwargs):
+        self.service = service
+        self.methodId = method_id
+        self.fn = fn
+        self.kwargs = kwargs
+
+    def execute(self):
+        return self.service.call(self.methodId, self.fn, **self.kwargs)
+
+
+class _Collection:
+    """One collection of an api, e.g. `youtube.videos()`."""
+
+    def __init__(self, service, name: str):
+        self.service = service
+        self.name = name
+
+    def __getattr__(self, method):
+        fn = getattr(self.service, f"_{self.name}_{method}")
+
+        def make_request(**kwargs):
+            return FakeRequest(self.service,
+                               f"{self.service.NAME}.{self.name}.{method}",
+                               fn, **kwargs)
+
+        return make_request
+
+
+class FakeService:
+    """Base of api stand-ins with latency, quota and failures.
+
+    Parameters
+    ----------
+    latency : float
+        seconds each call takes
+    error_rate : float
+        probability of a call failing with a 503
+    quota : int
+        units available; calls beyond fail with 403 'quotaExceeded'
+    seed : int
+    """
+
+    NAME = None
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 quota: int = 10000, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota = quota
+        self.quota_used = 0
+        self.calls = collections.Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda: _Collection(self, name)
+
+    @staticmethod
+    def _error(status: int, reason: str, message: str):
+        content = {"error": {"code": status, "message": message,
+                             "errors": [{"reason": reason,
+                                         "message": message}]}}
+        return HttpError(httplib2.Response({"status": status}),
+                         json.dumps(content).encode())
+
+    def call(self, method_id: str, fn, **kwargs):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.calls[method_id] += 1
+            cost = cost_of(method_id)
+            if self.quota_used + cost > self.quota:
+                raise self._error(403, "quotaExceeded",
+                                  "The request cannot be completed because "
+                                  "you have exceeded your quota.")
+            self.quota_used += cost
+            failed = self._rng.random() < self.error_rate
+
+        if failed:
+            raise self._error(503, "backendError", "Backend Error")
+
+        return fn(**kwargs)
+
+
+class FakeYoutube(FakeService):
+    """Stand-in of the youtube data api v3 client over a `Catalog`."""
+
+    NAME = "youtube"
+
+    def __init__(self, catalog: Catalog, **kwargs):
+        super(FakeYoutube, self).__init__(**kwargs)
+        self.catalog = catalog
+
+    @staticmethod
+    def _split(ids: str) -> list:
+        return [id_ for id_ in ids.split(",") if id_]
+
+    def _channels_list(self, part: str, id: str, **kwargs) -> dict:
+        items = [
+            {"id": ch_id,
+             "contentDetails": {
+                 "relatedPlaylists": {"uploads": "UU" + ch_id[2:]}
+             }}
+            for ch_id in self._split(id) if ch_id in self.catalog.channels
+        ]
+        return {"items": items}
+
+    def _playlistItems_list(self, part: str, playlistId: str,
+                            maxResults: int = 5, **kwargs) -> dict:
+        channel = self.catalog.channels.get("UC" + playlistId[2:],
+                                            {"videos": []})
+        items = [{"contentDetails": {"videoId": v_["id"]}}
+                 for v_ in channel["videos"][:maxResults]]
+        return {"items": items}
+
+    def _search_list(self, part: str, channelId: str, type: str = "video",
+                     eventType: str = None, **kwargs) -> dict:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        channel = self.catalog.channels.get(channelId, {"videos": []})
+        items = list()
+        for v_ in channel["videos"]:
+            details = v_.get("liveStreamingDetails")
+            if eventType == "upcoming" and (
+                    details is None or
+                    parse_iso(details["scheduledStartTime"]) < now):
+                continue
+            items.append({"id": {"kind": "youtube#video",
+                                 "videoId": v_["id"]}})
+        return {"items": items}
+
+    def _videos_list(self, part: str, id: str, **kwargs) -> dict:
+        parts = part.split(",")
+        items = list()
+        for id_ in self._split(id):
+            video = self.catalog.videos.get(id_)
+            if video is None:
+                continue
+            item = {"id": id_}
+            item.update({p_: video[p_] for p_ in parts if p_ in video})
+            items.append(item)
+        return {"items": items}
+
+
+class FakeCalendar(FakeService):
+    """Stand-in of the google calendar api v3 client, in memory."""
+
+    NAME = "calendar"
+
+    def __init__(self, **kwargs):
+        super(FakeCalendar, self).__init__(**kwargs)
+        self.stored = list()
+
+    def _events_list(self, calendarId: str, timeMin: str, timeMax: str,
+                     **kwargs) -> dict:
+        t_min, t_max = parse_iso(timeMin), parse_iso(timeMax)
+        items = [
+            e_ for e_ in self.stored
+            if t_min <= parse_iso(e_["start"]["dateTime"]) < t_max
+        ]
+        return {"items": items}
+
+    def _events_insert(self, calendarId: str, body: dict) -> dict:
+        with self._lock:
+            body = dict(body, id=f"evt{len(self.stored):08d}")
+            self.stored.append(body)
+        return body
+
+
+class LocalHub:
+    """Stand-in of a WebSub hub (as youtube's), talking http to callbacks.
+
+    Verification of intent is done at once, within `post()`.
+    """
+
+    FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+      xmlns="http://www.w3.org/2005/Atom">
+<entry>
+<id>yt:video:{video_id}</id>
+<yt:videoId>{video_id}</yt:videoId>
+<yt:channelId>{channel_id}</yt:channelId>
+<title>{title}</title>
+</entry>
+</feed>"""
+
+    def __init__(self):
+        # topic -> {callback: (secret, expiry)}
+        self.subscriptions = collections.defaultdict(dict)
+        self._rng = random.Random(0)
+
+    def post(self, url: str, data: dict, timeout: float = None):
+        """Like `requests.post` to the hub."""
+        mode, topic = data["hub.mode"], data["hub.topic"]
+        callback = data["hub.callback"]
+        challenge = f"{self._rng.getrandbits(64):x}"
+        query = urllib.parse.urlencode({
+            "hub.mode": mode, "hub.topic": topic, "hub.challenge": challenge,
+            "hub.lease_seconds": data.get("hub.lease_seconds", 86400)
+        })
+
+        sep = "&" if "?" in callback else "?"
+        try:
+            with urllib.request.urlopen(callback + sep + query,
+                                        timeout=timeout) as res:
+                verified = res.read().decode() == challenge
+        except OSError:
+            verified = False
+
+        if verified and mode == "subscribe":
+            expires = time.time() + float(data.get("hub.lease_seconds",
+                                                   86400))
+            self.subscriptions[topic][callback] = (data.get("hub.secret"),
+                                                   expires)
+        elif verified and mode == "unsubscribe":
+            self.subscriptions[topic].pop(callback, None)
+
+        return types.SimpleNamespace(status_code=202)
+
+    def publish(self, topic: str, video_id: str, channel_id: str,
+                title: str = "") -> int:
+        """Notify the subscribers of `topic`; return how many."""
+        body = self.FEED.format(video_id=video_id, channel_id=channel_id,
+                                title=title).encode()
+        n = 0
+        for callback, (secret, expires) in \
+                list(self.subscriptions[topic].items()):
+            if expires < time.time():
+                continue
+            req = urllib.request.Request(
+                callback, data=body,
+                headers={"Content-Type": "application/atom+xml"}
+            )
+            if secret is not None:
+                req.add_header("X-Hub-Signature", "sha1=" + hmac.new(
+                    secret.encode(), body, hashlib.sha1).hexdigest())
+            with urllib.request.urlopen(req):
+                n += 1
+        return n
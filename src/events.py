@@ -0,0 +1,110 @@
+import datetime
+import hashlib
+import re
+
+import pytz
+
+from .dates import parse_iso
+
+hourandhalf = datetime.timedelta(hours=1, minutes=30)
+
+
+def normalize_summary(summary: str) -> str:
+    """Lower-case, single-spaced summary, as used in `Event.key`."""
+    return re.sub(r"\s+", " ", summary).strip().lower()
+
+
+class Event:
+    """Immutable concert event.
+
+    Start and end are parsed once, to tz-aware UTC datetimes; the calendar
+    api body is only created in `to_body()`.
+
+    Parameters
+    ----------
+    start : str or datetime.datetime
+        ISO format or tz-aware
+    summary : str
+    description : str
+    end : str or datetime.datetime
+        defaults to 1.5 hours after the start
+    source : str
+        what produced the event, e.g. 'channel UC...' or 'HrScraper'
+    ref : str
+        id of the event at the source, e.g. the video id or the page url
+    """
+
+    __slots__ = ("start", "end", "summary", "description", "source", "ref",
+                 "key")
+
+    def __init__(self, start, summary: str, description: str = "",
+                 end=None, source: str = None, ref: str = None):
+        start = parse_iso(start)
+        if start.tzinfo is None:
+            raise ValueError("start time must be time zone-aware")
+        start = start.astimezone(pytz.utc)
+        end = parse_iso(end).astimezone(pytz.utc) if end is not None \
+            else start + hourandhalf
+        summary = summary.strip()
+
+        # stable across runs and processes, unlike `hash()`
+        key = hashlib.blake2b(
+            f"{start.isoformat()}|{normalize_summary(summary)}".encode(),
+            digest_size=8
+        ).hexdigest()
+
+        for k, v in (("start", start), ("end", end), ("summary", summary),
+                     ("description", description), ("source", source),
+                     ("ref", ref), ("key", key)):
+            object.__setattr__(self, k, v)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Event is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("Event is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"Event({self.start.isoformat()}, {self.summary!r})"
+
+    def __reduce__(self):
+        return (Event, (self.start, self.summary, self.description, self.end,
+                        self.source, self.ref))
+
+    def replace(self, **kwargs):
+        """Copy of the event with some fields replaced."""
+        fields = {k: getattr(self, k) for k in ("start", "summary",
+                                                "description", "end",
+                                                "source", "ref")}
+        fields.update(kwargs)
+        return Event(**fields)
+
+    @classmethod
+    def from_dict(cls, event: dict, source: str = None, ref: str = None):
+        """Create from a calendar api-like dict."""
+        return cls(start=event["start"]["dateTime"],
+                   end=event.get("end", {}).get("dateTime"),
+                   summary=event["summary"],
+                   description=event.get("description", ""),
+                   source=source, ref=ref)
+
+    def to_body(self) -> dict:
+        """Event as the body of calendar api `events().insert()`."""
+        return {
+            "start": {
+                "dateTime": self.start.isoformat(),
+            },
+            "end": {
+                "dateTime": self.end.isoformat(),
+            },
+            "summary": self.summary,
+            "description": self.description,
+        }
@@ -0,0 +1,249 @@
+import collections
+import logging
+import math
+import time
+import urllib.parse
+
+from .core import MAX_RESULTS
+from .journal import DONE, SCANNED
+from .outbox import READY
+from .quota import cost_of
+from .schedule import Scheduler
+from .shard import HashRing
+
+logger = logging.getLogger("main.explain")
+
+# api calls to scan a channel, by method
+LOW_QUOTA_SCAN = ("youtube.channels.list", "youtube.playlistItems.list",
+                  "youtube.videos.list")
+SEARCH_SCAN = ("youtube.search.list",)
+
+# api calls to write an event: look for it, then insert it
+CALENDAR_WRITE = ("calendar.events.list", "calendar.events.insert")
+
+
+class Plan:
+    """Estimated cost of a run: fetches, api calls, quota and writes.
+
+    Attributes
+    ----------
+    fetches : collections.Counter
+        of pages, by host
+    calls : collections.Counter
+        of api calls, by method id (e.g. 'youtube.search.list')
+    writes : float
+        events expected to be written to the calendar
+    sources : list
+        of (source, what will happen)
+    """
+
+    def __init__(self):
+        self.fetches = collections.Counter()
+        self.calls = collections.Counter()
+        self.writes = 0.
+        self.sources = list()
+
+    @property
+    def units(self) -> int:
+        """Quota units of the calls, see `quota.QUOTA_COSTS`."""
+        return sum(cost_of(m_) * n_ for m_, n_ in self.calls.items())
+
+    def report(self) -> str:
+        lines = [f"{s_}: {w_}" for s_, w_ in self.sources]
+        lines += [f"fetch {h_}: {n_:.0f} pages"
+                  for h_, n_ in sorted(self.fetches.items())]
+        lines += [f"call {m_}: {n_:.0f}, {cost_of(m_) * n_:.0f} units"
+                  for m_, n_ in sorted(self.calls.items())]
+        lines.append(f"total: {sum(self.fetches.values()):.0f} pages, "
+                     f"{sum(self.calls.values()):.0f} calls, "
+                     f"{self.units:.0f} units, {self.writes:.0f} events "
+                     f"written")
+        return "\n".join(lines)
+
+    def compare(self, calls: dict, fetches: dict) -> str:
+        """Estimates next to actual counts, e.g. of `quota.ledger.calls`
+        and `LiveTransport.fetches`."""
+        lines = list()
+        for what, estimated, actual in (("fetch", self.fetches, fetches),
+                                        ("call", self.calls, calls)):
+            for k_ in sorted(set(estimated) | set(actual)):
+                lines.append(f"{what} {k_}: estimated "
+                             f"{estimated.get(k_, 0):.0f}, actual "
+                             f"{actual.get(k_, 0)}")
+        actual_units = sum(cost_of(m_) * n_ for m_, n_ in calls.items())
+        lines.append(f"units: estimated {self.units:.0f}, actual "
+                     f"{actual_units}")
+        return "\n".join(lines)
+
+
+class Planner:
+    """Estimate what a run would cost, out of the state of the store.
+
+    Nothing is fetched nor called: each source is walked as the run
+    would (which sources are due, owned by this worker, done before in
+    a resumed run), and its cost is derived from its last polls, its
+    events not in the calendar yet and, for venues, the pages which the
+    `seen` index would fetch again.
+
+    Parameters
+    ----------
+    store : EventStore
+    scheduler : Scheduler
+        optional; only sources due are planned
+    shard : Shard
+        optional; only sources of this worker are planned
+    journal : Journal
+        optional; a resumed run
+    seen : SeenIndex
+        optional; event pages fetched before are skipped
+    outbox : Outbox
+        optional; events queued are written too
+    low_quota : bool
+        True if channels are scanned instead of searched
+    calendar : bool
+        False if events are not written
+    """
+
+    def __init__(self, store, scheduler=None, shard=None, journal=None,
+                 seen=None, outbox=None, low_quota: bool = False,
+                 calendar: bool = True):
+        self.store = store
+        self.scheduler = scheduler
+        self.shard = shard
+        self.journal = journal
+        self.seen = seen
+        self.outbox = outbox
+        self.low_quota = low_quota
+        self.calendar = calendar
+        # for expected new events, whether sources are due or not
+        self._rates = scheduler if scheduler is not None \
+            else Scheduler(store)
+
+    def _count(self, sql: str, params=()) -> int:
+        return self.store.execute(sql, params)[0][0]
+
+    def _pending(self, source: str, now: float) -> int:
+        """Upcoming events of `source` not in the calendar yet, nor
+        merged into others."""
+        return self._count(
+            "SELECT COUNT(*) FROM events WHERE source = ? AND start_ts >= ? "
+            "AND calendar_id IS NULL AND key NOT IN (SELECT key FROM merged)",
+            (source, now)
+        )
+
+    def _host(self, scraper) -> str:
+        spec = getattr(scraper, "spec", None)
+        if spec is not None:
+            return urllib.parse.urlsplit(spec.url).netloc
+        hosts = collections.Counter(
+            urllib.parse.urlsplit(r_[0]).netloc for r_ in self.store.execute(
+                "SELECT ref FROM events WHERE source = ? AND ref LIKE 'http%'",
+                (str(scraper),)
+            )
+        )
+        return hosts.most_common(1)[0][0] if hosts else f"({scraper})"
+
+    def _pages(self, source: str, refs: int, new: float,
+               now: float) -> float:
+        """Event pages of `source` expected to be fetched."""
+        # sources whose references are no pages, e.g. rows of a table
+        if self._count("SELECT COUNT(*) FROM events WHERE source = ?",
+                       (source,)) > 0 and \
+                self._count("SELECT COUNT(ref) FROM events WHERE source = ?",
+                            (source,)) == 0:
+            return 0.
+        if self.seen is None:
+            return refs
+
+        due = self._count(
+            "SELECT COUNT(*) FROM seen_pages s LEFT JOIN events e "
+            "ON e.key = s.event_key WHERE s.source = ? AND s.start_ts >= ? "
+            "AND s.start_ts <= ? AND (s.last_fetched < ? OR ? AND "
+            "e.calendar_id IS NULL)",
+            (source, now, now + self.seen.horizon, now - self.seen.refresh,
+             self.seen.inserted)
+        )
+        return due + new
+
+    def _source(self, scraper, plan: Plan, now: float) -> None:
+        source = str(scraper)
+        status = self.journal.status(source) \
+            if self.journal is not None else None
+
+        if status == DONE:
+            n_write = len(self.journal.pending_events(source))
+            self._write(plan, n_write)
+            plan.sources.append((source, f"done before, {n_write} to write"))
+            return
+
+        polls = self.store.polls(source, limit=1)
+        new = self._rates.expected_value(source, now) if polls else 0.
+        pending = self._pending(source, now)
+        journaled = self.journal.refs(source) if status == SCANNED else None
+        youtube = getattr(scraper, "kind", None) == "youtube"
+
+        if youtube:
+            if journaled is None:
+                for m_ in LOW_QUOTA_SCAN if self.low_quota else SEARCH_SCAN:
+                    plan.calls[m_] += 1
+            # scanning uploads gets the details along; videos already in
+            # the calendar are left out by the scan
+            if journaled is not None or not self.low_quota:
+                refs = len(journaled) if journaled is not None \
+                    else pending + new
+                plan.calls["youtube.videos.list"] += \
+                    math.ceil(refs / MAX_RESULTS)
+        else:
+            if journaled is not None:
+                pages = len(journaled)
+            elif polls:
+                pages = self._pages(source, polls[0][1], new, now) + 1
+            else:
+                pages = 1
+            plan.fetches[self._host(scraper)] += pages
+
+        if not polls:
+            plan.sources.append((source, "never polled, events unknown"))
+            return
+
+        self._write(plan, pending + new)
+        plan.sources.append((source, f"{pending} pending, "
+                                     f"~{new:.1f} new events"))
+
+    def _write(self, plan: Plan, n_events: float) -> None:
+        if not self.calendar:
+            return
+        plan.writes += n_events
+        for m_ in CALENDAR_WRITE:
+            plan.calls[m_] += n_events
+
+    def plan(self, scrapers, now: float = None, plan: Plan = None) -> Plan:
+        """Plan of polling `scrapers`, added to `plan` if given."""
+        now = now if now is not None else time.time()
+        plan = plan if plan is not None else Plan()
+
+        scrapers = list(scrapers)
+        if self.scheduler is not None:
+            scrapers = self.scheduler.plan(scrapers, now)
+        if self.shard is not None:
+            # without taking leases, unlike `Shard.claim()`; this worker
+            # is in the ring once it runs, whether it has joined yet or not
+            ring = HashRing(set(self.shard.members()) |
+                            {self.shard.worker_id})
+            scrapers = [s_ for s_ in scrapers
+                        if ring.owner(str(s_)) in (None,
+                                                   self.shard.worker_id)]
+
+        logger.info(f"planning {len(scrapers)} sources")
+        for s_ in scrapers:
+            self._source(s_, plan, now)
+
+        return plan
+
+    def queued(self, plan: Plan) -> Plan:
+        """Add the events waiting in the outbox to `plan`."""
+        if self.outbox is not None:
+            n_queued = self.outbox.stats().get(READY, 0)
+            self._write(plan, n_queued)
+            plan.sources.append(("outbox", f"{n_queued} queued"))
+        return plan
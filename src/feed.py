@@ -0,0 +1,242 @@
+import datetime
+import functools
+import gzip
+import hashlib
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("main.feed")
+
+PRODID = "-//concertscrape//livestreams//EN"
+
+FORMATS = {
+    "ics": "text/calendar; charset=utf-8",
+    "json": "application/json",
+}
+
+
+def _ics_text(text: str) -> str:
+    """Escape text as an ics value."""
+    return text.replace("\\", "\\\\").replace(";", "\\;") \
+        .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _ics_time(dt: datetime.datetime) -> str:
+    return dt.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fold(line: str) -> str:
+    """Fold a content line into lines of at most 75 octets."""
+    res, chunk = list(), ""
+    for c_ in line:
+        if len((chunk + c_).encode()) > 75:
+            res.append(chunk)
+            chunk = " "
+        chunk += c_
+    res.append(chunk)
+    return "\r\n".join(res)
+
+
+def to_vevent(event, stamp: datetime.datetime) -> str:
+    """VEVENT of an event, CRLF-terminated."""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.key}@concertscrape",
+        f"DTSTAMP:{_ics_time(stamp)}",
+        f"DTSTART:{_ics_time(event.start)}",
+        f"DTEND:{_ics_time(event.end)}",
+        f"SUMMARY:{_ics_text(event.summary)}",
+    ]
+    if event.description:
+        lines.append(f"DESCRIPTION:{_ics_text(event.description)}")
+    lines.append("END:VEVENT")
+
+    return "".join(_fold(l_) + "\r\n" for l_ in lines)
+
+
+def to_record(event) -> dict:
+    """Json-able dict of an event."""
+    return {"key": event.key,
+            "start": event.start.isoformat(),
+            "end": event.end.isoformat(),
+            "summary": event.summary,
+            "description": event.description,
+            "source": event.source}
+
+
+class Rendered:
+    """A feed in one format, with its etag and gzipped body; the gzipped
+    body has an etag of its own, as it is not the same bytes."""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() \
+            + '"'
+        self.gzipped = gzip.compress(body, mtime=0)
+        self.gzip_etag = self.etag[:-1] + '-gz"'
+
+
+class Feed:
+    """Feeds of the upcoming events of a store, in ics and json.
+
+    Events merged into others, i.e. duplicates and the former versions
+    of rescheduled events, are left out.
+
+    The store is asked what changed since the last build (through the
+    number of upcoming events and the time of the last update), and
+    feeds are rebuilt only then; the ics text of each event is kept
+    across builds, such that a rebuild renders new events only.
+
+    Parameters
+    ----------
+    store : EventStore
+    name : str
+        of the calendar, shown by clients
+    """
+
+    def __init__(self, store, name: str = "concert livestreams"):
+        self.store = store
+        self.name = name
+        self._fingerprint = None
+        self._rendered = dict()
+        self._vevents = dict()
+        self._lock = threading.Lock()
+
+    def fingerprint(self) -> tuple:
+        """Changes whenever the upcoming events change."""
+        return tuple(self.store.execute(
+            "SELECT COUNT(*), MAX(last_seen), MAX(first_seen), "
+            "(SELECT COUNT(*) FROM merged), (SELECT MAX(ts) FROM merged) "
+            "FROM events WHERE start_ts >= ?", (time.time(),)
+        )[0])
+
+    def _build(self) -> None:
+        # duplicates and former versions of rescheduled events are left out
+        events = self.store.upcoming(merged=False)
+        stamp = datetime.datetime.now(datetime.timezone.utc)
+
+        vevents = dict()
+        for e_ in events:
+            # what `to_vevent()` renders
+            cache_key = (e_.key, e_.start, e_.end, e_.summary,
+                         e_.description)
+            vevents[cache_key] = self._vevents.get(cache_key) or \
+                to_vevent(e_, stamp)
+        n_new = len(set(vevents) - set(self._vevents))
+        self._vevents = vevents
+
+        ics = "".join([
+            "BEGIN:VCALENDAR\r\n",
+            "VERSION:2.0\r\n",
+            f"PRODID:{PRODID}\r\n",
+            _fold(f"X-WR-CALNAME:{_ics_text(self.name)}") + "\r\n",
+        ] + list(vevents.values()) + ["END:VCALENDAR\r\n"])
+        records = json.dumps([to_record(e_) for e_ in events],
+                             ensure_ascii=False)
+
+        self._rendered = {
+            "ics": Rendered(ics.encode(), FORMATS["ics"]),
+            "json": Rendered(records.encode(), FORMATS["json"]),
+        }
+        logger.info(f"feed rebuilt: {len(events)} events, {n_new} new")
+
+    def get(self, fmt: str) -> Rendered:
+        """The feed in `fmt` ('ics' or 'json'), rebuilt if needed."""
+        if fmt not in FORMATS:
+            raise ValueError("unknown name. format either erroneously "
+                             "spelled or not implemented.")
+
+        with self._lock:
+            fingerprint = self.fingerprint()
+            if fingerprint != self._fingerprint:
+                self._build()
+                self._fingerprint = fingerprint
+
+            return self._rendered[fmt]
+
+    def write(self, path: str) -> list:
+        """Write `events.ics` and `events.json` to folder `path`, if changed.
+
+        Returns
+        -------
+        list
+            of files written
+        """
+        os.makedirs(path, exist_ok=True)
+
+        written = list()
+        for fmt in FORMATS:
+            rendered = self.get(fmt)
+            fname = os.path.join(path, f"events.{fmt}")
+            if os.path.exists(fname):
+                with open(fname, mode="rb") as fp:
+                    if fp.read() == rendered.body:
+                        continue
+            with open(fname, mode="wb") as fp:
+                fp.write(rendered.body)
+            written.append(fname)
+
+        return written
+
+
+class FeedHandler(http.server.BaseHTTPRequestHandler):
+    """'/events.ics' and '/events.json', with etags and gzip."""
+
+    def __init__(self, feed: Feed, *args, **kwargs):
+        self.feed = feed
+        super(FeedHandler, self).__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        fmt = self.path.split("?")[0].rsplit(".", 1)[-1]
+        if not self.path.startswith("/events.") or fmt not in FORMATS:
+            self.send_error(404)
+            return
+
+        rendered = self.feed.get(fmt)
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        etag = rendered.gzip_etag if gzipped else rendered.etag
+
+        matches = [t_.strip() for t_ in
+                   self.headers.get("If-None-Match", "").split(",")]
+        if etag in matches:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        body = rendered.gzipped if gzipped else rendered.body
+        self.send_response(200)
+        self.send_header("Content-Type", rendered.content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(format % args)
+
+
+def serve(feed: Feed, port: int = 8378, host: str = "127.0.0.1",
+          background: bool = False) -> http.server.HTTPServer:
+    """Serve `feed` over http; in a thread if `background`."""
+    server = http.server.ThreadingHTTPServer(
+        (host, port), functools.partial(FeedHandler, feed)
+    )
+    logger.info(f"feed on http://{host}:{server.server_address[1]}"
+                f"/events.ics")
+
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+
+    return server
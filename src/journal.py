@@ -0,0 +1,130 @@
+import json
+import logging
+import time
+
+logger = logging.getLogger("main.journal")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS run_progress (
+    run_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL,
+    refs TEXT,
+    n_events INTEGER DEFAULT 0,
+    updated REAL,
+    PRIMARY KEY (run_id, source)
+);
+"""
+
+# progress of a source within a run
+SCANNED = "scanned"
+DONE = "done"
+
+
+def last_run(store):
+    """(id, start) of the last unfinished run, or None; no run is
+    created, e.g. to plan a resumed run."""
+    store.executescript(SCHEMA)
+    last = store.execute(
+        "SELECT id, started FROM runs WHERE finished IS NULL "
+        "ORDER BY id DESC LIMIT 1"
+    )
+    return last[0] if last else None
+
+
+class Journal:
+    """Per-source progress of a run, kept in the event store.
+
+    A source is 'scanned' once the references of its upcoming events
+    (video ids, urls) are known, and 'done' once all its events are in the
+    store; events are 'written' once they have a calendar id. A resumed
+    run skips the scan of scanned sources, and instead of scraping done
+    sources it writes their events not written yet.
+
+    Parameters
+    ----------
+    store : EventStore
+    resume : bool
+        True to continue the last unfinished run, if any
+    run : tuple
+        optional; (id, start) of the run to continue, see `last_run()`
+    """
+
+    def __init__(self, store, resume: bool = False, run: tuple = None):
+        self.store = store
+        store.executescript(SCHEMA)
+
+        if run is None and resume:
+            run = last_run(store)
+
+        if run is not None:
+            self.run_id, self.started = run
+            logger.info(f"resuming run {self.run_id}")
+        else:
+            self.started = time.time()
+            self.store.execute("INSERT INTO runs (started) VALUES (?)",
+                               (self.started,))
+            self.run_id = self.store.execute(
+                "SELECT MAX(id) FROM runs")[0][0]
+
+    def _get(self, source: str):
+        rows = self.store.execute(
+            "SELECT status, refs FROM run_progress "
+            "WHERE run_id = ? AND source = ?", (self.run_id, source)
+        )
+        return rows[0] if rows else (None, None)
+
+    def status(self, source: str):
+        """None, `SCANNED` or `DONE`."""
+        return self._get(source)[0]
+
+    def refs(self, source: str):
+        """References found by the scan of `source`, if journaled."""
+        refs = self._get(source)[1]
+        return json.loads(refs) if refs is not None else None
+
+    def mark(self, source: str, status: str, refs: list = None,
+             n_events: int = 0) -> None:
+        # only plain references can be journaled
+        if refs is not None and all(isinstance(r_, str) for r_ in refs):
+            refs = json.dumps(refs)
+        else:
+            refs = None
+
+        self.store.execute(
+            "INSERT INTO run_progress (run_id, source, status, refs, "
+            "n_events, updated) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (run_id, source) DO UPDATE "
+            "SET status = excluded.status, "
+            "refs = COALESCE(excluded.refs, refs), "
+            "n_events = excluded.n_events, updated = excluded.updated",
+            (self.run_id, source, status, refs, n_events, time.time())
+        )
+
+    def pending_events(self, source: str) -> list:
+        """Events of `source` found in this run but not written yet,
+        nor merged into others (see `pipeline.merge_duplicates()`)."""
+        rows = self.store.execute(
+            "SELECT key, start_ts, end_ts, summary, description, source, "
+            "ref FROM events WHERE source = ? AND calendar_id IS NULL "
+            "AND last_seen >= ? AND key NOT IN (SELECT key FROM merged) "
+            "ORDER BY start_ts",
+            (source, self.started)
+        )
+        return [self.store.to_event(r_) for r_ in rows]
+
+    def finish(self) -> None:
+        self.store.execute("UPDATE runs SET finished = ? WHERE id = ?",
+                           (time.time(), self.run_id))
+
+    def summary(self) -> dict:
+        """Number of sources per status in this run."""
+        return dict(self.store.execute(
+            "SELECT status, COUNT(*) FROM run_progress WHERE run_id = ? "
+            "GROUP BY status", (self.run_id,)
+        ))
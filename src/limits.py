@@ -0,0 +1,265 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+
+import httplib2
+
+from .deadline import DeadlineExceeded
+
+logger = logging.getLogger("main.limits")
+
+# requests per second and burst, per api; hosts get `HOST_RATE`
+RATES = {
+    "youtube": (10., 50),
+    "calendar": (10., 50),
+}
+HOST_RATE = (2., 5)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+    pass
+
+
+class TokenBucket:
+    """Allow `rate` calls per second on average, `burst` at once.
+
+    Parameters
+    ----------
+    rate : float
+        tokens added per second
+    burst : int
+        capacity of the bucket
+    clock : callable
+        seconds, monotonic
+    sleep : callable
+    """
+
+    def __init__(self, rate: float, burst: int, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.waited = 0.
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> float:
+        """Take a token, waiting for one if needed; return the wait."""
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.
+            self.waited += wait
+
+        if wait > 0:
+            self.sleep(wait)
+
+        return wait
+
+
+class CircuitBreaker:
+    """Stop calling a dependency after `threshold` failures in a row.
+
+    While open, calls fail at once with `CircuitOpen`; after
+    `reset_timeout` seconds, one call is let through as a probe, and its
+    outcome closes or opens the breaker again.
+
+    Parameters
+    ----------
+    name : str
+    threshold : int
+    reset_timeout : float
+        seconds
+    clock : callable
+        seconds, monotonic
+    """
+
+    def __init__(self, name: str, threshold: int = 5,
+                 reset_timeout: float = 60., clock=time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = None
+        self.n_tripped = 0
+        self.n_rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"breaker {self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def allow(self) -> None:
+        """Raise `CircuitOpen` unless a call may go through."""
+        with self._lock:
+            if self.state == OPEN and \
+                    self.clock() - self.opened >= self.reset_timeout:
+                self._set(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            if self.state != CLOSED:
+                self.n_rejected += 1
+                raise CircuitOpen(f"{self.name} unavailable, "
+                                  f"breaker {self.state}")
+
+    def neutral(self) -> None:
+        """A call which tells nothing of the dependency, e.g. out of time:
+        let another probe through, change nothing else."""
+        with self._lock:
+            self._probing = False
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set(CLOSED)
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self._trip()
+
+    def trip(self) -> None:
+        """Open the breaker now, e.g. once the quota is exceeded."""
+        with self._lock:
+            self._trip()
+
+    def _trip(self) -> None:
+        self._probing = False
+        self.opened = self.clock()
+        if self.state != OPEN:
+            self.n_tripped += 1
+        self._set(OPEN)
+
+
+class Limits:
+    """Token buckets and circuit breakers of each host and api."""
+
+    def __init__(self, rates: dict = None, host_rate: tuple = HOST_RATE,
+                 threshold: int = 5, reset_timeout: float = 60.):
+        self.rates = dict(RATES if rates is None else rates)
+        self.host_rate = host_rate
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.buckets = dict()
+        self.breakers = dict()
+        self._lock = threading.Lock()
+
+    def bucket(self, key: str):
+        """Token bucket of `key`; None if not rate limited."""
+        with self._lock:
+            if key not in self.buckets:
+                # e.g. 'youtube:project-2' is limited as 'youtube'
+                rate = self.rates.get(key.split(":")[0], self.host_rate)
+                self.buckets[key] = TokenBucket(*rate) \
+                    if rate is not None else None
+            return self.buckets[key]
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            if key not in self.breakers:
+                self.breakers[key] = CircuitBreaker(
+                    key, self.threshold, self.reset_timeout
+                )
+            return self.breakers[key]
+
+    @contextlib.contextmanager
+    def guard(self, key: str):
+        """Wait for a token and a closed breaker, record the outcome."""
+        breaker = self.breaker(key)
+        breaker.allow()
+        bucket = self.bucket(key)
+        if bucket is not None:
+            bucket.acquire()
+
+        try:
+            yield
+        except Exception as err:
+            if is_quota_exceeded(err):
+                breaker.trip()
+            elif is_failure(err):
+                breaker.failure()
+            raise
+        else:
+            breaker.success()
+        finally:
+            # e.g. 404 for a bad id, out of time, interrupted: neither
+            breaker.neutral()
+
+    def reset(self) -> None:
+        """Forget all buckets and breakers."""
+        with self._lock:
+            self.buckets.clear()
+            self.breakers.clear()
+
+    def states(self) -> dict:
+        """Per key: breaker state, trips, rejected calls, seconds waited."""
+        res = dict()
+        for key, b_ in self.breakers.items():
+            bucket = self.buckets.get(key)
+            res[key] = {
+                "state": b_.state,
+                "tripped": b_.n_tripped,
+                "rejected": b_.n_rejected,
+                "waited": round(bucket.waited, 3) if bucket else 0.,
+            }
+        return res
+
+
+def status_of(err: Exception):
+    """HTTP status of a google api or `requests` error, if any."""
+    status = getattr(getattr(err, "resp", None), "status", None)
+    if status is None:
+        status = getattr(getattr(err, "response", None), "status_code", None)
+    return int(status) if status is not None else None
+
+
+def is_failure(err: Exception) -> bool:
+    """Does `err` tell that the dependency is failing: server errors,
+    throttling (429), timeouts and connection errors? Client errors
+    (4xx) and the deadline of the caller passing are not."""
+    if isinstance(err, DeadlineExceeded):
+        return False
+    status = status_of(err)
+    if status is not None:
+        return status >= 500 or status == 429
+    return isinstance(err, (OSError, httplib2.HttpLib2Error))
+
+
+def is_quota_exceeded(err: Exception) -> bool:
+    """Is `err` a google api error telling the quota is exhausted?"""
+    content = getattr(err, "content", None)
+    if getattr(getattr(err, "resp", None), "status", None) != 403 or \
+            not content:
+        return False
+    try:
+        errors = json.loads(content)["error"]["errors"]
+    except (ValueError, KeyError, TypeError):
+        return False
+    return any(e_.get("reason") in ("quotaExceeded", "dailyLimitExceeded")
+               for e_ in errors)
+
+
+# limits of the current process
+limits = Limits()
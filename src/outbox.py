@@ -0,0 +1,207 @@
+import json
+import logging
+import time
+
+from .deadline import DeadlineExceeded
+from .events import Event
+from .limits import CircuitOpen
+
+logger = logging.getLogger("main.outbox")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available REAL NOT NULL,
+    leased_until REAL,
+    last_error TEXT,
+    enqueued REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, available);
+CREATE INDEX IF NOT EXISTS outbox_key ON outbox (key, state);
+"""
+
+# states of an entry
+READY = "ready"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+# errors telling the consumer to stop for now, not that an event is bad
+_TRANSIENT = (CircuitOpen, DeadlineExceeded)
+
+
+def dump_event(event: Event) -> str:
+    return json.dumps({"start": event.start.isoformat(),
+                       "end": event.end.isoformat(),
+                       "summary": event.summary,
+                       "description": event.description,
+                       "source": event.source,
+                       "ref": event.ref})
+
+
+def load_event(payload: str) -> Event:
+    return Event(**json.loads(payload))
+
+
+class Outbox:
+    """Durable queue of events between scrapers and the calendar.
+
+    Producers `put()` events, which are kept in the store; a consumer
+    leases a batch with `get()`, and `ack()`s or `nack()`s each. An
+    entry leased but neither acked nor nacked, e.g. as the consumer
+    died, is delivered again once its lease expires: each event is
+    delivered at least once. A nacked entry is retried after a backoff,
+    and after `max_attempts` deliveries it is dead, until `replay()`.
+
+    Parameters
+    ----------
+    store : EventStore
+    max_attempts : int
+    lease : float
+        seconds an entry is leased to a consumer
+    backoff : float
+        seconds before the first retry; doubled at each retry
+    """
+
+    def __init__(self, store, max_attempts: int = 5, lease: float = 300.,
+                 backoff: float = 60.):
+        self.store = store
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.backoff = backoff
+        store.executescript(SCHEMA)
+
+    def put(self, event: Event) -> bool:
+        """Queue `event` unless it is queued already; True if queued."""
+        now = time.time()
+        rows = self.store.execute(
+            "INSERT INTO outbox (key, payload, state, available, enqueued) "
+            "SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM outbox "
+            "WHERE key = ? AND state IN (?, ?)) RETURNING id",
+            (event.key, dump_event(event), READY, now, now,
+             event.key, READY, LEASED)
+        )
+        return len(rows) > 0
+
+    def get(self, limit: int = 20, now: float = None) -> list:
+        """Lease up to `limit` entries due, oldest first.
+
+        Returns
+        -------
+        list
+            of (entry id, Event)
+        """
+        now = now if now is not None else time.time()
+        rows = self.store.execute(
+            "UPDATE outbox SET state = ?, leased_until = ?, "
+            "attempts = attempts + 1 WHERE id IN (SELECT id FROM outbox "
+            "WHERE state = ? AND available <= ? OR state = ? AND "
+            "leased_until < ? ORDER BY id LIMIT ?) RETURNING id, payload",
+            (LEASED, now + self.lease, READY, now, LEASED, now, limit)
+        )
+        return [(r_[0], load_event(r_[1])) for r_ in sorted(rows)]
+
+    def ack(self, entry_id: int) -> None:
+        self.store.execute(
+            "UPDATE outbox SET state = ?, finished = ?, last_error = NULL "
+            "WHERE id = ?", (DONE, time.time(), entry_id)
+        )
+
+    def nack(self, entry_id: int, error: str = None,
+             now: float = None) -> str:
+        """Retry an entry later, or give it up; return its new state."""
+        now = now if now is not None else time.time()
+        state, attempts = self.store.execute(
+            "UPDATE outbox SET state = CASE WHEN attempts >= ? THEN ? "
+            "ELSE ? END, available = ? + ? * (1 << (attempts - 1)), "
+            "last_error = ? WHERE id = ? RETURNING state, attempts",
+            (self.max_attempts, DEAD, READY, now, self.backoff, error,
+             entry_id)
+        )[0]
+        if state == DEAD:
+            logger.error(f"outbox entry {entry_id} dead after {attempts} "
+                         f"attempts: {error}")
+        return state
+
+    def release(self, entry_id: int) -> None:
+        """Give an entry back unattempted, e.g. as the calendar is down."""
+        self.store.execute(
+            "UPDATE outbox SET state = ?, attempts = attempts - 1 "
+            "WHERE id = ? AND state = ?", (READY, entry_id, LEASED)
+        )
+
+    def consume(self, handler, batch: int = 20) -> int:
+        """Deliver due events to `handler` until none is left; return
+        the number handled.
+
+        An event `handler` raises for is nacked; if it raises that a
+        dependency is down or time is up, the batch is given back and
+        consuming stops.
+        """
+        n_done = 0
+        while True:
+            entries = self.get(batch)
+            if not entries:
+                return n_done
+
+            for i_, (entry_id, event) in enumerate(entries):
+                try:
+                    handler(event)
+                except _TRANSIENT as err:
+                    logger.warning(f"outbox: stopping, {err}")
+                    for id_, _ in entries[i_:]:
+                        self.release(id_)
+                    return n_done
+                except Exception as err:
+                    logger.warning(f"outbox: {event.summary} failed: {err}")
+                    self.nack(entry_id, str(err))
+                    continue
+                self.ack(entry_id)
+                n_done += 1
+
+    def dead(self) -> list:
+        """Dead entries as (entry id, Event, last error)."""
+        rows = self.store.execute(
+            "SELECT id, payload, last_error FROM outbox WHERE state = ? "
+            "ORDER BY id", (DEAD,)
+        )
+        return [(r_[0], load_event(r_[1]), r_[2]) for r_ in rows]
+
+    def replay(self, ids: list = None, since: float = None) -> int:
+        """Queue dead entries again; return how many.
+
+        Parameters
+        ----------
+        ids : list
+            of entries; all dead ones if None
+        since : float
+            timestamp; only entries queued since
+        """
+        sql = "UPDATE outbox SET state = ?, attempts = 0, available = ?, " \
+              "leased_until = NULL WHERE state = ?"
+        params = [READY, time.time(), DEAD]
+        if ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(ids))})"
+            params += list(ids)
+        if since is not None:
+            sql += " AND enqueued >= ?"
+            params.append(since)
+
+        return len(self.store.execute(sql + " RETURNING id", params))
+
+    def purge(self, older_than: float) -> int:
+        """Delete entries done more than `older_than` seconds ago."""
+        return len(self.store.execute(
+            "DELETE FROM outbox WHERE state = ? AND finished < ? "
+            "RETURNING id", (DONE, time.time() - older_than)
+        ))
+
+    def stats(self) -> dict:
+        """Number of entries per state."""
+        return dict(self.store.execute(
+            "SELECT state, COUNT(*) FROM outbox GROUP BY state"))
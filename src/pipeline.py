@@ -0,0 +1,289 @@
+import functools
+import logging
+import queue
+import threading
+
+from .calendartools import insert_event
+from .deadline import Deadline, DeadlineExceeded, get_deadline, use_deadline
+from .dedupe import DedupeIndex, enrich
+from .events import Event
+from .journal import SCANNED, DONE
+
+logger = logging.getLogger("main.pipeline")
+
+# end of stream marker
+_END = object()
+
+
+class _Cancelled(BaseException):
+    """Stops a stage; not an `Exception` so that stages do not catch it."""
+    pass
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    while True:
+        if stop.is_set():
+            raise _Cancelled
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _iterate(q: queue.Queue, stop: threading.Event):
+    while True:
+        try:
+            item = q.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                raise _Cancelled
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def pipeline(source, *stages, maxsize: int = 64):
+    """Run generator stages concurrently, connected by bounded queues.
+
+    Each stage is a generator function taking an iterator of items and
+    yielding items; it runs in its own thread, such that e.g. writing to
+    the calendar overlaps with scraping. At most `maxsize` items wait
+    between two stages, which keeps memory constant regardless of the
+    number of sources.
+
+    Parameters
+    ----------
+    source : iterable
+        items fed to the first stage
+    *stages : callable
+        generator functions
+    maxsize : int
+        capacity of each queue
+
+    Yields
+    ------
+    items out of the last stage
+
+    Raises
+    ------
+    Exception
+        the first exception raised by any stage, after all stages stopped
+    """
+    stop = threading.Event()
+    errors = list()
+    queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+
+    def feed():
+        for item in source:
+            _put(queues[0], item, stop)
+        _put(queues[0], _END, stop)
+
+    def work(i_stage):
+        stage = stages[i_stage]
+        for item in stage(_iterate(queues[i_stage], stop)):
+            _put(queues[i_stage + 1], item, stop)
+        _put(queues[i_stage + 1], _END, stop)
+
+    def guard(fn, *args):
+        try:
+            fn(*args)
+        except _Cancelled:
+            pass
+        except BaseException as err:
+            errors.append(err)
+            stop.set()
+
+    threads = [threading.Thread(target=guard, args=(feed,), daemon=True)]
+    threads += [
+        threading.Thread(target=guard, args=(work, i_), daemon=True,
+                         name=getattr(s_, "__name__", None))
+        for i_, s_ in enumerate(stages)
+    ]
+    for t_ in threads:
+        t_.start()
+
+    try:
+        yield from _iterate(queues[-1], stop)
+    except _Cancelled:
+        pass
+    finally:
+        stop.set()
+        for t_ in threads:
+            t_.join()
+
+    if errors:
+        raise errors[0]
+
+
+def fetch_events(scrapers, store=None, journal=None, source_budget=None,
+                 **kwargs):
+    """Stage: scrape events from each scraper, one at a time.
+
+    With a `store`, events are recorded as soon as scraped; with a
+    `journal`, so is the progress of each scraper, and scrapers done
+    before in the journaled run only yield their events not yet written.
+    Each scraper gets at most `source_budget` seconds of the current
+    deadline; what does not fit is skipped and reported to the deadline.
+    """
+    run_deadline = get_deadline()
+
+    for scr in scrapers:
+        source = str(scr)
+        status = journal.status(source) if journal is not None else None
+
+        if status == DONE:
+            logger.info(f"{source} done before")
+            yield from journal.pending_events(source)
+            continue
+
+        if run_deadline.expired:
+            run_deadline.skip(source, "not polled")
+            continue
+
+        logger.info(f"{source}...")
+        if store is not None:
+            store.touch_source(source, getattr(scr, "kind", None))
+
+        refs, n_events, n_new = None, 0, 0
+        try:
+            with use_deadline(run_deadline.child(source_budget), local=True):
+                refs = journal.refs(source) if status == SCANNED else None
+                if refs is None:
+                    refs = scr.scan(**kwargs)
+                    if journal is not None:
+                        journal.mark(source, SCANNED, refs)
+
+                for e_ in scr.resolve(refs):
+                    if store is not None:
+                        n_new += store.add_event(e_)
+                    n_events += 1
+                    yield e_
+
+            if store is not None:
+                store.record_poll(source, n_events, n_new)
+            if journal is not None:
+                journal.mark(source, DONE, n_events=n_events)
+
+        except DeadlineExceeded:
+            # left unfinished in the journal, so that a resumed run goes on
+            what = "not scanned" if refs is None else \
+                f"{n_events} events of {len(refs)} references resolved"
+            run_deadline.skip(source, what)
+            logger.warning(f"{source}: out of time, {what}")
+
+        except Exception as err:
+            logger.error(f"{source}: {err}")
+
+
+def normalize_events(events):
+    """Stage: turn calendar api-like dicts into `Event`s."""
+    for e_ in events:
+        if not isinstance(e_, Event):
+            e_ = Event.from_dict(e_)
+        yield e_
+
+
+def dedupe_events(events):
+    """Stage: drop events already seen in this run."""
+    seen = set()
+    for e_ in events:
+        if e_.key in seen:
+            continue
+        seen.add(e_.key)
+        yield e_
+
+
+def merge_duplicates(events, store=None, **kwargs):
+    """Stage: drop fuzzy duplicates of events let through before.
+
+    Events are let through as they come, such that writing overlaps with
+    scraping. A later duplicate richer than the event kept of its cluster
+    (see `dedupe.richness()`) has its description merged into it, and
+    the richer event, under the same key, is let through again: the
+    store, and the feeds, get it, while an event written or queued before
+    keeps its first description. With a `store`, duplicates of events in
+    the calendar already are merged into those, and the duplicates are
+    recorded there as merged. See `DedupeIndex` for `**kwargs`.
+    """
+    index = DedupeIndex(**kwargs)
+    # event let through of each cluster, by cluster id
+    kept = dict()
+    n_merged = 0
+    for e_ in events:
+        cluster = index.add(e_)
+        first = kept.get(cluster)
+        if first is None and store is not None and \
+                not store.is_inserted(e_.key):
+            first = next((c_ for c_ in store.inserted_around(e_.start,
+                                                             index.window)
+                          if c_.key != e_.key and index.duplicates(e_, c_)),
+                         None)
+
+        if first is None:
+            kept[cluster] = e_
+            yield e_
+            continue
+
+        if store is not None:
+            store.mark_merged(e_.key, first.key)
+        n_merged += 1
+
+        kept[cluster] = enrich(first, e_)
+        if kept[cluster] is not first:
+            if store is not None:
+                store.add_event(kept[cluster])
+            yield kept[cluster]
+
+    logger.info(f"{n_merged} duplicates merged")
+
+
+def enqueue_events(events, outbox, store=None):
+    """Stage: queue events for the calendar (see `outbox.Outbox`), yield
+    those queued; with a `store`, not those inserted before."""
+    for e_ in events:
+        if store is not None and store.is_inserted(e_.key):
+            continue
+        outbox.put(e_)
+        yield e_
+
+
+def write_events(events, client, store=None):
+    """Stage: insert events into the calendar, yield those processed.
+
+    Events scraped are written even past the deadline of the run.
+    """
+    with use_deadline(Deadline(), local=True):
+        for e_ in events:
+            try:
+                insert_event(e_, client, store=store)
+            except Exception as err:
+                logger.error(f"failed to insert {e_.summary}: {err}")
+                continue
+            yield e_
+
+
+def scrape_stages(store=None, journal=None, calendar_client=None,
+                  outbox=None, **kwargs) -> list:
+    """Stages from scrapers to the calendar, see `pipeline()`.
+
+    Events are fetched, normalized, deduped and merged, then queued in
+    the `outbox` if any, else written with `calendar_client` if any, else
+    only recorded in the `store`. `**kwargs` are passed to
+    `fetch_events()`.
+    """
+    stages = [
+        functools.partial(fetch_events, store=store, journal=journal,
+                          **kwargs),
+        normalize_events,
+        dedupe_events,
+        functools.partial(merge_duplicates, store=store),
+    ]
+    if outbox is not None:
+        stages.append(functools.partial(enqueue_events, outbox=outbox,
+                                        store=store))
+    elif calendar_client is not None:
+        stages.append(functools.partial(write_events, client=calendar_client,
+                                        store=store))
+    return stages
@@ -0,0 +1,198 @@
+import collections
+import concurrent.futures
+import contextlib
+import logging
+import multiprocessing
+import os
+import signal
+
+try:
+    import resource
+except ImportError:
+    # e.g. on windows; tasks then run without limits
+    resource = None
+
+from .deadline import DeadlineExceeded, get_deadline
+from .transport import StaticTransport, get_transport, use_transport
+
+logger = logging.getLogger("main.procpool")
+
+# address space of a worker, in bytes
+MEMORY_LIMIT = 1024 * 2 ** 20
+
+# cpu seconds of a task
+CPU_LIMIT = 30
+
+
+class ResourceLimitExceeded(Exception):
+    """Raised in a worker whose task ran out of cpu time."""
+    pass
+
+
+def _on_xcpu(signum, frame):
+    raise ResourceLimitExceeded("cpu time limit exceeded")
+
+
+def _init_worker(memory: int) -> None:
+    if resource is None:
+        return
+    signal.signal(signal.SIGXCPU, _on_xcpu)
+    if memory is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory, hard))
+
+
+def _limit_cpu(seconds: int = None) -> None:
+    """Allow `seconds` more cpu time to this process; None for no limit."""
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = hard
+    if seconds is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + 1 + seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _extract(scraper, ref, content: bytes, cpu: int) -> dict:
+    """Task: details of `ref`, out of its page `content` if any."""
+    _limit_cpu(cpu)
+    try:
+        if content is None:
+            return scraper.get_livestream_details(ref)
+        with use_transport(StaticTransport({ref: content})):
+            return scraper.get_livestream_details(ref)
+    finally:
+        _limit_cpu(None)
+
+
+class ParsePool:
+    """Processes parsing pages, such that parsing uses all cores.
+
+    Pages are fetched in the calling process, within its rate limits
+    and deadline; their bytes are sent to a worker, which runs
+    `get_livestream_details()` of the scraper on them and sends back
+    the plain dict of details. Each task is allowed `cpu` seconds and
+    each worker `memory` bytes, beyond which the task fails alone; a
+    worker dying anyway is replaced, and the tasks it took down are
+    tried once more.
+
+    Parameters
+    ----------
+    processes : int
+        defaults to the number of cores
+    memory : int
+        bytes of address space of each worker; None for no limit
+    cpu : int
+        cpu seconds of each task; None for no limit
+    """
+
+    def __init__(self, processes: int = None, memory: int = MEMORY_LIMIT,
+                 cpu: int = CPU_LIMIT):
+        self.processes = processes or os.cpu_count() or 1
+        self.memory = memory
+        self.cpu = cpu
+        self._executor = None
+
+    def _start(self) -> concurrent.futures.ProcessPoolExecutor:
+        # spawned, as forking a process running threads is unsafe
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            self.processes, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(self.memory,)
+        )
+        return self._executor
+
+    def submit(self, scraper, ref, content: bytes = None):
+        executor = self._executor or self._start()
+        return executor.submit(_extract, scraper, ref, content, self.cpu)
+
+    def _task(self, scraper, ref, content: bytes,
+              retried: bool = False) -> list:
+        future = self.submit(scraper, ref, content)
+        # the executor, to restart it once only when it breaks
+        return [scraper, ref, content, future, retried, self._executor]
+
+    def _result(self, task: list):
+        """Details of a task, or the exception it raised."""
+        scraper, ref, content, future, retried, executor = task
+        deadline = get_deadline()
+        deadline.check()
+        timeout = deadline.remaining()
+        try:
+            return future.result(
+                timeout=timeout if timeout != float("inf") else None)
+        except concurrent.futures.TimeoutError:
+            raise DeadlineExceeded("deadline exceeded")
+        except concurrent.futures.process.BrokenProcessPool as err:
+            # other tasks of the same executor fail alike
+            if executor is self._executor:
+                logger.error(f"parse worker died on {ref}; restarting")
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if retried:
+                return err
+            return self._result(self._task(scraper, ref, content, True))
+        except Exception as err:
+            return err
+
+    def extract(self, scraper, refs):
+        """Generator of (ref, details or exception), in the order of refs.
+
+        Pages are fetched while earlier ones are being parsed; at most
+        twice as many as there are processes are held at any time.
+        """
+        fetch = get_transport().fetch
+        pending = collections.deque()
+
+        for r_ in refs:
+            while len(pending) >= 2 * self.processes or \
+                    pending and pending[0][3].done():
+                yield pending[0][1], self._result(pending.popleft())
+
+            try:
+                content = fetch(r_) if isinstance(r_, str) else None
+            except DeadlineExceeded:
+                raise
+            except Exception as err:
+                # in order: after those before
+                while pending:
+                    yield pending[0][1], self._result(pending.popleft())
+                yield r_, err
+                continue
+
+            pending.append(self._task(scraper, r_, content))
+
+        while pending:
+            yield pending[0][1], self._result(pending.popleft())
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+_pool = None
+
+
+def get_pool():
+    """Pool parsing pages of `PageScraper`s; None to parse in-process."""
+    return _pool
+
+
+def set_pool(pool) -> None:
+    global _pool
+    _pool = pool
+
+
+@contextlib.contextmanager
+def use_pool(pool: ParsePool):
+    """Parse pages with `pool` within a block, then close it."""
+    previous = get_pool()
+    set_pool(pool)
+    try:
+        yield pool
+    finally:
+        set_pool(previous)
+        pool.close()
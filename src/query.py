@@ -0,0 +1,190 @@
+import bisect
+import re
+
+from bs4 import CData, NavigableString
+
+from .streamparse import Matcher
+
+# strings counted in the text of a tag, as by `Tag.get_text()`
+_TEXT_TYPES = (NavigableString, CData)
+
+
+def _compile_css(css: str) -> list:
+    """Chains of matchers of a selector like 'div.a span, p'."""
+    chains = list()
+    for alt_ in css.split(","):
+        chain = list()
+        for part_ in alt_.split():
+            matcher = Matcher() if part_ == "*" else Matcher.from_css(part_)
+            if matcher is None:
+                raise ValueError(f"unsupported selector: {part_}")
+            chain.append(matcher)
+        chains.append(chain or [Matcher()])
+    return chains
+
+
+class Selector:
+    """Compiled query of elements of a `Document`.
+
+    Parameters
+    ----------
+    css : str
+        simple selectors (see `streamparse.Matcher`), possibly combined
+        by descendance ('div.a span') and alternated ('p, span'); any
+        element if empty
+    contains : str
+        text the element must contain
+    search : str or re.Pattern
+        pattern found in the text of the element
+    match : str or re.Pattern
+        pattern found at the start of the text of the element; as the
+        text is not copied, '^' does not match there
+    has : Selector
+        a descendant of the element must match it
+    """
+
+    def __init__(self, css: str = "", contains: str = None,
+                 search=None, match=None, has=None):
+        self.chains = _compile_css(css)
+        self.contains = contains
+        self.search = re.compile(search) if isinstance(search, str) \
+            else search
+        self.match = re.compile(match) if isinstance(match, str) else match
+        self.has = has
+
+
+class Document:
+    """Tree of a page indexed for `Selector`s, in one pass over it.
+
+    Each tag gets its position in document order, that of its parent
+    and last descendant, and the span of its text in the text of the
+    whole page; the text of an element is then a slice, a text it
+    contains is looked up among the occurrences in the whole page, and
+    a descendant among the positions of the matches of a subquery. A
+    query is thus one pass over the tags, whereas a predicate calling
+    `tag.text` or `tag.find()` for each tag visits each of them again
+    for each of its ancestors.
+
+    Parameters
+    ----------
+    soup : BeautifulSoup
+        or any tag, whose descendants are indexed
+    """
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.tags = list()
+        self._parents = list()
+        self._lasts = list()
+        self._spans = list()
+        self._attrs = dict()
+        self._positions = dict()
+        self._occurrences = dict()
+
+        chunks, offset = list(), 0
+        # (tag, position) of the open ancestors; -1 for the root
+        stack = [(soup, -1)]
+
+        def close():
+            _, i_ = stack.pop()
+            self._lasts[i_] = len(self.tags) - 1
+            self._spans[i_] = (self._spans[i_][0], offset)
+
+        for node in soup.descendants:
+            while node.parent is not stack[-1][0]:
+                close()
+            if type(node) in _TEXT_TYPES:
+                chunks.append(node)
+                offset += len(node)
+            elif not isinstance(node, NavigableString):
+                i_ = len(self.tags)
+                self.tags.append(node)
+                self._parents.append(stack[-1][1])
+                self._lasts.append(i_)
+                self._spans.append((offset, offset))
+                self._positions[id(node)] = i_
+                stack.append((node, i_))
+        while len(stack) > 1:
+            close()
+
+        self._text = "".join(chunks)
+
+    def text(self, tag) -> str:
+        """Text of `tag`, as `tag.text`."""
+        start, end = self._spans[self._positions[id(tag)]]
+        return self._text[start:end]
+
+    def _attributes(self, i_: int) -> dict:
+        if i_ not in self._attrs:
+            self._attrs[i_] = {
+                k_: " ".join(v_) if isinstance(v_, list) else v_
+                for k_, v_ in self.tags[i_].attrs.items()
+            }
+        return self._attrs[i_]
+
+    def _occurrences_of(self, text: str) -> list:
+        """Start of every occurrence of `text`, overlapping ones too."""
+        if text not in self._occurrences:
+            res, i_ = list(), self._text.find(text)
+            while i_ >= 0:
+                res.append(i_)
+                i_ = self._text.find(text, i_ + 1)
+            self._occurrences[text] = res
+        return self._occurrences[text]
+
+    def _contains(self, i_: int, text: str) -> bool:
+        start, end = self._spans[i_]
+        occurrences = self._occurrences_of(text)
+        j_ = bisect.bisect_left(occurrences, start)
+        return j_ < len(occurrences) and \
+            occurrences[j_] + len(text) <= end
+
+    def _positions_of(self, selector: Selector) -> list:
+        """Positions of the tags matching `selector`, in order."""
+        has = self._positions_of(selector.has) \
+            if selector.has is not None else None
+
+        res = list()
+        # for each chain, length of its prefix matched by ancestors
+        progress = [[0] * len(self.tags) for _ in selector.chains]
+        for i_, tag in enumerate(self.tags):
+            parent = self._parents[i_]
+            found = False
+            for c_, chain in enumerate(selector.chains):
+                done = progress[c_][parent] if parent >= 0 else 0
+                hit = chain[done].matches(tag.name, self._attributes(i_))
+                if done == len(chain) - 1:
+                    found = found or hit
+                elif hit:
+                    done += 1
+                progress[c_][i_] = done
+            if not found:
+                continue
+
+            start, end = self._spans[i_]
+            if selector.contains is not None and \
+                    not self._contains(i_, selector.contains):
+                continue
+            if has is not None:
+                j_ = bisect.bisect_right(has, i_)
+                if j_ == len(has) or has[j_] > self._lasts[i_]:
+                    continue
+            if selector.match is not None and \
+                    selector.match.match(self._text, start, end) is None:
+                continue
+            if selector.search is not None and \
+                    selector.search.search(self._text, start, end) is None:
+                continue
+
+            res.append(i_)
+
+        return res
+
+    def select(self, selector: Selector) -> list:
+        """Tags matching `selector`, in document order."""
+        return [self.tags[i_] for i_ in self._positions_of(selector)]
+
+    def select_one(self, selector: Selector):
+        """First tag matching `selector`; None if there is none."""
+        res = self._positions_of(selector)
+        return self.tags[res[0]] if res else None
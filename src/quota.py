@@ -0,0 +1,105 @@
+import collections
+import threading
+
+from .deadline import get_deadline
+from .limits import limits
+
+# cost of google api methods in quota units, per call; see
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    "youtube.channels.list": 1,
+    "youtube.playlistItems.list": 1,
+    "youtube.search.list": 100,
+    "youtube.videos.list": 1,
+    "calendar.events.list": 0,
+    "calendar.events.insert": 0,
+}
+
+
+def cost_of(method_id: str) -> int:
+    """Quota units spent by one call to `method_id`."""
+    return QUOTA_COSTS.get(method_id, 1 if method_id.startswith("youtube.")
+                           else 0)
+
+
+class QuotaLedger:
+    """Book of api calls and quota units spent, by method and by key.
+
+    The key is whatever the spend must be attributed to, e.g. a set of
+    credentials; it defaults to 'default'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = collections.Counter()
+        self.units = collections.Counter()
+        self.units_by_key = collections.Counter()
+
+    def charge(self, method_id: str, key: str = "default") -> int:
+        """Book one call to `method_id`; return its cost."""
+        cost = cost_of(method_id)
+        with self._lock:
+            self.calls[method_id] += 1
+            self.units[method_id] += cost
+            self.units_by_key[key] += cost
+
+        return cost
+
+    @property
+    def total_units(self) -> int:
+        return sum(self.units.values())
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.units.clear()
+            self.units_by_key.clear()
+
+    def summary(self) -> str:
+        lines = [f"{m_}: {self.calls[m_]} calls, {self.units[m_]} units"
+                 for m_ in sorted(self.calls)]
+        lines.append(f"total: {self.total_calls} calls, "
+                     f"{self.total_units} units")
+        return "\n".join(lines)
+
+
+# ledger of the current process
+ledger = QuotaLedger()
+
+
+def execute(request, key: str = "default"):
+    """Execute a google api request, booking it in the `ledger`.
+
+    Parameters
+    ----------
+    request : googleapiclient.http.HttpRequest
+        or anything with `.methodId` (e.g. 'youtube.videos.list') and
+        `.execute()`
+    key : str
+        what to attribute the spend to
+
+    Raises
+    ------
+    CircuitOpen
+        if the api failed too often lately, see `limits`
+    DeadlineExceeded
+        if the current deadline has passed, see `deadline`
+    """
+    get_deadline().check()
+
+    # e.g. a request of a `ClientPool`, which books each attempt itself
+    if getattr(request, "self_charging", False):
+        return request.execute()
+
+    method_id = getattr(request, "methodId", None) or "unknown"
+    api = method_id.split(".")[0]
+
+    # rate limited and guarded by a breaker per api (and key), e.g.
+    # 'youtube' or 'youtube:project-2'
+    with limits.guard(api if key == "default" else f"{api}:{key}"):
+        ledger.charge(method_id, key=key)
+        return request.execute()
@@ -0,0 +1,205 @@
+import ast
+import importlib
+import importlib.util
+import inspect
+import logging
+import os.path
+
+from .core import ConcertScraper, PageScraper
+
+logger = logging.getLogger("main.registry")
+
+# modules scanned for `PageScraper` subclasses, without importing them
+MODULES = ("src.scrapers",)
+
+# entry point group under which other packages can register scrapers
+ENTRY_POINT_GROUP = "concertscrape.scrapers"
+
+# methods each page scraper must implement
+INTERFACE = ("get_upcoming_livestreams", "get_livestream_details")
+
+# bases which already implement the interface
+_CONFORMING_BASES = ("SpecScraper",)
+
+
+class ConformanceError(TypeError):
+    """Raised when a scraper does not implement the scraper interface."""
+    pass
+
+
+def name_of(cls_name: str) -> str:
+    """Registry name of a scraper class, e.g. 'StMaryScraper' -> 'stmary'."""
+    name = cls_name[:-len("Scraper")] if cls_name.endswith("Scraper") \
+        else cls_name
+    return name.lower()
+
+
+def check_conformance(cls) -> None:
+    """Check that `cls` can be instantiated and scraped.
+
+    Raises
+    ------
+    ConformanceError
+    """
+    if not (inspect.isclass(cls) and issubclass(cls, ConcertScraper)):
+        raise ConformanceError(f"{cls!r} is not a ConcertScraper")
+
+    if issubclass(cls, PageScraper):
+        missing = [m_ for m_ in INTERFACE
+                   if getattr(cls, m_) is getattr(PageScraper, m_)]
+        if missing:
+            raise ConformanceError(
+                f"{cls.__name__} does not implement {', '.join(missing)}"
+            )
+
+    required = [
+        p_ for p_ in inspect.signature(cls).parameters.values()
+        if p_.default is p_.empty and p_.kind in (p_.POSITIONAL_ONLY,
+                                                  p_.POSITIONAL_OR_KEYWORD)
+    ]
+    if required:
+        raise ConformanceError(
+            f"{cls.__name__} cannot be created without arguments"
+        )
+
+
+class Registry:
+    """Scrapers by name, imported only when selected.
+
+    Entries are discovered by scanning the source of `MODULES` (classes
+    implementing `INTERFACE`), from the entry point group
+    `ENTRY_POINT_GROUP` and from `data/venues.json`; a class is imported
+    and checked upon first `load()`. Classes can also be registered
+    directly with `register()`, in which case they are checked at once.
+    """
+
+    def __init__(self):
+        # name -> class, or a callable returning the class
+        self._entries = dict()
+        self._loaded = dict()
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._entries
+
+    def names(self) -> list:
+        return sorted(self._entries)
+
+    def register(self, cls, name: str = None):
+        """Register a scraper class; can be used as a decorator."""
+        check_conformance(cls)
+        name = (name or name_of(cls.__name__)).lower()
+        self._entries[name] = cls
+        self._loaded[name] = cls
+        return cls
+
+    def register_lazy(self, name: str, loader) -> None:
+        """Register a callable returning the scraper class (or factory)."""
+        self._entries.setdefault(name.lower(), loader)
+
+    def load(self, name: str):
+        """Import (if needed), check and return the class of `name`."""
+        name = name.lower()
+        if name not in self._entries:
+            raise ValueError("unknown name. venue either erroneously "
+                             "spelled or not implemented.")
+        if name not in self._loaded:
+            cls = self._entries[name]()
+            if inspect.isclass(cls):
+                check_conformance(cls)
+            self._loaded[name] = cls
+
+        return self._loaded[name]
+
+    def create(self, name: str) -> ConcertScraper:
+        return self.load(name)()
+
+    def iter_scrapers(self, names):
+        """Scrapers of `names` (a name, or 'all' for all), skipping broken
+        ones."""
+        if isinstance(names, str):
+            names = [names]
+        if "all" in names:
+            names = self.names()
+
+        for name in names:
+            try:
+                yield self.create(name)
+            except Exception as err:
+                logger.error(f"{name}: {err}")
+
+    def discover(self) -> None:
+        """Find scrapers in `MODULES`, entry points and venue specs."""
+        for module in MODULES:
+            for cls_name in scan_module(module):
+                self.register_lazy(name_of(cls_name),
+                                   _import_loader(module, cls_name))
+
+        for ep in _entry_points():
+            self.register_lazy(ep.name, ep.load)
+
+        try:
+            from .venues import load_venues
+            for spec_name in load_venues():
+                self.register_lazy(spec_name, _spec_loader(spec_name))
+        except OSError:
+            pass
+
+
+def _import_loader(module: str, cls_name: str):
+    return lambda: getattr(importlib.import_module(module), cls_name)
+
+
+def _spec_loader(spec_name: str):
+    def loader():
+        from .venues import SpecScraper
+        return lambda: SpecScraper(spec_name)
+    return loader
+
+
+def _entry_points() -> list:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, []))
+
+
+def scan_module(module: str) -> list:
+    """Names of scraper classes in `module` which implement `INTERFACE`.
+
+    The source is parsed, not imported; classes not implementing the
+    interface (e.g. stubs of venues to come) are left out, and logged at
+    debug level.
+    """
+    spec = importlib.util.find_spec(module)
+    if spec is None or spec.origin is None or not os.path.exists(spec.origin):
+        return []
+
+    with open(spec.origin, mode="r", encoding="utf-8") as fp:
+        tree = ast.parse(fp.read())
+
+    res = list()
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = [b_.id for b_ in node.bases if isinstance(b_, ast.Name)]
+        if not set(bases) & {"PageScraper", *_CONFORMING_BASES}:
+            continue
+        methods = {n_.name for n_ in node.body
+                   if isinstance(n_, ast.FunctionDef)}
+        if set(bases) & set(_CONFORMING_BASES) or set(INTERFACE) <= methods:
+            res.append(node.name)
+        else:
+            logger.debug(f"{node.name} does not implement "
+                           f"{', '.join(sorted(set(INTERFACE) - methods))}")
+
+    return res
+
+
+# registry of the process, filled upon import
+registry = Registry()
+registry.discover()
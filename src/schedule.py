@@ -0,0 +1,102 @@
+import logging
+import statistics
+import time
+
+logger = logging.getLogger("main.schedule")
+
+DAY = 86400.0
+
+
+class Scheduler:
+    """When to poll each source, learned from the history in the store.
+
+    After a poll with new events, a source is due again `min_interval`
+    later; every poll in a row without new events doubles the interval, up
+    to `max_interval`. The interval never exceeds half the median lead time
+    of the source's announcements, such that an event announced shortly
+    before its start is not missed. Sources never polled are always due.
+
+    Parameters
+    ----------
+    store : EventStore
+    min_interval : float
+        seconds
+    max_interval : float
+        seconds
+    history : int
+        number of last polls taken into account
+    """
+
+    def __init__(self, store, min_interval: float = DAY,
+                 max_interval: float = 32 * DAY, history: int = 20):
+        self.store = store
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.history = history
+
+    def lead_time(self, source: str):
+        """Median seconds between discovery and start of events, if any."""
+        lead_times = self.store.lead_times(source)
+        return statistics.median(lead_times) if lead_times else None
+
+    def interval(self, source: str) -> float:
+        """Seconds between the last poll of `source` and the next one."""
+        polls = self.store.polls(source, limit=self.history)
+
+        # number of last polls in a row without new events
+        quiet = 0
+        for _, _, n_new in polls:
+            if n_new:
+                break
+            quiet += 1
+
+        interval = min(self.min_interval * 2 ** quiet, self.max_interval)
+
+        lead_time = self.lead_time(source)
+        if lead_time is not None:
+            interval = min(interval, max(lead_time / 2, self.min_interval))
+
+        return interval
+
+    def next_poll(self, source: str) -> float:
+        """Timestamp from which `source` is due; 0 if never polled."""
+        polls = self.store.polls(source, limit=1)
+        if not polls:
+            return 0.
+        return polls[0][0] + self.interval(source)
+
+    def rate(self, source: str) -> float:
+        """New events per second over the last polls."""
+        polls = self.store.polls(source, limit=self.history)
+        if len(polls) < 2:
+            return 0.
+        span = polls[0][0] - polls[-1][0]
+        # the oldest poll found what had accumulated before the history
+        n_new = sum(p_[2] or 0 for p_ in polls[:-1])
+        return n_new / span if span > 0 else 0.
+
+    def expected_value(self, source: str, now: float = None) -> float:
+        """Expected number of new events if `source` is polled `now`."""
+        now = now if now is not None else time.time()
+        polls = self.store.polls(source, limit=1)
+        if not polls:
+            return float("inf")
+        return self.rate(source) * (now - polls[0][0])
+
+    def plan(self, scrapers: list, now: float = None) -> list:
+        """Scrapers of the sources due `now`, most promising first."""
+        now = now if now is not None else time.time()
+
+        due = list()
+        for s_ in scrapers:
+            next_poll = self.next_poll(str(s_))
+            if next_poll <= now:
+                due.append((self.expected_value(str(s_), now), s_))
+            else:
+                logger.debug(f"{s_} not due before "
+                             f"{time.ctime(next_poll)}")
+
+        due.sort(key=lambda d_: d_[0], reverse=True)
+        logger.info(f"{len(due)} of {len(scrapers)} sources due")
+
+        return [s_ for _, s_ in due]
@@ -3,113 +3,25 @@ import pytz
 import re
 from dateutil.parser import parse
 
+from . import dates
 from .core import PageScraper
+from .query import Selector
+from .streamparse import NestedTableRows
+from .venues import SpecScraper
 
 
-class PCMSScraper(PageScraper):
-
-    SCHEDULE_URL = "https://www.pcmsconcerts.org/concerts/livestreams/"
+class PCMSScraper(SpecScraper):
+    """Philadelphia Chamber Music Society; see `data/venues.json`."""
 
     def __init__(self):
-        super(PCMSScraper, self).__init__(pytz.timezone("America/New_York"))
-
-    def get_livestream_details(self, url: str) -> dict:
-        # parse, create soup
-        soup = self.get_soup(url)
+        super(PCMSScraper, self).__init__("pcms")
 
-        # info, in the title of the page
-        info = soup.title.text
-        if "Philadelphia" not in info:
-            info += " by PCMS"
 
-        # start date
-        evt_dt = soup.find("span", itemprop="startDate")
-        evt_dt = datetime.datetime.strptime(evt_dt.text,
-                                            "%A, %B %d, %Y - %I:%M %p")
-
-        # return
-        res = {
-            "start": evt_dt,
-            'summary': info,
-            'description': url,
-        }
-
-        return res
-
-    def get_upcoming_livestreams(self):
-        # parse, create soup
-        soup = self.get_soup(self.SCHEDULE_URL)
-
-        # events are in the grid of 3 columns
-        events = soup.find_all("div", class_="col-lg-4 col-md-6")
-
-        res = list()
-        for e_ in events:
-            href = e_.find('a', href=True)["href"]
-            res.append(href)
-
-        return res
-
-
-class SCOScraper(PageScraper):
-    """Scottish Chamber Orchestra (Edinburgh)"""
+class SCOScraper(SpecScraper):
+    """Scottish Chamber Orchestra (Edinburgh); see `data/venues.json`."""
 
     def __init__(self):
-        super(SCOScraper, self).__init__(pytz.timezone("Europe/London"))
-
-    def _get_event(self, url: str) -> dict:
-        # parse, create soup
-        soup = self.get_soup(url)
-
-        # info is the first header in a certain div
-        info = soup \
-            .find("div", class_="c-page-header__container o-container") \
-            .find("h1") \
-            .text.strip()
-
-        # start date is in <time>
-        evt_dt = soup.find("time").text.strip()
-        evt_dt = datetime.datetime.strptime(evt_dt, "%d %B, %I:%M%p")
-
-        # but there is no year, need to add manually
-        now = datetime.datetime.now()
-        if evt_dt.month < now.month:
-            evt_dt = evt_dt.replace(year=now.year + 1)
-        else:
-            evt_dt = evt_dt.replace(year=now.year)
-
-        evt_dt = self.tz.localize(evt_dt)
-
-        # return
-        res = {
-            "start": {
-                "dateTime": evt_dt,
-                "timeZone": self.tz.zone
-            },
-            'summary': info,
-            'description': "\n".join(
-                (url,
-                 "https://www.youtube.com/user/SCOmusic")
-            )
-        }
-
-        return res
-
-    def get_event_schedule(self):
-        url = "https://www.sco.org.uk/whats-on/category/streamed-concert"
-
-        # parse, create soup
-        soup = self.get_soup(url)
-
-        # events are in the grid of 3 columns
-        events = soup.find_all(
-            "a", class_="c-media c-media--link c-media--event",
-            href=True
-        )
-
-        res = [e_["href"] for e_ in events]
-
-        return res
+        super(SCOScraper, self).__init__("sco")
 
 
 class ZeneakademiaScraper(PageScraper):
@@ -117,7 +29,7 @@ class ZeneakademiaScraper(PageScraper):
         super(ZeneakademiaScraper, self) \
             .__init__(pytz.timezone("Europe/Budapest"))
 
-    def get_event_schedule(self):
+    def get_upcoming_livestreams(self):
         url = "https://zeneakademia.hu/streaming"
 
         # parse, create soup
@@ -133,7 +45,7 @@ class ZeneakademiaScraper(PageScraper):
 
         return res
 
-    def _get_event(self, url: str) -> dict:
+    def get_livestream_details(self, url: str) -> dict:
         # parse, create soup
         soup = self.get_soup(url)
 
@@ -146,8 +58,7 @@ class ZeneakademiaScraper(PageScraper):
         dt_tm = re.sub(r"[.]", ":", dt_tm)
 
         evt_dt = f"{dt_dt}, {dt_tm}"
-        evt_dt = datetime.datetime.strptime(evt_dt, "%d %B %Y, %H:%M")
-        evt_dt = self.tz.localize(evt_dt)
+        evt_dt = dates.strptime(evt_dt, "%d %B %Y, %H:%M")
 
         # info, in the sibling of the date's grand-parent
         info_tag = evt_dt_tag.find_parent().find_parent().find_next_sibling()
@@ -158,10 +69,7 @@ class ZeneakademiaScraper(PageScraper):
 
         # return
         res = {
-            "start": {
-                "dateTime": evt_dt,
-                "timeZone": self.tz.zone
-            },
+            "start": evt_dt,
             'summary': info,
             'description': url,
         }
@@ -173,7 +81,7 @@ class AllaScalaScraper(PageScraper):
     def __init__(self):
         super(AllaScalaScraper, self).__init__(pytz.timezone("Europe/Rome"))
 
-    def _get_event(self, url: str) -> dict:
+    def get_livestream_details(self, url: str) -> dict:
         # parse, create soup
         soup = self.get_soup(url)
 
@@ -186,35 +94,26 @@ class AllaScalaScraper(PageScraper):
         date_tag = soup.find("div", class_="brd-tl")
         date = date_tag.text
         time_tag = soup.find("div", class_="tab opened").find("p")
-        time = re.search("(at [0-9]+[ap]m CET)", time_tag.text).group()
+        time = re.search("(at [0-9]+[ap]m) CET", time_tag.text).group(1)
         dt = re.sub(u"\xa0", " ", f"{date} {time}")
-        dt = datetime.datetime.strptime(dt, "%d %B %Y at %I%p %Z")
-        dt = self.tz.localize(dt)
+        dt = dates.strptime(dt, "%d %B %Y at %I%p")
 
         res = {
-            "start": {
-                "dateTime": dt,
-                "timeZone": self.tz.zone
-            },
+            "start": dt,
             'summary': info,
             'description': url,
         }
 
         return res
 
-    def get_event_schedule(self) -> list:
+    def get_upcoming_livestreams(self) -> list:
         url = "https://www.teatroallascala.org/en/scala-streaming.html"
 
         # parse, create soup
-        soup = self.get_soup(url)
+        doc = self.get_document(url)
 
         # links are relative (!) hrefs in articles
-        def match_pattern(tag):
-            res_ = (tag.name == "article") & \
-                   (tag.find("a", href=True) is not None)
-            return res_
-
-        events = soup.find_all(match_pattern)
+        events = doc.select(Selector("article", has=Selector("a[href]")))
 
         res = list()
         for e_ in events:
@@ -235,25 +134,23 @@ class ConcertgebouwScraper(PageScraper):
 
 
 class MagyarorszagScraper(PageScraper):
+    _DATE_EXPR = re.compile(
+        "([0-9]{4}[.] ?[0-9]{1,2}[.] ?[0-9]{1,2}[.] [0-9]{2}:[0-9]{2})"
+    )
 
     def __init__(self):
         super(MagyarorszagScraper, self) \
             .__init__(pytz.timezone("Europe/Budapest"))
 
-    def _get_event(self, url: str) -> dict:
+    def get_livestream_details(self, url: str) -> dict:
         # parse, create soup
         soup = self.get_soup(url)
 
         # date, somewhere in format 2021. 03. 04. 19:00
         dt_tag = soup.find("div",
                            class_="list_under_title program_under_title")
-        dt_str = re.search(
-            "([0-9]{4}[.] ?[0-9]{1,2}[.] ?[0-9]{1,2}[.] [0-9]{2}:[0-9]{2})",
-            dt_tag.text
-        ).group(0)
-        dt_str = re.sub(" ", "", dt_str)
-        dt = datetime.datetime.strptime(dt_str, "%Y.%m.%d.%H:%M")
-        dt = self.tz.localize(dt)
+        dt_str = self._DATE_EXPR.search(dt_tag.text).group(0)
+        dt = dates.strptime(dt_str.replace(" ", ""), "%Y.%m.%d.%H:%M")
 
         # info, in h2 at the top, possiblywrapped in (Magyar), ... - Online...
         info_tag = soup.find("h2", class_="list_title program_title")
@@ -272,35 +169,26 @@ class MagyarorszagScraper(PageScraper):
 
         # result
         res = {
-            "start": {
-                "dateTime": dt,
-                "timeZone": self.tz.zone
-            },
+            "start": dt,
             'summary': info,
             'description': description,
         }
 
         return res
 
-    def get_event_schedule(self) -> list:
+    def get_upcoming_livestreams(self) -> list:
         url = "http://filharmonia.hu/virtualis-koncertterem-elo-kozvetitesek/"
 
         # parse, create soup
-        soup = self.get_soup(url)
-
-        content_tag = soup.find("div", class_="entry-content")
+        doc = self.get_document(url)
 
-        def match_pattern(tag):
-            res_ = re.match(re.compile(r"^[0-9]{4}[.] [a-záéúőóüö]+ [0-9]+"),
-                            tag.text)
-            return res_
+        # links in the content, around a date like 2021. március 4
+        a_tags = doc.select(Selector(
+            "div.entry-content a[href]",
+            has=Selector(match=r"[0-9]{4}[.] [a-záéúőóüö]+ [0-9]+")
+        ))
 
-        a_tags = content_tag.find_all("a", href=True)
-
-        event_urls = list()
-        for a_tag in a_tags:
-            if a_tag.find(match_pattern) is not None:
-                event_urls.append(a_tag["href"])
+        event_urls = [a_tag["href"] for a_tag in a_tags]
 
         return event_urls
 
@@ -309,7 +197,7 @@ class MalmoScraper(PageScraper):
     def __init__(self):
         super(MalmoScraper, self).__init__(pytz.timezone("Europe/Stockholm"))
 
-    def get_event_schedule(self) -> list:
+    def get_upcoming_livestreams(self) -> list:
         url = "https://malmolive.se/en/program"
 
         # parse, create soup
@@ -330,31 +218,22 @@ class MalmoScraper(PageScraper):
 
         return res
 
-    def _get_event(self, url: str) -> dict:
+    def get_livestream_details(self, url: str) -> dict:
         # parse, create soup
         soup = self.get_soup(url)
 
         evt_dt_txt = soup.find("div", class_="event--date").find("span").text
-        evt_dt = datetime.datetime.strptime(evt_dt_txt, "%a %d %b %H:%M")
+        evt_dt = dates.strptime(evt_dt_txt, "%a %d %b %H:%M")
 
         # but there is no year, need to add manually
-        now = datetime.datetime.now()
-        if evt_dt.month < now.month:
-            evt_dt = evt_dt.replace(year=now.year + 1)
-        else:
-            evt_dt = evt_dt.replace(year=now.year)
-
-        evt_dt = self.tz.localize(evt_dt)
+        evt_dt = dates.infer_year(evt_dt)
 
         # info,
         info = re.sub("\t\r\n", "", soup.find("h1").text.strip())
 
         # return
         res = {
-            "start": {
-                "dateTime": evt_dt,
-                "timeZone": self.tz.zone
-            },
+            "start": evt_dt,
             'summary': info,
             'description': url,
         }
@@ -366,18 +245,14 @@ class ElbScraper(PageScraper):
     def __init__(self):
         super(ElbScraper, self).__init__(pytz.timezone("Europe/Berlin"))
 
-    def get_event_schedule(self) -> list:
+    def get_upcoming_livestreams(self) -> list:
         url = "https://www.elbphilharmonie.de/en/mediatheque/category/streams"
 
         # parse, create soup
-        soup = self.get_soup(url)
+        doc = self.get_document(url)
 
-        #
-        def match_pattern(tag):
-            res_ = (tag.name == "span") & \
-                   ("ive stream" in tag.text)
-            return res_
-        events = soup.find_all(match_pattern)
+        # spans saying 'Live stream', next to the link
+        events = doc.select(Selector("span", contains="ive stream"))
         res = [e_.find_parent().find("a", href=True)["href"] for e_ in events]
 
         # + root
@@ -385,22 +260,16 @@ class ElbScraper(PageScraper):
 
         return res
 
-    def _get_event(self, url: str) -> dict:
+    def get_livestream_details(self, url: str) -> dict:
         # parse, create soup
-        soup = self.get_soup(url)
+        doc = self.get_document(url)
 
         dt_expr = r"on +([0-9]+\s+[A-Za-z]+\s+[0-9]{4})\s+" \
                   r"at ([0-9]{2}:[0-9]{2})"
 
-        def match_pattern(tag):
-            res_ = (tag.name in ("p", "span")) and \
-                re.search(dt_expr, tag.text)
-            return res_
-        evt_tag = soup.find(match_pattern)
-        evt_dt = re.search(dt_expr, evt_tag.text).group(1) + " " + \
-            re.search(dt_expr, evt_tag.text).group(2)
-        evt_dt = datetime.datetime.strptime(evt_dt, "%d %B %Y %H:%M")
-        evt_dt = self.tz.localize(evt_dt)
+        evt_tag = doc.select_one(Selector("p, span", search=dt_expr))
+        evt_dt = " ".join(re.search(dt_expr, doc.text(evt_tag)).group(1, 2))
+        evt_dt = dates.strptime(evt_dt, "%d %B %Y %H:%M")
 
         # evt_tag = soup.find("span",
         #                     class_="blog-detail__sub-title h3 no-uppercase")
@@ -410,10 +279,7 @@ class ElbScraper(PageScraper):
 
         # return
         res = {
-            "start": {
-                "dateTime": evt_dt,
-                "timeZone": self.tz.zone
-            },
+            "start": evt_dt,
             'summary': info,
             'description': url,
         }
@@ -425,7 +291,7 @@ class HrScraper(PageScraper):
     def __init__(self):
         super(HrScraper, self).__init__(pytz.timezone("Europe/Berlin"))
 
-    def get_event_schedule(self) -> list:
+    def get_upcoming_livestreams(self) -> list:
         url = "https://www.hr-sinfonieorchester.de/livestreams/index.html"
 
         # parse, create soup
@@ -447,22 +313,7 @@ class HrScraper(PageScraper):
 
         return res
 
-    def _get_event(self, url: str) -> dict:
-
-        e2g = {
-            "Januar": "January",
-            "Februar": "February",
-            "März": "March",
-            "April": "April",
-            "Mai": "May",
-            "Juni": "June",
-            "Juli": "July",
-            "August": "August",
-            "September": "September",
-            "Oktober": "October",
-            "November": "November",
-            "Dezember": "December"
-        }
+    def get_livestream_details(self, url: str) -> dict:
 
         # parse, create soup
         soup = self.get_soup(url)
@@ -472,22 +323,16 @@ class HrScraper(PageScraper):
         evt_summary = evt_dt_tag.find_next_sibling("span")
         evt_summary = evt_summary.text
         evt_dt = evt_dt_tag.text
-        for k, v in e2g.items():
-            evt_dt = re.sub(k, v, evt_dt)
+        evt_dt = dates.translate_months(evt_dt, "de")
         evt_dt = re.search(
             r"([0-9]+[.] [A-Za-z]+ [0-9]{4} [–|] [0-9.]{5})", evt_dt
         ).group(0)
         evt_dt = re.sub("[–|] ", "", evt_dt)
-        evt_dt = datetime.datetime.strptime(evt_dt, "%d. %B %Y %H.%M")
-
-        evt_dt = self.tz.localize(evt_dt)
+        evt_dt = dates.strptime(evt_dt, "%d. %B %Y %H.%M")
 
         # return
         res = {
-            "start": {
-                "dateTime": evt_dt,
-                "timeZone": self.tz.zone
-            },
+            "start": evt_dt,
             'summary': evt_summary,
             'description': url,
         }
@@ -502,36 +347,25 @@ class StMaryScraper(PageScraper):
         super(StMaryScraper, self).__init__(pytz.timezone("Europe/London"))
 
     def get_upcoming_livestreams(self) -> list:
-
-        def match_pattern(tag):
-            res_ = \
-                (tag.name == "table") & \
-                (tag.find("table") is not None)
-            return res_
-
-        soup = self.get_soup(
-            "https://www.st-marys-perivale.org.uk/events-001.shtml"
+        """Rows of the table of events, as (date, name) tuples."""
+        rows = self.stream_extract(
+            "https://www.st-marys-perivale.org.uk/events-001.shtml",
+            NestedTableRows(cell_tag="strong")
         )
 
-        tbl = soup.find(match_pattern) \
-                  .find("table") \
-                  .find_all("tr")
+        return rows
 
-        return tbl
-
-    def get_livestream_details(self, event_tr) -> dict:
+    def get_livestream_details(self, event_row: tuple) -> dict:
         """
 
         Parameters
         ----------
-        event_tr : tag
-            row tag of HTML table containing 2 td
+        event_row : tuple
+            texts of the 2 cells of a row of the table of events
 
         """
         # to dates
-        dt, info = tuple(
-            td.find("strong").text.strip() for td in event_tr.find_all("td")
-        )
+        dt, info = tuple(c_.strip() for c_ in event_row)
 
         dt = parse(dt, ignoretz=True) \
             .replace(year=self._YEAR)
@@ -0,0 +1,184 @@
+import datetime
+import hashlib
+import logging
+import time
+import urllib.parse
+
+logger = logging.getLogger("main.seen")
+
+DAY = 86400.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_pages (
+    url TEXT PRIMARY KEY,
+    source TEXT,
+    version TEXT,
+    event_key TEXT,
+    start_ts REAL,
+    first_seen REAL,
+    last_seen REAL,
+    last_fetched REAL
+);
+"""
+
+# query parameters which do not change a page
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def canonical_url(url: str) -> str:
+    """Url without fragment, tracking parameters, default port or case in
+    the host, with sorted query and no trailing slash."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and \
+            (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host += f":{parts.port}"
+
+    query = sorted(
+        (k_, v_) for k_, v_ in urllib.parse.parse_qsl(parts.query, True)
+        if not k_.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+
+    return urllib.parse.urlunsplit(
+        (scheme, host, path, urllib.parse.urlencode(query), "")
+    )
+
+
+def version_of(text: str) -> str:
+    """Short digest of what a listing shows of an event."""
+    text = " ".join(text.split())
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def attach(scrapers, index):
+    """Generator of `scrapers`, page scrapers among them with `index`."""
+    for s_ in scrapers:
+        if hasattr(s_, "seen"):
+            s_.seen = index
+        yield s_
+
+
+class SeenIndex:
+    """Event pages fetched before, to skip fetching them again.
+
+    Pages are keyed by canonical url, with when they were last listed
+    and fetched, the start of their event and the version of their entry
+    in the listing (see `PageScraper.get_listing()`). A listed page is
+    fetched if it is new, if its entry changed, or if it was last
+    fetched more than `refresh` seconds ago; but not if its event
+    started already, or starts beyond `horizon` seconds from now
+    according to the listing, if it tells. Unless told otherwise, pages
+    are fetched until their event is in the calendar.
+
+    Parameters
+    ----------
+    store : EventStore
+    horizon : float
+        seconds ahead beyond which events are left for later runs
+    refresh : float
+        seconds after which unchanged pages are fetched again anyway
+    inserted : bool
+        False to skip pages whose event is only in the store, e.g. when
+        not writing to the calendar
+    """
+
+    def __init__(self, store, horizon: float = 90 * DAY,
+                 refresh: float = 7 * DAY, inserted: bool = True):
+        self.store = store
+        self.horizon = horizon
+        self.refresh = refresh
+        self.inserted = inserted
+        # version of the entries of the pages being fetched, by url
+        self._versions = dict()
+        store.executescript(SCHEMA)
+
+    def pages(self, source: str = None) -> dict:
+        """{url: (version, start ts, last seen, last fetched, whether the
+        event is in the calendar)}."""
+        sql = "SELECT s.url, s.version, s.start_ts, s.last_seen, " \
+              "s.last_fetched, e.calendar_id IS NOT NULL FROM seen_pages s " \
+              "LEFT JOIN events e ON e.key = s.event_key"
+        params = ()
+        if source is not None:
+            sql += " WHERE s.source = ?"
+            params = (source,)
+        return {r_[0]: tuple(r_[1:]) for r_ in self.store.execute(sql,
+                                                                  params)}
+
+    def select(self, source: str, listing: list, now: float = None) -> list:
+        """References of a listing worth fetching.
+
+        Parameters
+        ----------
+        source : str
+        listing : list
+            of (reference, start or None, version or None); references
+            other than urls are always kept
+        now : float
+            timestamp
+
+        Returns
+        -------
+        list
+            of references
+        """
+        now = now if now is not None else time.time()
+        known = self.pages(source)
+
+        res, seen = list(), list()
+        n_known, n_horizon = 0, 0
+        for ref, start, version in listing:
+            if not isinstance(ref, str):
+                res.append(ref)
+                continue
+
+            url = canonical_url(ref)
+            start_ts = start.timestamp() \
+                if isinstance(start, datetime.datetime) else start
+            if start_ts is not None and \
+                    not now <= start_ts <= now + self.horizon:
+                n_horizon += 1
+                continue
+
+            if url in known:
+                seen.append(url)
+                known_version, known_start, _, fetched, inserted = \
+                    known[url]
+                if known_start is not None and known_start < now or \
+                        (inserted or not self.inserted) and \
+                        (version is None or version == known_version) and \
+                        now - fetched < self.refresh:
+                    n_known += 1
+                    continue
+
+            self._versions[url] = version
+            res.append(ref)
+
+        if seen:
+            self.store.execute(
+                f"UPDATE seen_pages SET last_seen = ? WHERE url IN "
+                f"({','.join('?' * len(seen))})", [now] + seen
+            )
+        logger.info(f"{source}: {len(res)} pages to fetch, {n_known} "
+                    f"known, {n_horizon} out of horizon")
+
+        return res
+
+    def record(self, url: str, event, now: float = None) -> None:
+        """Record that page `url` was fetched, and its event."""
+        now = now if now is not None else time.time()
+        url = canonical_url(url)
+        version = self._versions.pop(url, None)
+        self.store.execute(
+            "INSERT INTO seen_pages (url, source, version, event_key, "
+            "start_ts, first_seen, last_seen, last_fetched) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE "
+            "SET version = excluded.version, "
+            "event_key = excluded.event_key, start_ts = excluded.start_ts, "
+            "last_seen = excluded.last_seen, "
+            "last_fetched = excluded.last_fetched",
+            (url, event.source, version, event.key, event.start.timestamp(),
+             now, now, now)
+        )
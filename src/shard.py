@@ -0,0 +1,167 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger("main.shard")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    source TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "big"
+    )
+
+
+class HashRing:
+    """Consistent hashing of sources onto workers.
+
+    Each worker is put at `replicas` points of the ring, and a source
+    belongs to the worker of the first point after its hash. When a worker
+    joins or leaves, only the sources of its points change hands.
+
+    Parameters
+    ----------
+    workers : iterable
+        of worker ids
+    replicas : int
+        points per worker; more spread the load more evenly
+    """
+
+    def __init__(self, workers=(), replicas: int = 64):
+        self.replicas = replicas
+        self._points = list()
+        self._owners = list()
+        for w_ in workers:
+            self.add(w_)
+
+    def __len__(self) -> int:
+        return len(self._points) // self.replicas
+
+    def add(self, worker: str) -> None:
+        for i_ in range(self.replicas):
+            point = _hash(f"{worker}#{i_}")
+            idx = bisect.bisect(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, worker)
+
+    def remove(self, worker: str) -> None:
+        keep = [(p_, w_) for p_, w_ in zip(self._points, self._owners)
+                if w_ != worker]
+        self._points = [p_ for p_, _ in keep]
+        self._owners = [w_ for _, w_ in keep]
+
+    def owner(self, source: str):
+        """Worker of `source`; None without workers."""
+        if not self._points:
+            return None
+        idx = bisect.bisect(self._points, _hash(source)) % len(self._points)
+        return self._owners[idx]
+
+
+class Shard:
+    """The sources of one worker among those sharing an event store.
+
+    Workers announce themselves with a heartbeat; those seen within
+    `ttl` form the ring. Before polling a source, a worker takes a lease
+    on it for `ttl`, such that no other worker polls it in the same cycle,
+    even while the membership changes or runs overlap.
+
+    Parameters
+    ----------
+    store : EventStore
+        shared by all workers
+    worker_id : str
+        defaults to 'host:pid'
+    ttl : float
+        seconds of a lease, and after which a silent worker is dropped;
+        about the length of a cycle
+    """
+
+    def __init__(self, store, worker_id: str = None, ttl: float = 3600.):
+        self.store = store
+        self.worker_id = worker_id if worker_id is not None \
+            else f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = ttl
+        store.executescript(SCHEMA)
+
+    def join(self) -> None:
+        """Announce this worker, or renew its heartbeat."""
+        self.store.execute(
+            "INSERT INTO workers VALUES (?, ?) ON CONFLICT (id) "
+            "DO UPDATE SET heartbeat = excluded.heartbeat",
+            (self.worker_id, time.time())
+        )
+
+    def leave(self) -> None:
+        """Leave the ring and give up the leases of this worker, such that
+        its sources go to the others right away."""
+        self.store.execute("DELETE FROM workers WHERE id = ?",
+                           (self.worker_id,))
+        self.release()
+
+    def members(self) -> list:
+        """Ids of the live workers."""
+        return [r_[0] for r_ in self.store.execute(
+            "SELECT id FROM workers WHERE heartbeat >= ? ORDER BY id",
+            (time.time() - self.ttl,)
+        )]
+
+    def ring(self) -> HashRing:
+        return HashRing(self.members())
+
+    def acquire(self, source: str) -> bool:
+        """Take or renew the lease on `source`; False if held by another."""
+        now = time.time()
+        self.store.execute(
+            "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (source) "
+            "DO UPDATE SET worker = excluded.worker, "
+            "expires = excluded.expires "
+            "WHERE leases.expires < ? OR leases.worker = excluded.worker",
+            (source, self.worker_id, now + self.ttl, now)
+        )
+        rows = self.store.execute("SELECT worker FROM leases "
+                                  "WHERE source = ?", (source,))
+        return rows[0][0] == self.worker_id
+
+    def release(self, source: str = None) -> None:
+        """Give up the lease on `source`, or all leases of this worker."""
+        if source is None:
+            self.store.execute("DELETE FROM leases WHERE worker = ?",
+                               (self.worker_id,))
+            return
+        self.store.execute("DELETE FROM leases WHERE source = ? "
+                           "AND worker = ?", (source, self.worker_id))
+
+    def claim(self, scrapers: list) -> list:
+        """Scrapers of the sources of this worker, leased for a cycle."""
+        self.join()
+        ring = self.ring()
+
+        res = list()
+        for s_ in scrapers:
+            source = str(s_)
+            if ring.owner(source) != self.worker_id:
+                continue
+            if not self.acquire(source):
+                logger.info(f"{source} leased by another worker")
+                continue
+            res.append(s_)
+
+        logger.info(f"{self.worker_id}: {len(res)} of {len(scrapers)} "
+                    f"sources, {len(ring)} workers")
+
+        return res
@@ -0,0 +1,295 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .events import Event
+
+logger = logging.getLogger("main.store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id TEXT PRIMARY KEY,
+    kind TEXT,
+    first_seen REAL,
+    last_polled REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    key TEXT PRIMARY KEY,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    summary TEXT NOT NULL,
+    description TEXT,
+    source TEXT,
+    ref TEXT,
+    calendar_id TEXT,
+    first_seen REAL,
+    last_seen REAL
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start_ts);
+CREATE INDEX IF NOT EXISTS events_source ON events (source, start_ts);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    source TEXT,
+    event_key TEXT,
+    first_seen REAL
+);
+CREATE TABLE IF NOT EXISTS polls (
+    source TEXT NOT NULL,
+    ts REAL NOT NULL,
+    n_events INTEGER,
+    n_new INTEGER
+);
+CREATE INDEX IF NOT EXISTS polls_source ON polls (source, ts);
+CREATE TABLE IF NOT EXISTS merged (
+    key TEXT PRIMARY KEY,
+    into_key TEXT NOT NULL,
+    ts REAL
+);
+CREATE TABLE IF NOT EXISTS venue_urls (
+    url TEXT PRIMARY KEY,
+    source TEXT,
+    event_key TEXT,
+    first_seen REAL,
+    last_seen REAL
+);
+"""
+
+
+def default_path() -> str:
+    return os.path.join(os.environ.get("PROJECT_ROOT", ""),
+                        "data/concertscrape.sqlite")
+
+
+class EventStore:
+    """Local record of sources, scraped events and calendar insertions.
+
+    Events are keyed by `Event.key`; youtube videos and venue pages point
+    to the event they produced. Safe to share between threads.
+
+    Parameters
+    ----------
+    path : str
+        sqlite database, created if not existing; ':memory:' for a
+        throw-away store; defaults to `data/concertscrape.sqlite` under the
+        'PROJECT_ROOT'
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path if path is not None else default_path()
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def execute(self, sql: str, params=()) -> list:
+        """Run one statement, return all rows."""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def executescript(self, sql: str) -> None:
+        with self._lock:
+            self.conn.executescript(sql)
+
+    def touch_source(self, source: str, kind: str = None) -> None:
+        """Record that `source` is being polled now."""
+        now = time.time()
+        self.execute(
+            "INSERT INTO sources (id, kind, first_seen, last_polled) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT (id) DO UPDATE "
+            "SET last_polled = excluded.last_polled, "
+            "kind = COALESCE(excluded.kind, kind)",
+            (source, kind, now, now)
+        )
+
+    def record_poll(self, source: str, n_events: int, n_new: int,
+                    ts: float = None) -> None:
+        """Record that polling `source` yielded `n_new` new events."""
+        self.execute("INSERT INTO polls VALUES (?, ?, ?, ?)",
+                     (source, ts if ts is not None else time.time(),
+                      n_events, n_new))
+
+    def polls(self, source: str, limit: int = 20) -> list:
+        """Last polls of `source` as (ts, n_events, n_new), newest first."""
+        return self.execute(
+            "SELECT ts, n_events, n_new FROM polls WHERE source = ? "
+            "ORDER BY ts DESC LIMIT ?", (source, limit)
+        )
+
+    def lead_times(self, source: str, limit: int = 50) -> list:
+        """Seconds between discovery and start of the last events."""
+        return [r_[0] for r_ in self.execute(
+            "SELECT start_ts - first_seen FROM events WHERE source = ? "
+            "AND start_ts > first_seen ORDER BY first_seen DESC LIMIT ?",
+            (source, limit)
+        )]
+
+    def add_event(self, event: Event) -> bool:
+        """Record an event and what it came from; True if it is new."""
+        now = time.time()
+        with self._lock:
+            new = not self.has_event(event.key)
+            self.execute(
+                "INSERT INTO events (key, start_ts, end_ts, summary, "
+                "description, source, ref, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) "
+                "DO UPDATE SET last_seen = excluded.last_seen, "
+                "summary = excluded.summary, end_ts = excluded.end_ts, "
+                "description = excluded.description",
+                (event.key, event.start.timestamp(), event.end.timestamp(),
+                 event.summary, event.description, event.source, event.ref,
+                 now, now)
+            )
+            if isinstance(event.ref, str):
+                # rescheduled, or renamed: the former event is superseded
+                table, column = ("venue_urls", "url") \
+                    if event.ref.startswith("http") \
+                    else ("videos", "video_id")
+                former = self.execute(
+                    f"SELECT event_key FROM {table} WHERE {column} = ?",
+                    (event.ref,)
+                )
+                if former and former[0][0] not in (None, event.key):
+                    self.mark_merged(former[0][0], event.key)
+
+                if not event.ref.startswith("http"):
+                    self.execute(
+                        "INSERT INTO videos (video_id, source, event_key, "
+                        "first_seen) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (video_id) DO UPDATE "
+                        "SET event_key = excluded.event_key",
+                        (event.ref, event.source, event.key, now)
+                    )
+                else:
+                    self.touch_url(event.ref, event.source, event.key)
+
+        return new
+
+    def has_event(self, key: str) -> bool:
+        return len(self.execute("SELECT 1 FROM events WHERE key = ?",
+                                (key,))) > 0
+
+    def mark_inserted(self, key: str, calendar_id: str) -> None:
+        self.execute("UPDATE events SET calendar_id = ? WHERE key = ?",
+                     (calendar_id, key))
+
+    def is_inserted(self, key: str) -> bool:
+        return len(self.execute(
+            "SELECT 1 FROM events WHERE key = ? AND calendar_id IS NOT NULL",
+            (key,)
+        )) > 0
+
+    def mark_merged(self, key: str, into_key: str) -> None:
+        """Record that event `key` is a duplicate of event `into_key`."""
+        self.execute(
+            "INSERT INTO merged (key, into_key, ts) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET into_key = excluded.into_key, "
+            "ts = excluded.ts", (key, into_key, time.time())
+        )
+
+    def is_merged(self, key: str) -> bool:
+        return len(self.execute("SELECT 1 FROM merged WHERE key = ?",
+                                (key,))) > 0
+
+    def inserted_around(self, start: datetime.datetime,
+                        seconds: float) -> list:
+        """Events in the calendar starting within `seconds` of `start`."""
+        ts = start.timestamp()
+        rows = self.execute(
+            "SELECT key, start_ts, end_ts, summary, description, source, "
+            "ref FROM events WHERE start_ts BETWEEN ? AND ? "
+            "AND calendar_id IS NOT NULL AND key NOT IN (SELECT key "
+            "FROM merged) ORDER BY start_ts",
+            (ts - seconds, ts + seconds)
+        )
+        return [self.to_event(r_) for r_ in rows]
+
+    @staticmethod
+    def to_event(row) -> Event:
+        """Event out of a row (key, start_ts, end_ts, summary, description,
+        source, ref) of the events table."""
+        key, start_ts, end_ts, summary, description, source, ref = row
+        return Event(
+            start=datetime.datetime.fromtimestamp(start_ts,
+                                                  datetime.timezone.utc),
+            end=datetime.datetime.fromtimestamp(end_ts,
+                                                datetime.timezone.utc),
+            summary=summary, description=description or "",
+            source=source, ref=ref
+        )
+
+    def upcoming(self, since: datetime.datetime = None,
+                 source: str = None, merged: bool = True) -> list:
+        """Events starting after `since` (default: now), by start; with
+        those merged into others (see `mark_merged()`) unless `merged`
+        is False."""
+        since = since.timestamp() if since is not None else time.time()
+        sql = "SELECT key, start_ts, end_ts, summary, description, " \
+              "source, ref FROM events WHERE start_ts >= ?"
+        params = [since]
+        if not merged:
+            sql += " AND key NOT IN (SELECT key FROM merged)"
+        if source is not None:
+            sql += " AND source = ?"
+            params.append(source)
+
+        rows = self.execute(sql + " ORDER BY start_ts", params)
+
+        return [self.to_event(r_) for r_ in rows]
+
+    def has_video(self, video_id: str, inserted: bool = False,
+                  start: datetime.datetime = None,
+                  since: float = None) -> bool:
+        """Is the video known (and its event in the calendar)?
+
+        Parameters
+        ----------
+        video_id : str
+        inserted : bool
+            True if its event must be in the calendar
+        start : datetime.datetime
+            optional; its event must start then
+        since : float
+            optional; its event must have been seen since this timestamp
+        """
+        sql = "SELECT 1 FROM videos v JOIN events e ON v.event_key = e.key " \
+              "WHERE v.video_id = ?"
+        params = [video_id]
+        if inserted:
+            sql += " AND e.calendar_id IS NOT NULL"
+        if start is not None:
+            sql += " AND e.start_ts = ?"
+            params.append(start.timestamp())
+        if since is not None:
+            sql += " AND e.last_seen >= ?"
+            params.append(since)
+        return len(self.execute(sql, params)) > 0
+
+    def touch_url(self, url: str, source: str = None,
+                  event_key: str = None) -> None:
+        now = time.time()
+        self.execute(
+            "INSERT INTO venue_urls (url, source, event_key, first_seen, "
+            "last_seen) VALUES (?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE "
+            "SET last_seen = excluded.last_seen, "
+            "event_key = COALESCE(excluded.event_key, event_key)",
+            (url, source, event_key, now, now)
+        )
+
+    def has_url(self, url: str) -> bool:
+        return len(self.execute("SELECT 1 FROM venue_urls WHERE url = ?",
+                                (url,))) > 0
+
+    def source_stats(self) -> list:
+        """Per source: number of events, of inserted ones, last start."""
+        return self.execute(
+            "SELECT source, COUNT(*), COUNT(calendar_id), MAX(start_ts) "
+            "FROM events GROUP BY source ORDER BY COUNT(*) DESC"
+        )
@@ -0,0 +1,307 @@
+import abc
+import codecs
+import html.parser
+import re
+
+from bs4.dammit import EncodingDetector
+
+from .transport import get_transport
+
+# bytes read from the network at once
+CHUNK_SIZE = 16384
+# bytes in which the encoding of a page is looked for, as browsers do
+SNIFF_SIZE = 1024
+
+# e.g. 'span', 'div.a.b', 'span[itemprop=startDate]', '#main', 'a[href]'
+_PART_CSS = r"([.#])([\w-]+)|\[([\w-]+)(?:=(\"[^\"]*\"|'[^']*'|[^\]]*))?\]"
+_SIMPLE_CSS = re.compile(
+    r"^(?P<tag>[a-zA-Z][a-zA-Z0-9]*)?(?P<rest>(?:" + _PART_CSS + r")*)$"
+)
+_PART = re.compile(_PART_CSS)
+
+
+class Matcher:
+    """Tag name, classes and attributes an element must have.
+
+    Parameters
+    ----------
+    tag : str
+        None for any
+    classes : iterable
+    attrs : dict
+        of {name: value}, value None for any
+    """
+
+    def __init__(self, tag: str = None, classes=(), attrs: dict = None):
+        self.tag = tag.lower() if tag is not None else None
+        self.classes = frozenset(classes)
+        self.attrs = dict(attrs or {})
+
+    @classmethod
+    def from_css(cls, css: str):
+        """Matcher of a selector of one element; None if not that simple."""
+        match = _SIMPLE_CSS.match(css.strip())
+        if match is None or not css.strip():
+            return None
+
+        classes, attrs = list(), dict()
+        for prefix, name, attr, value in _PART.findall(match.group("rest")):
+            if prefix == ".":
+                classes.append(name)
+            elif prefix == "#":
+                attrs["id"] = name
+            else:
+                attrs[attr] = value.strip("\"'") if value else None
+
+        return cls(match.group("tag"), classes, attrs)
+
+    def matches(self, tag: str, attrs: list) -> bool:
+        if self.tag is not None and tag != self.tag:
+            return False
+        attrs = dict(attrs)
+        if self.classes and \
+                not self.classes <= set((attrs.get("class") or "").split()):
+            return False
+        for k_, v_ in self.attrs.items():
+            if k_ not in attrs or v_ is not None and attrs[k_] != v_:
+                return False
+        return True
+
+
+class StreamParser(html.parser.HTMLParser, abc.ABC):
+    """Incremental parser extracting plain values; `done` once complete."""
+
+    def __init__(self):
+        super(StreamParser, self).__init__(convert_charrefs=True)
+        self.done = False
+
+    @property
+    @abc.abstractmethod
+    def result(self):
+        """Values extracted so far."""
+        pass
+
+
+class FirstTexts(StreamParser):
+    """Text of the first element matching each selector.
+
+    Parameters
+    ----------
+    selectors : dict
+        of {name: css selector or `Matcher`}
+
+    Attributes
+    ----------
+    result : dict
+        of {name: text}, None for elements not found
+    """
+
+    def __init__(self, selectors: dict):
+        super(FirstTexts, self).__init__()
+        self.matchers = {
+            k_: v_ if isinstance(v_, Matcher) else Matcher.from_css(v_)
+            for k_, v_ in selectors.items()
+        }
+        self.texts = dict.fromkeys(selectors)
+        # name -> [tag, depth, chunks of text] of elements being read
+        self._open = dict()
+
+    @property
+    def result(self) -> dict:
+        return self.texts
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        for o_ in self._open.values():
+            if o_[0] == tag:
+                o_[1] += 1
+        for k_, m_ in self.matchers.items():
+            if self.texts[k_] is None and k_ not in self._open and \
+                    m_.matches(tag, attrs):
+                self._open[k_] = [tag, 0, []]
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        for k_, m_ in self.matchers.items():
+            if self.texts[k_] is None and k_ not in self._open and \
+                    m_.matches(tag, attrs):
+                self.texts[k_] = ""
+        self._check_done()
+
+    def handle_endtag(self, tag: str) -> None:
+        for k_ in list(self._open):
+            o_ = self._open[k_]
+            if o_[0] != tag:
+                continue
+            o_[1] -= 1
+            if o_[1] < 0:
+                self.texts[k_] = "".join(o_[2])
+                del self._open[k_]
+        self._check_done()
+
+    def handle_data(self, data: str) -> None:
+        for o_ in self._open.values():
+            o_[2].append(data)
+
+    def _check_done(self) -> None:
+        self.done = all(v_ is not None for v_ in self.texts.values())
+
+
+class NestedTableRows(StreamParser):
+    """Rows of the first table inside another table.
+
+    Parameters
+    ----------
+    cell_tag : str
+        optional; the text of a cell is that of its first such element
+        (None if there is none) instead of all its text
+
+    Attributes
+    ----------
+    result : list
+        of tuples of the texts of the cells of each row
+    """
+
+    def __init__(self, cell_tag: str = None):
+        super(NestedTableRows, self).__init__()
+        self.cell_tag = cell_tag
+        self.rows = list()
+        self._depth = 0
+        self._target = None
+        self._row = None
+        # chunks of text of the current cell, if any
+        self._cell = None
+        self._found = False
+        self._in_tag = 0
+
+    @property
+    def result(self) -> list:
+        return self.rows
+
+    def _inside(self) -> bool:
+        return self._target is not None and self._depth == self._target
+
+    def _close_cell(self) -> None:
+        if self._cell is not None:
+            self._row.append("".join(self._cell) if self._found else None)
+            self._cell = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(tuple(self._row))
+            self._row = None
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag == "table":
+            self._depth += 1
+            if self._target is None and self._depth == 2:
+                self._target = self._depth
+        elif not self._inside():
+            return
+        elif tag == "tr":
+            self._close_row()
+            self._row = list()
+        elif tag in ("td", "th") and self._row is not None:
+            self._close_cell()
+            self._cell = list()
+            self._found = self.cell_tag is None
+        elif tag == self.cell_tag and self._cell is not None:
+            if self._in_tag:
+                self._in_tag += 1
+            elif not self._found:
+                self._found = True
+                self._in_tag = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "table":
+            if self._inside():
+                self._close_row()
+                self.done = True
+            self._depth -= 1
+        elif not self._inside():
+            return
+        elif tag == self.cell_tag and self._in_tag:
+            self._in_tag -= 1
+        elif tag in ("td", "th"):
+            self._close_cell()
+        elif tag == "tr":
+            self._close_row()
+
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None and not self.done and \
+                (self.cell_tag is None or self._in_tag):
+            self._cell.append(data)
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Encoding of a page out of its first bytes, as `BeautifulSoup` would
+    find it: its byte order mark, else its declared (e.g. <meta charset>)
+    encoding, else utf-8 unless these bytes are no utf-8."""
+    _, encoding = EncodingDetector.strip_byte_order_mark(head)
+    if encoding is None:
+        encoding = EncodingDetector.find_declared_encoding(head, is_html=True)
+    if encoding is None:
+        try:
+            head.decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError as err:
+            # a character may be cut at the end of the chunk
+            encoding = "utf-8" if err.start >= len(head) - 3 \
+                else "windows-1252"
+
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return "utf-8"
+
+
+def stream_extract(url: str, parser: StreamParser, transport=None,
+                   encoding: str = None, chunk_size: int = CHUNK_SIZE):
+    """Feed a page to `parser` as it arrives, until the parser is done.
+
+    The rest of the page is neither downloaded nor parsed.
+
+    Parameters
+    ----------
+    url : str
+    parser : StreamParser
+    transport
+        defaults to the current one, see `transport.get_transport()`
+    encoding : str
+        of the page, by default sniffed out of its first `SNIFF_SIZE`
+        bytes (see `sniff_encoding()`); undecodable bytes are replaced
+    chunk_size : int
+
+    Returns
+    -------
+    the `result` of the parser
+    """
+    transport = transport if transport is not None else get_transport()
+    # bytes held until the encoding is known
+    head, decoder = b"", None
+
+    def feed(content: bytes, final: bool = False) -> None:
+        nonlocal head, decoder
+        if decoder is None:
+            head += content
+            if len(head) < SNIFF_SIZE and not final:
+                return
+            content, bom = EncodingDetector.strip_byte_order_mark(head)
+            decoder = codecs.getincrementaldecoder(
+                bom or encoding or sniff_encoding(content)
+            )(errors="replace")
+        parser.feed(decoder.decode(content, final=final))
+
+    chunks = transport.stream(url, chunk_size=chunk_size)
+    try:
+        for c_ in chunks:
+            feed(c_)
+            if parser.done:
+                break
+        else:
+            feed(b"", final=True)
+            parser.close()
+    finally:
+        # stops reading the response
+        chunks.close()
+
+    return parser.result
@@ -0,0 +1,247 @@
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import logging
+import socket
+import urllib.parse
+
+import httplib2
+import requests
+
+from .deadline import REQUEST_TIMEOUT, DeadlineExceeded, get_deadline
+from .limits import limits
+
+logger = logging.getLogger("main.transport")
+
+# where archived responses of each scraper live, one folder per scraper
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                            "tests", "fixtures")
+
+
+class FixtureNotFound(KeyError):
+    """Raised when replaying a url that has not been recorded."""
+    pass
+
+
+class LiveTransport:
+    """Fetch pages from the web, rate limited per host (see `limits`).
+
+    Each request is given the time left by the current deadline, up to
+    `REQUEST_TIMEOUT` (see `deadline`).
+
+    Attributes
+    ----------
+    fetches : collections.Counter
+        of requests, by host
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.fetches = collections.Counter()
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """Response of `url`, got within the current deadline; out of
+        time is not held against the host (see `limits.guard`)."""
+        host = urllib.parse.urlsplit(url).netloc
+        timeout = get_deadline().timeout()
+        self.fetches[host] += 1
+
+        with limits.guard(host):
+            try:
+                page = self.session.get(url, timeout=timeout, **kwargs)
+            except requests.Timeout as err:
+                # cut short by the deadline
+                if timeout < REQUEST_TIMEOUT:
+                    raise DeadlineExceeded(f"deadline exceeded: {url}") \
+                        from err
+                raise
+            # the host is struggling; let its breaker know
+            if page.status_code >= 500 or page.status_code == 429:
+                page.close()
+                page.raise_for_status()
+
+        return page
+
+    def fetch(self, url: str) -> bytes:
+        return self._get(url).content
+
+    def stream(self, url: str, chunk_size: int = 16384):
+        """Generator of the chunks of a page, read as they are consumed.
+
+        Closing the generator closes the connection.
+        """
+        with self._get(url, stream=True) as page:
+            yield from page.iter_content(chunk_size)
+
+
+class DeadlineHttp(httplib2.Http):
+    """Http of the google api clients, whose requests are given the time
+    left by the current deadline, up to `REQUEST_TIMEOUT`, as those of
+    `LiveTransport` are."""
+
+    def __init__(self, **kwargs):
+        super(DeadlineHttp, self).__init__(timeout=REQUEST_TIMEOUT, **kwargs)
+
+    def request(self, uri, *args, **kwargs):
+        timeout = get_deadline().timeout()
+
+        # new connections take it from here, open ones from their socket
+        self.timeout = timeout
+        for conn_ in self.connections.values():
+            conn_.timeout = timeout
+            if conn_.sock is not None:
+                conn_.sock.settimeout(timeout)
+
+        try:
+            return super(DeadlineHttp, self).request(uri, *args, **kwargs)
+        except socket.timeout as err:
+            # cut short by the deadline
+            if timeout < REQUEST_TIMEOUT:
+                raise DeadlineExceeded(f"deadline exceeded: {uri}") from err
+            raise
+
+
+class Archive:
+    """Folder of recorded responses, with an index of url -> file.
+
+    Parameters
+    ----------
+    path : str
+        folder, created if not existing
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, path: str):
+        self.path = path
+
+        index_file = os.path.join(path, self.INDEX)
+        if os.path.exists(index_file):
+            with open(index_file, mode="r") as fp:
+                self.index = json.load(fp)
+        else:
+            self.index = dict()
+
+    @classmethod
+    def of(cls, scraper):
+        """Archive of a scraper (instance, class or name) in `FIXTURES_DIR`."""
+        if not isinstance(scraper, str):
+            scraper = scraper.__name__ if isinstance(scraper, type) \
+                else type(scraper).__name__
+        return cls(os.path.join(FIXTURES_DIR, scraper))
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def read(self, url: str) -> bytes:
+        if url not in self.index:
+            raise FixtureNotFound(url)
+        with open(os.path.join(self.path, self.index[url]), mode="rb") as fp:
+            return fp.read()
+
+    def write(self, url: str, content: bytes) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        fname = hashlib.sha1(url.encode()).hexdigest()[:16] + ".html"
+        with open(os.path.join(self.path, fname), mode="wb") as fp:
+            fp.write(content)
+
+        self.index[url] = fname
+        with open(os.path.join(self.path, self.INDEX), mode="w") as fp:
+            json.dump(self.index, fp, indent=1, sort_keys=True)
+
+
+def _chunks(content: bytes, chunk_size: int):
+    for i_ in range(0, len(content), chunk_size):
+        yield content[i_:i_ + chunk_size]
+
+
+class StaticTransport:
+    """Serve pages from a dict of {url: content}, e.g. in tests."""
+
+    def __init__(self, pages: dict):
+        self.pages = {
+            k_: v_.encode() if isinstance(v_, str) else v_
+            for k_, v_ in pages.items()
+        }
+
+    def fetch(self, url: str) -> bytes:
+        if url not in self.pages:
+            raise FixtureNotFound(url)
+        return self.pages[url]
+
+    def stream(self, url: str, chunk_size: int = 16384):
+        return _chunks(self.fetch(url), chunk_size)
+
+
+class RecordingTransport:
+    """Fetch pages with `inner` and archive every response."""
+
+    def __init__(self, archive: Archive, inner=None):
+        self.archive = archive
+        self.inner = inner if inner is not None else LiveTransport()
+
+    def fetch(self, url: str) -> bytes:
+        content = self.inner.fetch(url)
+        self.archive.write(url, content)
+        logger.info(f"recorded {url}")
+        return content
+
+    def stream(self, url: str, chunk_size: int = 16384):
+        # the archive keeps whole pages
+        return _chunks(self.fetch(url), chunk_size)
+
+
+class ReplayTransport:
+    """Serve pages from an archive, never touching the network."""
+
+    def __init__(self, archive: Archive):
+        self.archive = archive
+
+    def fetch(self, url: str) -> bytes:
+        return self.archive.read(url)
+
+    def stream(self, url: str, chunk_size: int = 16384):
+        return _chunks(self.fetch(url), chunk_size)
+
+
+_transport = LiveTransport()
+
+
+def get_transport():
+    """Transport currently used by `PageScraper.get_soup`."""
+    return _transport
+
+
+def set_transport(transport) -> None:
+    global _transport
+    _transport = transport
+
+
+@contextlib.contextmanager
+def use_transport(transport):
+    """Temporarily fetch pages with `transport`."""
+    previous = get_transport()
+    set_transport(transport)
+    try:
+        yield transport
+    finally:
+        set_transport(previous)
+
+
+def record(scraper) -> list:
+    """Run `scraper` against the web, archiving all pages it fetches."""
+    archive = Archive.of(scraper)
+    with use_transport(RecordingTransport(archive)):
+        return scraper.get_events()
+
+
+def replay(scraper) -> list:
+    """Re-run `scraper` on its archived pages."""
+    archive = Archive.of(scraper)
+    with use_transport(ReplayTransport(archive)):
+        return scraper.get_events()
@@ -0,0 +1,272 @@
+import datetime
+import json
+import os.path
+import re
+
+import pytz
+import soupsieve
+
+from . import dates
+from .core import PageScraper
+from .seen import version_of
+from .streamparse import FirstTexts, Matcher
+
+
+class VenueSpec:
+    """Declarative description of a venue website, compiled once.
+
+    All selectors are css selectors; they are compiled with `soupsieve` upon
+    construction, as is the optional date regex, such that scraping many
+    pages of the same venue does not repay the compilation.
+
+    Parameters
+    ----------
+    name : str
+        key of the venue in `data/venues.json`
+    url : str
+        url of the page listing upcoming livestreams
+    tz : str
+        time zone of the venue, e.g. 'Europe/London'
+    listing : str
+        selector of the elements holding links to event pages; either the
+        <a> itself or a container with an <a href> inside
+    date : str
+        selector of the element holding the start date
+    date_format : str
+        `strptime` format of the date (after `date_regex` is applied)
+    summary : str
+        selector of the element holding the event name
+    prefix : str
+        prepended to each link, for websites with relative hrefs
+    date_regex : str
+        optional; if given, the groups of the first match are joined with
+        a space and parsed with `date_format`
+    suffix : str
+        appended to the summary unless `suffix_unless` is found therein
+    suffix_unless : str
+    description : list
+        extra lines of the description, after the url of the event
+    locale : str
+        language of the month names in the date, see `dates.MONTHS`
+    listing_date : str
+        optional; selector of the start date within an element of the
+        listing, such that events beyond the horizon are not fetched
+        (see `seen.SeenIndex`)
+    listing_date_format : str
+        `strptime` format thereof; defaults to `date_format`
+    """
+
+    def __init__(self, name: str, url: str, tz: str, listing: str,
+                 date: str, date_format: str, summary: str,
+                 prefix: str = "", date_regex: str = None,
+                 suffix: str = "", suffix_unless: str = None,
+                 description: list = None, locale: str = "en",
+                 listing_date: str = None, listing_date_format: str = None):
+        self.name = name
+        self.url = url
+        self.tz = pytz.timezone(tz)
+        self.prefix = prefix
+        self.date_format = date_format
+        self.suffix = suffix
+        self.suffix_unless = suffix_unless \
+            if suffix_unless is not None else suffix.strip()
+        self.description = list(description or [])
+        self.locale = locale
+        self.listing_date_format = listing_date_format \
+            if listing_date_format is not None else date_format
+
+        # compile everything once
+        self.listing = soupsieve.compile(listing)
+        self.date = soupsieve.compile(date)
+        self.summary = soupsieve.compile(summary)
+        self.date_regex = re.compile(date_regex) \
+            if date_regex is not None else None
+        self.listing_date = soupsieve.compile(listing_date) \
+            if listing_date is not None else None
+
+        # event pages can be read as a stream if both selectors are simple
+        self.stream_targets = {"date": Matcher.from_css(date),
+                               "summary": Matcher.from_css(summary)}
+        if None in self.stream_targets.values():
+            self.stream_targets = None
+
+    @classmethod
+    def by_name(cls, name: str, path: str = None):
+        """Load the spec of venue `name` from `data/venues.json`."""
+        specs = load_venues(path)
+
+        if name.lower() not in specs:
+            raise ValueError("unknown name. venue either erroneously "
+                             "spelled or not implemented.")
+
+        return specs[name.lower()]
+
+    def extract_links(self, soup) -> list:
+        """Collect (unique) links to event pages from the listing."""
+        return [l_[0] for l_ in self.extract_listing(soup)]
+
+    def extract_listing(self, soup) -> list:
+        """(Unique) links to event pages, with the start date if the
+        listing shows it and the version of their entry.
+
+        Returns
+        -------
+        list
+            of (link, localized datetime or None, version) tuples
+        """
+        res, links = list(), set()
+
+        for entry in self.listing.select(soup):
+            tag = entry
+            if tag.name != "a" or not tag.has_attr("href"):
+                tag = tag.find("a", href=True)
+                if tag is None:
+                    continue
+            href = self.prefix + tag["href"]
+            if href in links:
+                continue
+            links.add(href)
+
+            start = None
+            date_tag = self.listing_date.select_one(entry) \
+                if self.listing_date is not None else None
+            if date_tag is not None:
+                try:
+                    start = self.tz.localize(self._parse_date(
+                        date_tag.text, self.listing_date_format
+                    ))
+                except (ValueError, AttributeError):
+                    start = None
+
+            res.append((href, start, version_of(entry.get_text(" "))))
+
+        return res
+
+    def extract_start(self, soup) -> datetime.datetime:
+        """Parse the (timezone-agnostic) start date of an event page."""
+        return self.parse_start(self.date.select_one(soup).text)
+
+    def parse_start(self, dt_str: str) -> datetime.datetime:
+        """Parse the (timezone-agnostic) start date out of its text."""
+        return self._parse_date(dt_str, self.date_format, self.date_regex)
+
+    def _parse_date(self, dt_str: str, date_format: str,
+                    regex=None) -> datetime.datetime:
+        dt_str = dt_str.strip()
+
+        if regex is not None:
+            match = regex.search(dt_str)
+            dt_str = " ".join(match.groups()) if match.groups() \
+                else match.group(0)
+
+        dt = dates.parse(dt_str.replace(u"\xa0", " "), date_format,
+                         locale=self.locale)
+
+        # no year on the page: the event is in the next 12 months
+        if "%Y" not in date_format and "%y" not in date_format:
+            dt = dates.infer_year(dt)
+
+        return dt
+
+    def extract_summary(self, soup) -> str:
+        return self.parse_summary(self.summary.select_one(soup).text)
+
+    def parse_summary(self, info: str) -> str:
+        info = info.strip()
+        if self.suffix and self.suffix_unless not in info:
+            info += self.suffix
+
+        return info
+
+    def extract(self, soup, url: str) -> dict:
+        """Extract event details from the soup of an event page."""
+        res = {
+            "start": self.extract_start(soup),
+            "summary": self.extract_summary(soup),
+            "description": "\n".join([url] + self.description),
+        }
+
+        return res
+
+    def extract_texts(self, texts: dict, url: str) -> dict:
+        """Event details from the texts found by `FirstTexts` with
+        `stream_targets`."""
+        res = {
+            "start": self.parse_start(texts["date"]),
+            "summary": self.parse_summary(texts["summary"]),
+            "description": "\n".join([url] + self.description),
+        }
+
+        return res
+
+
+# compiled specs by (path, modification time)
+_compiled = dict()
+
+
+def load_venues(path: str = None) -> dict:
+    """Load and compile all venue specs.
+
+    Parameters
+    ----------
+    path : str
+        path to the .json with specs; defaults to `data/venues.json` under
+        the 'PROJECT_ROOT'
+
+    Returns
+    -------
+    dict
+        of {name: VenueSpec}
+    """
+    if path is None:
+        path = os.path.join(os.environ.get("PROJECT_ROOT", ""),
+                            "data/venues.json")
+
+    key = (path, os.path.getmtime(path))
+    if key not in _compiled:
+        with open(path, mode="r") as fp:
+            specs = json.load(fp)
+        _compiled[key] = {
+            k.lower(): VenueSpec(name=k.lower(), **v)
+            for k, v in specs.items()
+        }
+
+    return _compiled[key]
+
+
+class SpecScraper(PageScraper):
+    """Scraper of a venue driven by a `VenueSpec`.
+
+    Parameters
+    ----------
+    spec : VenueSpec or str
+        spec or the name thereof in `data/venues.json`
+    """
+
+    def __init__(self, spec):
+        if isinstance(spec, str):
+            spec = VenueSpec.by_name(spec)
+        self.spec = spec
+        super(SpecScraper, self).__init__(spec.tz)
+
+    def __str__(self):
+        if type(self) is SpecScraper:
+            return f"venue {self.spec.name}"
+        return super(SpecScraper, self).__str__()
+
+    def get_upcoming_livestreams(self) -> list:
+        soup = self.get_soup(self.spec.url)
+        return self.spec.extract_links(soup)
+
+    def get_listing(self) -> list:
+        soup = self.get_soup(self.spec.url)
+        return self.spec.extract_listing(soup)
+
+    def get_livestream_details(self, url: str) -> dict:
+        if self.spec.stream_targets is not None:
+            texts = self.stream_extract(url,
+                                        FirstTexts(self.spec.stream_targets))
+            return self.spec.extract_texts(texts, url)
+
+        soup = self.get_soup(url)
+        return self.spec.extract(soup, url)
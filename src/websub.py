@@ -0,0 +1,323 @@
+import datetime
+import functools
+import hashlib
+import hmac
+import http.server
+import logging
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+
+import requests
+
+from .core import YoutubeScraper
+from .deadline import REQUEST_TIMEOUT
+
+logger = logging.getLogger("main.websub")
+
+HUB = "https://pubsubhubbub.appspot.com/subscribe"
+TOPIC = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={}"
+
+# namespaces of youtube's atom notifications
+NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015",
+    "at": "http://purl.org/atompub/tombstones/1.0",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    topic TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    expires REAL
+);
+CREATE TABLE IF NOT EXISTS announced (
+    video_id TEXT PRIMARY KEY,
+    ts REAL NOT NULL
+);
+"""
+
+# states of a subscription: asked for, confirmed by the hub, and asked
+# to end (notified still until the hub confirms)
+PENDING = "pending"
+VERIFIED = "verified"
+UNSUBSCRIBING = "unsubscribing"
+
+
+def topic_of(channel_id: str) -> str:
+    return TOPIC.format(channel_id)
+
+
+def parse_notification(body: bytes) -> list:
+    """(video id, channel id) of the entries of an atom notification.
+
+    Deleted entries are left out.
+    """
+    root = ET.fromstring(body)
+    res = list()
+    for entry in root.findall("atom:entry", NS):
+        video_id = entry.findtext("yt:videoId", namespaces=NS)
+        channel_id = entry.findtext("yt:channelId", namespaces=NS)
+        if video_id:
+            res.append((video_id, channel_id))
+    return res
+
+
+class Subscriber:
+    """WebSub subscriber to the upload feeds of youtube channels.
+
+    Subscriptions are requested from the hub, which verifies them by a
+    GET on the callback; it then POSTs an atom entry to the callback for
+    every new or updated video. The ids of these videos are queued in
+    the store until drained, such that none is lost to a restart, see
+    `PushScraper`. Subscriptions, and when they expire, are kept in the
+    store too; the hub's verifications are only confirmed for what was asked
+    for, and notifications only accepted if signed with `secret` and of
+    a subscribed channel.
+
+    Parameters
+    ----------
+    store : EventStore
+    callback : str
+        public url at which the hub reaches `handler()`
+    secret : str
+        shared with the hub; notifications not signed with it are dropped
+    hub : str
+    lease_seconds : int
+        asked for; the hub decides
+    post : callable
+        like `requests.post`, e.g. of a `LocalHub`
+    """
+
+    def __init__(self, store, callback: str, secret: str, hub: str = HUB,
+                 lease_seconds: int = 5 * 86400, post=None):
+        if not secret:
+            raise ValueError("a websub secret is required")
+        self.store = store
+        self.callback = callback
+        self.hub = hub
+        self.lease_seconds = lease_seconds
+        self.secret = secret
+        self.post = post if post is not None else requests.post
+        store.executescript(SCHEMA)
+
+    def _request(self, mode: str, channel_id: str) -> bool:
+        topic = topic_of(channel_id)
+        data = {"hub.mode": mode,
+                "hub.topic": topic,
+                "hub.callback": self.callback,
+                "hub.verify": "async",
+                "hub.lease_seconds": str(self.lease_seconds),
+                "hub.secret": self.secret}
+
+        if mode == "subscribe":
+            self.store.execute(
+                "INSERT INTO subscriptions (topic, channel_id, state) "
+                "VALUES (?, ?, ?) ON CONFLICT (topic) "
+                "DO UPDATE SET state = CASE WHEN state = ? "
+                "THEN state ELSE excluded.state END",
+                (topic, channel_id, PENDING, VERIFIED)
+            )
+        else:
+            self.store.execute(
+                "UPDATE subscriptions SET state = ? WHERE topic = ?",
+                (UNSUBSCRIBING, topic)
+            )
+
+        res = self.post(self.hub, data=data, timeout=REQUEST_TIMEOUT)
+        if res.status_code not in (202, 204):
+            logger.error(f"{mode} {channel_id}: hub answered "
+                         f"{res.status_code}")
+            if mode == "unsubscribe":
+                # still subscribed
+                self.store.execute(
+                    "UPDATE subscriptions SET state = CASE WHEN expires IS "
+                    "NULL THEN ? ELSE ? END WHERE topic = ? AND state = ?",
+                    (PENDING, VERIFIED, topic, UNSUBSCRIBING)
+                )
+            return False
+
+        return True
+
+    def subscribe(self, channel_id: str) -> bool:
+        """Ask the hub for a subscription; True if it accepted to try."""
+        return self._request("subscribe", channel_id)
+
+    def unsubscribe(self, channel_id: str) -> bool:
+        return self._request("unsubscribe", channel_id)
+
+    def subscriptions(self) -> dict:
+        """{channel id: (state, expiry timestamp)}."""
+        return {r_[0]: (r_[1], r_[2]) for r_ in self.store.execute(
+            "SELECT channel_id, state, expires FROM subscriptions")}
+
+    def renew(self, margin: float = 86400.) -> list:
+        """Subscribe again to topics expiring within `margin` seconds,
+        or never verified; return their channel ids."""
+        rows = self.store.execute(
+            "SELECT channel_id FROM subscriptions WHERE state != ? "
+            "AND (expires IS NULL OR expires < ?)",
+            (UNSUBSCRIBING, time.time() + margin)
+        )
+        res = [r_[0] for r_ in rows if self.subscribe(r_[0])]
+        if res:
+            logger.info(f"{len(res)} subscriptions renewed")
+        return res
+
+    def verify(self, params: dict) -> tuple:
+        """Answer a verification of intent of the hub.
+
+        Parameters
+        ----------
+        params : dict
+            query of the GET of the hub
+
+        Returns
+        -------
+        tuple
+            (http status, body)
+        """
+        mode = params.get("hub.mode")
+        topic = params.get("hub.topic")
+        challenge = params.get("hub.challenge", "")
+
+        rows = self.store.execute(
+            "SELECT state FROM subscriptions WHERE topic = ?", (topic,))
+        state = rows[0][0] if rows else None
+
+        # only what this subscriber asked for
+        if mode == "subscribe" and state in (PENDING, VERIFIED):
+            lease = float(params.get("hub.lease_seconds",
+                                     self.lease_seconds))
+            self.store.execute(
+                "UPDATE subscriptions SET state = ?, expires = ? "
+                "WHERE topic = ?", (VERIFIED, time.time() + lease, topic)
+            )
+            return 200, challenge
+        if mode == "unsubscribe" and state == UNSUBSCRIBING:
+            self.store.execute("DELETE FROM subscriptions WHERE topic = ?",
+                               (topic,))
+            return 200, challenge
+        if mode == "denied":
+            logger.error(f"subscription to {topic} denied: "
+                         f"{params.get('hub.reason')}")
+            return 200, ""
+
+        return 404, ""
+
+    def notify(self, body: bytes, signature: str = None) -> list:
+        """Queue the videos of a notification; return their ids.
+
+        Entries of channels not subscribed to are dropped.
+        """
+        expected = "sha1=" + hmac.new(self.secret.encode(), body,
+                                      hashlib.sha1).hexdigest()
+        if signature is None or not hmac.compare_digest(signature, expected):
+            logger.warning("notification with a wrong signature")
+            return []
+
+        try:
+            entries = parse_notification(body)
+        except ET.ParseError as err:
+            logger.warning(f"malformed notification: {err}")
+            return []
+
+        subscribed = {r_[0] for r_ in self.store.execute(
+            "SELECT channel_id FROM subscriptions WHERE state IN (?, ?)",
+            (VERIFIED, UNSUBSCRIBING))}
+        res = list()
+        for video_id, channel_id in entries:
+            if channel_id not in subscribed:
+                logger.warning(f"notification of {video_id} of "
+                               f"{channel_id}, not subscribed to")
+                continue
+            self.store.execute(
+                "INSERT INTO announced VALUES (?, ?) ON CONFLICT (video_id) "
+                "DO NOTHING", (video_id, time.time())
+            )
+            res.append(video_id)
+
+        return res
+
+    def drain(self) -> list:
+        """Video ids queued so far, each once, oldest first."""
+        rows = self.store.execute(
+            "DELETE FROM announced RETURNING video_id, ts")
+        return [r_[0] for r_ in sorted(rows, key=lambda r_: r_[1])]
+
+    def serve(self, port: int = 8379,
+              host: str = "0.0.0.0") -> http.server.HTTPServer:
+        """Serve the callback in a background thread."""
+        server = http.server.ThreadingHTTPServer(
+            (host, port), functools.partial(CallbackHandler, self)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"websub callback on {host}:{server.server_address[1]}")
+
+        return server
+
+
+class CallbackHandler(http.server.BaseHTTPRequestHandler):
+    """Callback of a `Subscriber`: GET verifies, POST notifies."""
+
+    def __init__(self, subscriber: Subscriber, *args, **kwargs):
+        self.subscriber = subscriber
+        super(CallbackHandler, self).__init__(*args, **kwargs)
+
+    def _answer(self, code: int, body: str = "") -> None:
+        body = body.encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        query = urllib.parse.urlsplit(self.path).query
+        params = dict(urllib.parse.parse_qsl(query))
+        self._answer(*self.subscriber.verify(params))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.subscriber.notify(body, self.headers.get("X-Hub-Signature"))
+        # whatever happened, the hub must not retry
+        self._answer(204)
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(format % args)
+
+
+class PushScraper(YoutubeScraper):
+    """Scraper of the videos announced to a `Subscriber`.
+
+    Only upcoming livestreams among them become events; no polling
+    quota is spent, only one `videos().list` per 50 videos. Videos are
+    looked up afresh even if in the calendar already, as notifications
+    are of updates too, e.g. of a rescheduled premiere.
+    """
+
+    def __init__(self, subscriber: Subscriber, client=None, store=None):
+        super(PushScraper, self).__init__(None, client=client, store=store)
+        self.subscriber = subscriber
+
+    def __str__(self):
+        return "websub"
+
+    def get_upcoming_livestreams(self, *args, **kwargs) -> list:
+        return self.subscriber.drain()
+
+    def scan(self, *args, **kwargs) -> list:
+        self._details.clear()
+        video_ids = self.get_upcoming_livestreams()
+        # not from the cache, see `video_to_event()`
+        self._stale = set(video_ids)
+        return video_ids
+
+    def resolve(self, refs: list):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for e_ in super(PushScraper, self).resolve(refs):
+            if e_.start > now:
+                yield e_
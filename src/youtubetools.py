@@ -2,7 +2,6 @@ import datetime
 import os
 import pickle
 import logging
-import dateutil.parser
 from joblib import Memory
 
 # google
@@ -10,23 +9,34 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 import googleapiclient.discovery
+from google_auth_httplib2 import AuthorizedHttp
+
+from .clientpool import ClientPool, PoolMember
+from .dates import parse_iso
+from .quota import execute
+from .transport import DeadlineHttp
 
 cachedir = os.environ.get("PROJECT_ROOT")
 memory = Memory(cachedir, verbose=0)
+# results are cached by their arguments but the client, which may not be
+# hashable (e.g. a `ClientPool` holds a lock) and does not change them
+NOT_HASHED = ["client"]
 
 logger = logging.getLogger("main.youtube")
 
 
-def get_youtube_client():
+def get_youtube_client(creds_file: str = None,
+                       token_file: str = "token-youtube.json"):
     """Establish connection and set up an API client using credentials.
 
     Relies on the path to an existing .json file set as an environment
-    variable 'GOOGLE_CREDS_FILE'.
+    variable 'GOOGLE_CREDS_FILE', unless `creds_file` is given.
     """
     logger.info("obtaining youtube handler")
 
     scopes = ["https://www.googleapis.com/auth/youtube.force-ssl"]
-    creds_file = os.environ.get("GOOGLE_CREDS_FILE")
+    if creds_file is None:
+        creds_file = os.environ.get("GOOGLE_CREDS_FILE")
 
     # # Disable OAuthlib's HTTPS verification when running locally.
     # # *DO NOT* leave this option enabled in production.
@@ -40,9 +50,8 @@ def get_youtube_client():
     # The file token.json stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
     # time.
-    if os.path.exists('token-youtube.json'):
-        creds = Credentials.from_authorized_user_file('token-youtube.json',
-                                                      scopes)
+    if os.path.exists(token_file):
+        creds = Credentials.from_authorized_user_file(token_file, scopes)
     # If there are no (valid) credentials available, let the user log in.
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -52,11 +61,12 @@ def get_youtube_client():
                 creds_file, scopes)
             creds = flow.run_local_server(port=0)
         # Save the credentials for the next run
-        with open('token-youtube.json', 'w') as token:
+        with open(token_file, 'w') as token:
             token.write(creds.to_json())
 
     youtube = googleapiclient.discovery.build(
-        api_service_name, api_version, credentials=creds
+        api_service_name, api_version,
+        http=AuthorizedHttp(creds, http=DeadlineHttp())
     )
 
     logger.info("...success!")
@@ -64,11 +74,51 @@ def get_youtube_client():
     return youtube
 
 
-def _get_upcoming_livestreams_low_quota(channel_id: str, client) -> list:
-    """Get videoId of upcoming livestreams.
+def get_youtube_pool(creds_files: list = None):
+    """Pool of clients of several projects, used as one client.
+
+    Parameters
+    ----------
+    creds_files : list
+        client secrets of each project; defaults to the comma-separated
+        paths in the environment variable 'GOOGLE_CREDS_FILES'
+
+    Returns
+    -------
+    ClientPool
+        see `clientpool`
+    """
+    if creds_files is None:
+        creds_files = [
+            f_ for f_ in os.environ.get("GOOGLE_CREDS_FILES", "").split(",")
+            if f_
+        ]
+
+    members = list()
+    for f_ in creds_files:
+        name = os.path.splitext(os.path.basename(f_))[0]
+        client = get_youtube_client(f_, token_file=f"token-youtube-{name}"
+                                                   f".json")
+        members.append(PoolMember(name, client))
+
+    return ClientPool(members)
+
+
+def _to_details(video: dict) -> dict:
+    """Livestream details out of a `videos().list` item with snippet."""
+    return {"channelTitle": video["snippet"]["channelTitle"],
+            "title": video["snippet"]["title"],
+            "description": video["snippet"]["description"],
+            "start": video["liveStreamingDetails"]["scheduledStartTime"],
+            "videoId": video["id"]}
+
+
+def get_upcoming_livestream_details(channel_id: str, client) -> list:
+    """Get details of upcoming livestreams, scanning uploads.
 
     Retrieves videos with liveStreamingDetails from the uploads playlist of
-    a channel; this is a cheap (in terms of quota) query.
+    a channel; this is a cheap (in terms of quota) query. The snippet is
+    requested along, so no further call is needed for the details.
 
     Parameters
     ----------
@@ -79,14 +129,14 @@ def _get_upcoming_livestreams_low_quota(channel_id: str, client) -> list:
     Returns
     -------
     res : list
-        of video ids
+        of dict, as returned by `get_livestreaming_details()`
     """
     request_channels = client.channels().list(
         part="contentDetails",
         id=channel_id
     )
 
-    response_channels = request_channels.execute()
+    response_channels = execute(request_channels)
 
     # all 'uploads' playlists
     uploads_pl = [
@@ -104,34 +154,47 @@ def _get_upcoming_livestreams_low_quota(channel_id: str, client) -> list:
             maxResults=50
         )
 
-        response_videos = request_videos.execute()
+        response_videos = execute(request_videos)
         videos = response_videos["items"]
 
         # filter out livestreams
         video_ids = [v_["contentDetails"]["videoId"] for v_ in videos]
 
         request_livestreams = client.videos().list(
-            part="liveStreamingDetails",
+            part="liveStreamingDetails,snippet",
             id=",".join(video_ids)
         )
-        response_livestreams = request_livestreams.execute()
+        response_livestreams = execute(request_livestreams)
         livestreams = response_livestreams["items"]
 
         for ls_ in livestreams:
             ls_details = ls_.get("liveStreamingDetails", False)
-            if not ls_details:
+            if not ls_details or "scheduledStartTime" not in ls_details:
                 continue
-            s_t = ls_details.get("scheduledStartTime",
-                                 ls_details.get("actualStartTime", "no time"))
-            if dateutil.parser.parse(s_t).timestamp() < \
+            s_t = ls_details["scheduledStartTime"]
+            if parse_iso(s_t).timestamp() < \
                     datetime.datetime.today().timestamp():
                 continue
-            res.append(ls_["id"])
+            res.append(_to_details(ls_))
 
     return res
 
 
-@memory.cache
+def _get_upcoming_livestreams_low_quota(channel_id: str, client) -> list:
+    """Get videoId of upcoming livestreams.
+
+    See `get_upcoming_livestream_details()`.
+
+    Returns
+    -------
+    res : list
+        of video ids
+    """
+    return [d_["videoId"]
+            for d_ in get_upcoming_livestream_details(channel_id, client)]
+
+
+@memory.cache(ignore=NOT_HASHED)
 def _get_upcoming_livestreams_high_quota(channel_id: str, client) -> list:
     """Get videoId of upcoming livestreams.
 
@@ -156,7 +219,7 @@ def _get_upcoming_livestreams_high_quota(channel_id: str, client) -> list:
         eventType="upcoming"
     )
 
-    response = request.execute()
+    response = execute(request)
 
     res = [ls_["id"]["videoId"] for ls_ in response["items"]]
 
@@ -185,14 +248,15 @@ def get_upcoming_livestreams(channel_id: str,
     return f(channel_id, client)
 
 
-@memory.cache
+@memory.cache(ignore=NOT_HASHED)
 def get_livestreaming_details(video_id: str, client) -> list:
     """Get livestreaming details of a video.
 
     Parameters
     ----------
     video_id : str
-        comma-separated video ids, each video must be a livestream
+        comma-separated video ids; videos which are no (scheduled)
+        livestreams are left out
     client : Resource
     """
     # get video element
@@ -200,15 +264,11 @@ def get_livestreaming_details(video_id: str, client) -> list:
         part="liveStreamingDetails,snippet",
         id=video_id
     )
-    response_list = request.execute()["items"]
+    response_list = execute(request)["items"]
 
     res = [
-        {"channelTitle": e_["snippet"]["channelTitle"],
-         "title": e_["snippet"]["title"],
-         "description": e_["snippet"]["description"],
-         "start": e_["liveStreamingDetails"]["scheduledStartTime"],
-         "videoId": e_["id"]}
-        for e_ in response_list
+        _to_details(e_) for e_ in response_list
+        if "scheduledStartTime" in e_.get("liveStreamingDetails", {})
     ]
 
     return res
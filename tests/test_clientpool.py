@@ -0,0 +1,86 @@
+import datetime
+import importlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pytz
+
+from src.clientpool import (ClientPool, PoolMember, QuotaExhausted,
+                            next_quota_reset)
+from src.core import YoutubeScraper
+from src.emulator import Catalog, FakeYoutube
+from src.limits import limits
+from src.quota import ledger
+from src import youtubetools
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.catalog = Catalog.synthetic(6, n_videos=20, seed=6)
+        # the projects know more quota than they have, as after a restart
+        self.fakes = {n_: FakeYoutube(self.catalog, quota=q_)
+                      for n_, q_ in (("a", 250), ("b", 150), ("c", 400))}
+        self.pool = ClientPool([PoolMember(n_, f_, quota=500)
+                                for n_, f_ in self.fakes.items()])
+        ledger.reset()
+
+    def tearDown(self) -> None:
+        ledger.reset()
+        limits.reset()
+
+    def scrape(self, ch_id):
+        return YoutubeScraper(ch_id, client=self.pool) \
+            .get_upcoming_livestreams(low_quota=False)
+
+    def test_spread_and_failover(self):
+        channels = list(self.catalog.channels)
+        for ch_id in channels[:4]:
+            self.assertGreater(len(self.scrape(ch_id)), 0)
+
+        # spread evenly while all have quota
+        self.assertEqual(dict(ledger.units_by_key),
+                         {"a": 200, "b": 100, "c": 100})
+
+        # 'b' fails over to 'c' at once
+        self.scrape(channels[4])
+        self.assertEqual(self.fakes["b"].quota_used, 100)
+        self.assertEqual(self.fakes["c"].quota_used, 200)
+        self.assertEqual(self.pool.summary()["b"], 0)
+
+        # searches until no project has quota left: as many as they allow
+        n_searches = 5
+        with self.assertRaises(QuotaExhausted):
+            while True:
+                self.scrape(channels[n_searches % len(channels)])
+                n_searches += 1
+        self.assertEqual(n_searches, 2 + 1 + 4)
+        self.assertEqual({n_: f_.quota_used for n_, f_ in self.fakes.items()},
+                         {"a": 200, "b": 100, "c": 400})
+
+    def test_cached(self):
+        ch_id = list(self.catalog.channels)[0]
+        tmp = tempfile.TemporaryDirectory()
+        try:
+            with mock.patch.dict(os.environ, PROJECT_ROOT=tmp.name):
+                cached = importlib.reload(youtubetools)
+            for _ in range(2):
+                video_ids = cached.get_upcoming_livestreams(
+                    ch_id, self.pool, low_quota=False)
+                cached.get_livestreaming_details(",".join(video_ids),
+                                                 self.pool)
+        finally:
+            # without a cache again, as the other tests expect
+            importlib.reload(youtubetools)
+            tmp.cleanup()
+
+        # the second time out of the cache, despite the pool's lock
+        self.assertEqual(ledger.calls["youtube.search.list"], 1)
+        self.assertEqual(ledger.calls["youtube.videos.list"], 1)
+
+    def test_next_quota_reset(self):
+        now = pytz.utc.localize(datetime.datetime(2021, 5, 23, 12))
+        self.assertEqual(next_quota_reset(now),
+                         pytz.utc.localize(datetime.datetime(2021, 5, 24, 7)))
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+from src.daemon import Daemon
+from src.emulator import Catalog, FakeYoutube, FakeCalendar
+from src.feed import Feed
+from src.store import EventStore
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.catalog = Catalog.synthetic(3, n_videos=30, seed=2)
+        self.youtube = FakeYoutube(self.catalog)
+        self.calendar = FakeCalendar()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "channels.json")
+        self.write_channels(2)
+
+        self.daemon = Daemon(self.store, self.youtube, self.calendar,
+                             channels_path=self.path)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def write_channels(self, n: int) -> None:
+        names = dict(list(self.catalog.names().items())[:n])
+        with open(self.path, mode="w") as fp:
+            json.dump(names, fp)
+        # mtime resolution may be coarse
+        os.utime(self.path, (n, n))
+
+    def test_tick(self):
+        n_events = self.daemon.tick()
+        self.assertGreater(n_events, 0)
+        self.assertEqual(len(self.calendar.stored), n_events)
+        n_search = self.youtube.calls["youtube.search.list"]
+        self.assertEqual(n_search, 2)
+
+        # nothing due right after
+        self.assertEqual(self.daemon.tick(), 0)
+        self.assertEqual(self.youtube.calls["youtube.search.list"], n_search)
+
+        # a new channel is polled as soon as the file changes
+        self.write_channels(3)
+        self.daemon.tick()
+        self.assertEqual(self.youtube.calls["youtube.search.list"], 3)
+        self.assertEqual(self.daemon.get_status()["ticks"], 3)
+
+    def test_venues_only(self):
+        # the feed of the events polled before, written at each tick
+        self.daemon.tick()
+        feed_path = os.path.join(self.tmp.name, "feed")
+        daemon = Daemon(self.store, None, None, channels_path=self.path,
+                        youtube=False, feed=Feed(self.store),
+                        feed_path=feed_path)
+        n_search = self.youtube.calls["youtube.search.list"]
+        self.assertEqual(daemon.tick(), 0)
+        self.assertEqual(self.youtube.calls["youtube.search.list"], n_search)
+        self.assertIsNone(daemon.get_status()["last_error"])
+        with open(os.path.join(feed_path, "events.json")) as fp:
+            self.assertEqual(len(json.load(fp)), len(self.calendar.stored))
+
+        # polls are not journaled
+        self.assertEqual(self.store.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'runs'"),
+            [(0,)])
+
+    def test_status(self):
+        server = self.daemon.serve_status(port=0)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            self.daemon.tick()
+            with urllib.request.urlopen(url + "/health") as res:
+                self.assertEqual(res.read(), b"ok")
+            with urllib.request.urlopen(url + "/status") as res:
+                status = json.load(res)
+            self.assertEqual(status["ticks"], 1)
+            self.assertEqual(status["sources"], 2)
+
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + "/nothing")
+        finally:
+            server.shutdown()
+            server.server_close()
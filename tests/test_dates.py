@@ -0,0 +1,54 @@
+import datetime
+import unittest
+
+import pytz
+
+from src import dates
+
+
+class TestDates(unittest.TestCase):
+
+    def test_translate_months(self):
+        self.assertEqual(dates.translate_months("20. Mai 2021", "de"),
+                         "20. May 2021")
+        self.assertEqual(dates.translate_months("4 március 2021", "hu"),
+                         "4 March 2021")
+        # only whole words are replaced
+        self.assertEqual(dates.translate_months("Maid", "de"), "Maid")
+
+    def test_strptime(self):
+        cases = [
+            ("Sunday, May 23, 2021 - 03:00 PM", "%A, %B %d, %Y - %I:%M %p"),
+            ("15 April, 7:30pm", "%d %B, %I:%M%p"),
+            ("Thu 08 Apr 19:00", "%a %d %b %H:%M"),
+            ("2021.03.04.19:00", "%Y.%m.%d.%H:%M"),
+            ("20. May 2021 20.00", "%d. %B %Y %H.%M"),
+            ("9 February 2021,  19:30", "%d %B %Y, %H:%M"),
+        ]
+        for text, fmt in cases:
+            self.assertEqual(dates.strptime(text, fmt),
+                             datetime.datetime.strptime(text, fmt))
+
+        with self.assertRaises(ValueError):
+            dates.strptime("2021.03.04.19:00 extra", "%Y.%m.%d.%H:%M")
+
+    def test_parse(self):
+        res = dates.parse("20. Mai 2021 20.00", "%d. %B %Y %H.%M", "de")
+        self.assertEqual(res, datetime.datetime(2021, 5, 20, 20))
+
+    def test_infer_year(self):
+        now = datetime.datetime(2021, 11, 15)
+        self.assertEqual(dates.infer_year(datetime.datetime(1900, 1, 3),
+                                          now=now).year, 2022)
+        self.assertEqual(dates.infer_year(datetime.datetime(1900, 11, 3),
+                                          now=now).year, 2021)
+
+    def test_parse_iso(self):
+        res = dates.parse_iso("2021-05-20T18:00:00Z")
+        self.assertEqual(res, pytz.utc.localize(
+            datetime.datetime(2021, 5, 20, 18)))
+
+        res = dates.parse_iso("2021-05-20T18:00:00.25+02:00")
+        self.assertEqual(res.utcoffset(), datetime.timedelta(hours=2))
+
+        self.assertIs(dates.parse_iso(res), res)
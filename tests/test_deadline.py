@@ -0,0 +1,92 @@
+import time
+import unittest
+
+import requests
+
+from src.core import YoutubeScraper
+from src.deadline import (Deadline, DeadlineExceeded, get_deadline,
+                          use_deadline)
+from src.emulator import Catalog, FakeYoutube, FakeCalendar
+from src.limits import CLOSED, limits
+from src.pipeline import pipeline, fetch_events, write_events
+from src.transport import LiveTransport
+
+
+class SlowSession:
+    """Stand-in of `requests.Session` whose requests all time out."""
+
+    def get(self, url, timeout=None, **kwargs):
+        raise requests.Timeout(url)
+
+
+class TestDeadline(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.catalog = Catalog.synthetic(3, n_videos=30, seed=3)
+
+    def test_budgets(self):
+        deadline = Deadline(10.)
+        self.assertLessEqual(deadline.timeout(cap=5.), 5.)
+        self.assertLessEqual(deadline.child(1.).remaining(), 1.)
+        self.assertGreater(deadline.child(100.).remaining(), 5.)
+
+        expired = Deadline(0.)
+        with self.assertRaises(DeadlineExceeded):
+            expired.timeout()
+        self.assertTrue(expired.child(10.).expired)
+
+    def test_use_deadline(self):
+        outer = get_deadline()
+        with use_deadline(Deadline(1.)) as d_:
+            self.assertIs(get_deadline(), d_)
+            with use_deadline(Deadline(2.), local=True) as local:
+                self.assertIs(get_deadline(), local)
+            self.assertIs(get_deadline(), d_)
+        self.assertIs(get_deadline(), outer)
+
+    def test_not_held_against_host(self):
+        transport = LiveTransport()
+        transport.session = SlowSession()
+
+        # out of time before, or while, fetching
+        for deadline in [Deadline(0.), Deadline(1.)] * 3:
+            with use_deadline(deadline):
+                with self.assertRaises(DeadlineExceeded):
+                    transport.fetch("https://slow.example/e/1")
+
+        self.assertEqual(limits.breaker("slow.example").state, CLOSED)
+        self.assertEqual(transport.fetches["slow.example"], 3)
+
+    def test_expired_run(self):
+        youtube = FakeYoutube(self.catalog, latency=.02)
+        calendar = FakeCalendar()
+        scrapers = [YoutubeScraper(ch_id, client=youtube)
+                    for ch_id in self.catalog.channels]
+
+        # enough time for about a channel
+        with use_deadline(Deadline(.1)) as deadline:
+            events = list(fetch_events(scrapers, low_quota=False))
+            time.sleep(.1)
+            # what was found is written nonetheless
+            written = list(pipeline(events, lambda e: write_events(
+                e, client=calendar)))
+
+        self.assertGreater(len(events), 0)
+        self.assertEqual(len(written), len(events))
+        skipped = [s_ for s_, _ in deadline.skipped]
+        self.assertIn(str(scrapers[-1]), skipped)
+        self.assertNotIn(str(scrapers[0]), skipped)
+
+    def test_source_budget(self):
+        youtube = FakeYoutube(self.catalog, latency=.02)
+        scrapers = [YoutubeScraper(ch_id, client=youtube)
+                    for ch_id in self.catalog.channels]
+
+        # no source gets past its scan, but all are tried
+        with use_deadline(Deadline(10.)) as deadline:
+            events = list(fetch_events(scrapers, source_budget=.01,
+                                       low_quota=True))
+
+        self.assertEqual(events, [])
+        self.assertEqual([s_ for s_, _ in deadline.skipped],
+                         [str(s_) for s_ in scrapers])
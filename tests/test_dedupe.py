@@ -0,0 +1,63 @@
+import datetime
+import unittest
+
+from src.dedupe import DedupeIndex, enrich, tokenize
+from src.events import Event
+
+
+class TestDedupeIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.index = DedupeIndex()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Kodály Kórus – Online közvetítés"),
+                         ["kodaly", "korus", "kozvetites"])
+
+    def test_cross_source(self):
+        venue = Event(start="2021-05-20T20:00:00+02:00",
+                      summary="Schuberts »Große Sinfonie«",
+                      description="https://www.hr-sinfonieorchester.de/"
+                                  "livestreams/schuberts-grosse-sinfonie",
+                      source="HrScraper")
+        youtube = Event(start="2021-05-20T18:05:00Z",
+                        summary="hr-Sinfonieorchester | Schuberts "
+                                "»Große Sinfonie« | Livestream",
+                        description="https://www.youtube.com/watch?v=x",
+                        source="channel UCiyuYC0D4-AO0AonCfMifPQ")
+        other = Event(start="2021-05-20T18:00:00Z",
+                      summary="Mahler 5 with Alain Altinoglu",
+                      source="channel UCiyuYC0D4-AO0AonCfMifPQ")
+        later = venue.replace(start=venue.start + datetime.timedelta(days=7))
+
+        self.assertEqual([self.index.add(e_)
+                          for e_ in (venue, youtube, other, later)],
+                         [0, 0, 2, 3])
+
+        # the venue's page says more than the video's url
+        self.assertIs(enrich(venue, youtube), venue)
+        richer = enrich(youtube, venue)
+        self.assertEqual(richer.key, youtube.key)
+        self.assertEqual(richer.description, venue.description)
+
+    def test_many(self):
+        start = datetime.datetime(2021, 1, 1, 20, tzinfo=datetime.timezone.utc)
+        composers = ["Bach", "Brahms", "Chopin", "Debussy"]
+        performers = ["Argerich", "Zimerman", "Uchida", "Levit", "Wang",
+                      "Trifonov", "Pires"]
+        for i_ in range(2000):
+            e_ = Event(start=start + datetime.timedelta(hours=i_ // 4),
+                       summary=f"{composers[i_ % 4]} recital by "
+                               f"{performers[i_ % 7]}")
+            # a cluster of its own, and its duplicate
+            self.assertEqual(self.index.add(e_), 2 * i_)
+            self.assertEqual(self.index.add(e_.replace(
+                summary=e_.summary + " (live)")), 2 * i_)
+
+    def test_numbers_differ(self):
+        a = Event(start="2021-05-20T18:00:00Z", summary="Mahler Symphony 5")
+        b = a.replace(summary="Mahler: Symphony No. 9")
+        c = a.replace(summary="Mahler - Symphony no. 5 (livestream)")
+
+        self.assertEqual([self.index.add(e_) for e_ in (a, b, c)],
+                         [0, 1, 0])
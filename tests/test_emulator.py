@@ -0,0 +1,90 @@
+import unittest
+
+from googleapiclient.errors import HttpError
+
+from src.core import YoutubeScraper
+from src.calendartools import insert_event
+from src.emulator import Catalog, FakeYoutube, FakeCalendar
+from src.limits import limits
+from src.quota import ledger
+from src.store import EventStore
+
+
+class TestEmulator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.catalog = Catalog.synthetic(3, n_videos=20, seed=1)
+        self.ch_id = list(self.catalog.channels)[0]
+        self.youtube = FakeYoutube(self.catalog)
+        ledger.reset()
+
+    def tearDown(self) -> None:
+        # the emulated failures must not trip breakers of other tests
+        limits.reset()
+
+    def test_quota_paths_agree(self):
+        scr = YoutubeScraper(self.ch_id, client=self.youtube)
+        high = scr.get_upcoming_livestreams(low_quota=False)
+        low = scr.get_upcoming_livestreams(low_quota=True)
+
+        self.assertGreater(len(high), 0)
+        self.assertEqual(sorted(high), sorted(low))
+        self.assertEqual(ledger.units["youtube.search.list"], 100)
+        self.assertEqual(self.youtube.quota_used, ledger.total_units)
+
+    def test_get_events(self):
+        scr = YoutubeScraper(self.ch_id, client=self.youtube)
+        events = scr.get_events(low_quota=True)
+
+        self.assertGreater(len(events), 0)
+        self.assertTrue(
+            all(e_.description.startswith("https://www.youtube.com/")
+                for e_ in events)
+        )
+
+    def test_single_pass_low_quota(self):
+        # channel, uploads and their details: no second videos.list
+        scr = YoutubeScraper(self.ch_id, client=self.youtube)
+        events = scr.get_events(low_quota=True)
+        self.assertEqual(self.youtube.calls["youtube.videos.list"], 1)
+        self.assertEqual(ledger.total_units, 3)
+
+        # same events as through the search
+        high = YoutubeScraper(self.ch_id, client=self.youtube) \
+            .get_events(low_quota=False)
+        self.assertEqual(sorted(e_.key for e_ in events),
+                         sorted(e_.key for e_ in high))
+
+        # details are only kept of the livestreams scanned for
+        store = EventStore(":memory:")
+        for e_ in events:
+            store.add_event(e_)
+            store.mark_inserted(e_.key, "evt")
+        scr = YoutubeScraper(self.ch_id, client=self.youtube, store=store)
+        self.assertEqual(scr.scan(low_quota=True), [])
+        self.assertEqual(scr._details, {})
+        store.close()
+
+    def test_quota_exceeded(self):
+        youtube = FakeYoutube(self.catalog, quota=150)
+        scr = YoutubeScraper(self.ch_id, client=youtube)
+        scr.get_upcoming_livestreams(low_quota=False)
+
+        with self.assertRaises(HttpError) as ctx:
+            scr.get_upcoming_livestreams(low_quota=False)
+        self.assertEqual(ctx.exception.resp.status, 403)
+
+    def test_error_rate(self):
+        youtube = FakeYoutube(self.catalog, error_rate=1.0)
+        with self.assertRaises(HttpError):
+            youtube.channels().list(part="id", id=self.ch_id).execute()
+
+    def test_insert_event(self):
+        calendar = FakeCalendar()
+        scr = YoutubeScraper(self.ch_id, client=self.youtube)
+        events = scr.get_events(low_quota=True)
+
+        for e_ in events + events:
+            insert_event(e_, calendar)
+
+        self.assertEqual(len(calendar.stored), len(events))
@@ -0,0 +1,59 @@
+import datetime
+import pickle
+import unittest
+
+import pytz
+
+from src.events import Event
+
+
+class TestEvent(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tz = pytz.timezone("Europe/Berlin")
+        self.event = Event(
+            start=self.tz.localize(datetime.datetime(2021, 5, 20, 20)),
+            summary=" Schuberts »Große Sinfonie« ",
+            description="https://www.hr-sinfonieorchester.de/",
+            source="HrScraper", ref="https://www.hr-sinfonieorchester.de/"
+        )
+
+    def test_utc(self):
+        self.assertEqual(self.event.start.utcoffset(), datetime.timedelta(0))
+        self.assertEqual(self.event.start,
+                         datetime.datetime(2021, 5, 20, 18, tzinfo=pytz.utc))
+        self.assertEqual(self.event.end - self.event.start,
+                         datetime.timedelta(hours=1, minutes=30))
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.event.summary = "other"
+        with self.assertRaises(AttributeError):
+            self.event.extra = 1
+
+    def test_key(self):
+        # same start in another zone, summary in another case
+        other = Event(start="2021-05-20T18:00:00Z",
+                      summary="schuberts  »große sinfonie«",
+                      source="channel UCiyuYC0D4-AO0AonCfMifPQ")
+
+        self.assertEqual(self.event.key, other.key)
+        self.assertEqual(len({self.event, other}), 1)
+        self.assertNotEqual(self.event.key,
+                            self.event.replace(summary="Mahler").key)
+
+    def test_naive_start(self):
+        with self.assertRaises(ValueError):
+            Event(start=datetime.datetime(2021, 5, 20, 20), summary="x")
+
+    def test_body_roundtrip(self):
+        body = self.event.to_body()
+        self.assertEqual(body["start"]["dateTime"],
+                         "2021-05-20T18:00:00+00:00")
+        self.assertEqual(body["summary"], "Schuberts »Große Sinfonie«")
+        self.assertEqual(Event.from_dict(body), self.event)
+
+    def test_pickle(self):
+        res = pickle.loads(pickle.dumps(self.event))
+        self.assertEqual(res, self.event)
+        self.assertEqual(res.ref, self.event.ref)
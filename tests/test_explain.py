@@ -0,0 +1,118 @@
+import datetime
+import unittest
+
+from src.core import YoutubeScraper
+from src.events import Event
+from src.explain import Planner
+from src.journal import DONE, Journal
+from src.seen import DAY, SeenIndex
+from src.shard import HashRing, Shard
+from src.store import EventStore
+from src.venues import SpecScraper, VenueSpec
+
+NOW = datetime.datetime.now(datetime.timezone.utc).timestamp()
+
+
+def make_event(source: str, i_: int, ref: str) -> Event:
+    start = datetime.datetime.fromtimestamp(NOW + (i_ + 1) * DAY,
+                                            datetime.timezone.utc)
+    return Event(start=start, summary=f"{source} {i_}", source=source,
+                 ref=ref)
+
+
+class TestPlanner(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+
+        self.channel = YoutubeScraper("UCa")
+        source = str(self.channel)
+        # two new livestreams a day
+        self.store.record_poll(source, 3, 3, ts=NOW - 2 * DAY)
+        self.store.record_poll(source, 2, 2, ts=NOW - DAY)
+        events = [make_event(source, i_, f"vid{i_}") for i_ in range(3)]
+        for e_ in events:
+            self.store.add_event(e_)
+        self.store.mark_inserted(events[0].key, "evt0")
+
+        self.venue = SpecScraper(VenueSpec(
+            name="test venue", url="https://venue.example/",
+            tz="Europe/London", listing="div.grid",
+            prefix="https://venue.example", date="p.when",
+            date_format="%d %B %Y %H:%M", summary="title"
+        ))
+        source = str(self.venue)
+        self.store.record_poll(source, 3, 3, ts=NOW - DAY)
+        self.pages = [make_event(source, i_, f"https://venue.example/e/{i_}")
+                      for i_ in range(3)]
+        for e_ in self.pages:
+            self.store.add_event(e_)
+            self.store.mark_inserted(e_.key, "evt")
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_quota(self):
+        plan = Planner(self.store).plan([self.channel], now=NOW)
+        # search, then details of 2 pending and ~2 new livestreams
+        self.assertEqual(plan.calls["youtube.search.list"], 1)
+        self.assertEqual(plan.calls["youtube.videos.list"], 1)
+        self.assertAlmostEqual(plan.writes, 4.)
+        self.assertAlmostEqual(plan.calls["calendar.events.insert"], 4.)
+        self.assertEqual(plan.units, 101)
+
+        plan = Planner(self.store, low_quota=True,
+                       calendar=False).plan([self.channel], now=NOW)
+        self.assertEqual(plan.units, 3)
+        self.assertEqual(plan.writes, 0)
+
+    def test_merged(self):
+        # a duplicate of a pending event is not written
+        self.store.mark_merged(
+            make_event(str(self.channel), 2, "vid2").key,
+            make_event(str(self.channel), 1, "vid1").key
+        )
+        plan = Planner(self.store).plan([self.channel], now=NOW)
+        self.assertAlmostEqual(plan.writes, 3.)
+
+    def test_shard(self):
+        channels = [YoutubeScraper(f"UC{i_}") for i_ in range(10)]
+        Shard(self.store, "a").join()
+        # this worker, about to join
+        shard = Shard(self.store, "b")
+        plan = Planner(self.store, shard=shard).plan(channels, now=NOW)
+
+        ring = HashRing(["a", "b"])
+        self.assertEqual([s_ for s_, _ in plan.sources],
+                         [str(c_) for c_ in channels
+                          if ring.owner(str(c_)) == "b"])
+        self.assertTrue(0 < len(plan.sources) < len(channels))
+
+    def test_fetches(self):
+        plan = Planner(self.store).plan([self.venue], now=NOW)
+        # the listing and each event page
+        self.assertEqual(plan.fetches, {"venue.example": 4})
+
+        seen = SeenIndex(self.store)
+        for e_ in self.pages:
+            seen.record(e_.ref, e_, now=NOW)
+        seen.record(self.pages[2].ref, self.pages[2], now=NOW - 10 * DAY)
+        plan = Planner(self.store, seen=seen).plan([self.venue], now=NOW)
+        # the listing and the page not fetched for long
+        self.assertEqual(plan.fetches, {"venue.example": 2})
+
+        self.assertIn("fetch venue.example: estimated 2, actual 3",
+                      plan.compare({}, {"venue.example": 3}))
+
+    def test_resumed(self):
+        journal = Journal(self.store)
+        # found again in the run, one in the calendar already
+        for i_ in range(3):
+            self.store.add_event(make_event(str(self.channel), i_,
+                                            f"vid{i_}"))
+        journal.mark(str(self.channel), DONE, n_events=3)
+
+        plan = Planner(self.store, journal=journal).plan([self.channel],
+                                                         now=NOW)
+        self.assertEqual(plan.units, 0)
+        self.assertEqual(plan.writes, 2)
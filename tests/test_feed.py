@@ -0,0 +1,114 @@
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+from src.events import Event
+from src.feed import Feed, serve, to_vevent
+from src.store import EventStore
+
+
+def make_event(days: int, summary: str, description: str = "") -> Event:
+    start = datetime.datetime.now(datetime.timezone.utc) \
+        .replace(microsecond=0) + datetime.timedelta(days=days)
+    return Event(start, summary, description=description, source="test")
+
+
+class TestFeed(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.store.add_event(make_event(1, "Trio; Schubert, Brahms",
+                                        "https://example.org/" + "x" * 100))
+        self.store.add_event(make_event(2, "Quartet"))
+        self.store.add_event(make_event(-2, "Past"))
+        self.feed = Feed(self.store)
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_ics(self):
+        ics = self.feed.get("ics").body.decode()
+        self.assertTrue(ics.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(ics.count("BEGIN:VEVENT"), 2)
+        self.assertIn(r"SUMMARY:Trio\; Schubert\, Brahms", ics)
+        self.assertNotIn("Past", ics)
+        # folded lines
+        self.assertTrue(all(len(l_.encode()) <= 75
+                            for l_ in ics.split("\r\n")))
+
+        vevent = to_vevent(make_event(1, "a"), datetime.datetime(2021, 1, 1))
+        self.assertIn("DTSTAMP:", vevent)
+
+    def test_incremental(self):
+        first = self.feed.get("json")
+        self.assertIs(self.feed.get("json"), first)
+        records = json.loads(first.body)
+        self.assertEqual([r_["summary"] for r_ in records],
+                         ["Trio; Schubert, Brahms", "Quartet"])
+
+        self.store.add_event(make_event(3, "Octet"))
+        second = self.feed.get("json")
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.etag, first.etag)
+        self.assertEqual(len(json.loads(second.body)), 3)
+
+    def test_current_events(self):
+        quartet = self.store.upcoming()[1]
+        duplicate = quartet.replace(summary="Quartet | Livestream",
+                                    source="channel")
+        self.store.add_event(duplicate)
+        self.store.mark_merged(duplicate.key, quartet.key)
+        self.assertNotIn("Livestream", self.feed.get("ics").body.decode())
+        # same key, the summary as now shown
+        self.store.add_event(quartet.replace(summary="QUARTET"))
+
+        ics = self.feed.get("ics").body.decode()
+        self.assertEqual(ics.count("BEGIN:VEVENT"), 2)
+        self.assertNotIn("Livestream", ics)
+        self.assertIn("SUMMARY:QUARTET", ics)
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(len(self.feed.write(tmp)), 2)
+            self.assertEqual(self.feed.write(tmp), [])
+            self.assertTrue(os.path.exists(os.path.join(tmp, "events.ics")))
+
+        with self.assertRaises(ValueError):
+            self.feed.get("rss")
+
+    def test_serve(self):
+        server = serve(self.feed, port=0, background=True)
+        url = f"http://127.0.0.1:{server.server_address[1]}/events.ics"
+        try:
+            req = urllib.request.Request(url,
+                                         headers={"Accept-Encoding": "gzip"})
+            with urllib.request.urlopen(req) as res:
+                etag = res.headers["ETag"]
+                self.assertEqual(res.headers["Content-Encoding"], "gzip")
+                body = gzip.decompress(res.read())
+            self.assertEqual(body, self.feed.get("ics").body)
+
+            # unchanged: not sent again
+            req = urllib.request.Request(url, headers={
+                "If-None-Match": etag, "Accept-Encoding": "gzip"})
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(req)
+            self.assertEqual(ctx.exception.code, 304)
+            self.assertEqual(ctx.exception.headers["Vary"],
+                             "Accept-Encoding")
+
+            # the identity body is another variant, with another etag
+            req = urllib.request.Request(url,
+                                         headers={"If-None-Match": etag})
+            with urllib.request.urlopen(req) as res:
+                self.assertNotEqual(res.headers["ETag"], etag)
+                self.assertIsNone(res.headers["Content-Encoding"])
+                self.assertEqual(res.read(), self.feed.get("ics").body)
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,73 @@
+import unittest
+
+from src.core import YoutubeScraper
+from src.emulator import Catalog, FakeYoutube
+from src.journal import Journal, SCANNED, DONE, last_run
+from src.pipeline import fetch_events
+from src.store import EventStore
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.catalog = Catalog.synthetic(3, n_videos=30, seed=4)
+        self.youtube = FakeYoutube(self.catalog)
+        self.scrapers = [YoutubeScraper(ch_id, client=self.youtube)
+                         for ch_id in self.catalog.channels]
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_resume(self):
+        # the first run is killed in the middle of the second channel
+        journal = Journal(self.store)
+        events = fetch_events(self.scrapers, store=self.store,
+                              journal=journal, low_quota=False)
+        first = [next(events) for _ in range(len(
+            self.scrapers[0].get_events(low_quota=False)) + 1)]
+        events.close()
+
+        src_1, src_2, src_3 = (str(s_) for s_ in self.scrapers)
+        self.assertEqual(journal.status(src_1), DONE)
+        self.assertEqual(journal.status(src_2), SCANNED)
+        self.assertIsNone(journal.status(src_3))
+        n_search = self.youtube.calls["youtube.search.list"]
+
+        # a resumed run continues the last unfinished one, which is
+        # looked up without opening another
+        n_runs = self.store.execute("SELECT COUNT(*) FROM runs")[0][0]
+        self.assertEqual(last_run(self.store)[0], journal.run_id)
+        self.assertEqual(self.store.execute(
+            "SELECT COUNT(*) FROM runs")[0][0], n_runs)
+        resumed = Journal(self.store, resume=True)
+        self.assertEqual(resumed.run_id, journal.run_id)
+
+        rest = list(fetch_events(self.scrapers, store=self.store,
+                                 journal=resumed, low_quota=False))
+
+        # only the third channel is searched
+        self.assertEqual(self.youtube.calls["youtube.search.list"],
+                         n_search + 1)
+        self.assertEqual(set(rest) | set(first),
+                         {e_ for s_ in self.scrapers
+                          for e_ in s_.get_events(low_quota=False)})
+        self.assertEqual(resumed.summary(), {DONE: 3})
+
+        resumed.finish()
+        self.assertIsNone(last_run(self.store))
+        self.assertNotEqual(Journal(self.store, resume=True).run_id,
+                            journal.run_id)
+
+    def test_pending_without_merged(self):
+        journal = Journal(self.store)
+        list(fetch_events(self.scrapers[:1], store=self.store,
+                          journal=journal, low_quota=False))
+        source = str(self.scrapers[0])
+        pending = journal.pending_events(source)
+        self.assertGreater(len(pending), 1)
+
+        # a duplicate of the first, which is to be written instead
+        self.store.mark_merged(pending[1].key, pending[0].key)
+        self.assertEqual(journal.pending_events(source),
+                         [pending[0]] + pending[2:])
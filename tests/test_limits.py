@@ -0,0 +1,115 @@
+import json
+import unittest
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from src.deadline import DeadlineExceeded
+from src.limits import (TokenBucket, CircuitBreaker, CircuitOpen, Limits,
+                        is_failure, is_quota_exceeded, CLOSED, OPEN,
+                        HALF_OPEN)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def http_error(status, reason):
+    content = {"error": {"errors": [{"reason": reason}]}}
+    return HttpError(httplib2.Response({"status": status}),
+                     json.dumps(content).encode())
+
+
+class TestLimits(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.clock = Clock()
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(2., 3, clock=self.clock, sleep=self.clock.sleep)
+        waits = [bucket.acquire() for _ in range(5)]
+        # a burst of 3, then one every half second
+        self.assertEqual(waits, [0., 0., 0., .5, .5])
+        self.assertEqual(self.clock.now, 1.)
+
+    def test_breaker(self):
+        breaker = CircuitBreaker("host", threshold=2, reset_timeout=10.,
+                                 clock=self.clock)
+        breaker.failure()
+        breaker.allow()
+        breaker.failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.allow()
+
+        # one probe after the timeout; it fails, so open again
+        self.clock.now = 10.
+        breaker.allow()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.allow()
+        breaker.failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        # the next probe succeeds
+        self.clock.now = 20.
+        breaker.allow()
+        breaker.success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.n_tripped, 2)
+
+    def test_guard(self):
+        limits = Limits(rates={"youtube": None}, threshold=3)
+
+        with self.assertRaises(HttpError):
+            with limits.guard("youtube"):
+                raise http_error(503, "backendError")
+        self.assertEqual(limits.breaker("youtube").state, CLOSED)
+
+        # no point in calling again once out of quota
+        with self.assertRaises(HttpError):
+            with limits.guard("youtube"):
+                raise http_error(403, "quotaExceeded")
+        with self.assertRaises(CircuitOpen):
+            with limits.guard("youtube"):
+                pass
+
+        states = limits.states()
+        self.assertEqual(states["youtube"]["state"], OPEN)
+        self.assertEqual(states["youtube"]["rejected"], 1)
+
+    def test_neutral(self):
+        limits = Limits(rates={"youtube": None}, threshold=2,
+                        reset_timeout=0.)
+
+        # bad ids, or the caller out of time, say nothing of the api
+        for err in [http_error(404, "notFound"), http_error(400, "bad"),
+                    DeadlineExceeded("source")] * 2:
+            with self.assertRaises(type(err)):
+                with limits.guard("youtube"):
+                    raise err
+        self.assertEqual(limits.breaker("youtube").state, CLOSED)
+        self.assertTrue(is_failure(http_error(429, "rateLimitExceeded")))
+        self.assertTrue(is_failure(ConnectionError()))
+
+        # a probe interrupted does not hold the breaker half-open
+        limits.breaker("youtube").trip()
+        with self.assertRaises(KeyboardInterrupt):
+            with limits.guard("youtube"):
+                raise KeyboardInterrupt
+        with limits.guard("youtube"):
+            pass
+        self.assertEqual(limits.breaker("youtube").state, CLOSED)
+
+    def test_is_quota_exceeded(self):
+        self.assertTrue(is_quota_exceeded(http_error(403, "quotaExceeded")))
+        self.assertFalse(is_quota_exceeded(http_error(403, "forbidden")))
+        self.assertFalse(is_quota_exceeded(ValueError()))
@@ -0,0 +1,92 @@
+import time
+import unittest
+
+from src.events import Event
+from src.limits import CircuitOpen
+from src.outbox import DEAD, DONE, READY, Outbox
+from src.pipeline import pipeline, enqueue_events
+from src.store import EventStore
+
+
+def make_event(i_: int) -> Event:
+    return Event(start=f"2031-05-{i_:02d}T18:00:00Z", summary=f"Recital {i_}",
+                 source="venue", ref=f"https://venue.example/e/{i_}")
+
+
+class TestOutbox(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.outbox = Outbox(self.store, max_attempts=2, lease=60.,
+                             backoff=10.)
+        self.events = [make_event(i_) for i_ in range(1, 4)]
+        self.now = time.time() + 1
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_at_least_once(self):
+        for e_ in self.events:
+            self.assertTrue(self.outbox.put(e_))
+        # queued already
+        self.assertFalse(self.outbox.put(self.events[0]))
+
+        entries = self.outbox.get(2, now=self.now)
+        self.assertEqual([e_ for _, e_ in entries], self.events[:2])
+        self.assertEqual(entries[0][1].ref, "https://venue.example/e/1")
+        self.outbox.ack(entries[0][0])
+
+        # the consumer of the second died: delivered again after its lease
+        self.assertEqual([e_ for _, e_ in self.outbox.get(now=self.now)],
+                         self.events[2:])
+        entries = self.outbox.get(now=self.now + 61)
+        self.assertEqual([e_ for _, e_ in entries], self.events[1:])
+        self.assertEqual(self.outbox.stats(), {DONE: 1, "leased": 2})
+
+    def test_dead_letters(self):
+        self.outbox.put(self.events[0])
+
+        now = self.now
+        entry_id, _ = self.outbox.get(now=now)[0]
+        self.assertEqual(self.outbox.nack(entry_id, "bad", now=now), READY)
+        # backing off
+        self.assertEqual(self.outbox.get(now=now + 5), [])
+        self.outbox.get(now=now + 11)
+        self.assertEqual(self.outbox.nack(entry_id, "bad", now=now + 11),
+                         DEAD)
+
+        self.assertEqual([(i_, err) for i_, _, err in self.outbox.dead()],
+                         [(entry_id, "bad")])
+        self.assertEqual(self.outbox.replay(), 1)
+        self.assertEqual(self.outbox.stats(), {READY: 1})
+
+    def test_consume(self):
+        for e_ in self.events:
+            self.outbox.put(e_)
+
+        handled, outage = list(), [CircuitOpen("calendar")]
+
+        def handler(event):
+            if event == self.events[1]:
+                raise ValueError("poison")
+            if event == self.events[2] and outage:
+                raise outage.pop()
+            handled.append(event)
+
+        # the calendar is down after the first: nothing is given up
+        self.assertEqual(self.outbox.consume(handler), 1)
+        self.assertEqual(self.outbox.stats(), {DONE: 1, READY: 2})
+
+        self.assertEqual(self.outbox.consume(handler), 1)
+        self.assertEqual(handled, [self.events[0], self.events[2]])
+        self.assertEqual(self.outbox.stats(), {DONE: 2, READY: 1})
+
+    def test_enqueue_events(self):
+        self.store.add_event(self.events[0])
+        self.store.mark_inserted(self.events[0].key, "evt1")
+
+        queued = list(pipeline(self.events, lambda e_: enqueue_events(
+            e_, self.outbox, store=self.store)))
+
+        self.assertEqual(queued, self.events[1:])
+        self.assertEqual(self.outbox.stats(), {READY: 2})
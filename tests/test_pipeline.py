@@ -0,0 +1,111 @@
+import threading
+import unittest
+
+from src.core import YoutubeScraper
+from src.emulator import Catalog, FakeYoutube, FakeCalendar
+from src.events import Event
+from src.pipeline import (pipeline, fetch_events, normalize_events,
+                          dedupe_events, merge_duplicates, write_events)
+from src.store import EventStore
+
+
+def double(items):
+    for i_ in items:
+        yield 2 * i_
+
+
+def odd_only(items):
+    for i_ in items:
+        if i_ % 2:
+            yield i_
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_order_and_stages(self):
+        res = list(pipeline(range(100), odd_only, double, maxsize=2))
+        self.assertEqual(res, [2 * i_ for i_ in range(100) if i_ % 2])
+
+    def test_stages_overlap(self):
+        # the first item reaches the end before the source is exhausted
+        released = threading.Event()
+
+        def source():
+            yield 1
+            released.wait(timeout=5)
+            yield 2
+
+        out = pipeline(source(), double)
+        self.assertEqual(next(out), 2)
+        released.set()
+        self.assertEqual(list(out), [4])
+
+    def test_error_propagates(self):
+        def broken(items):
+            for i_ in items:
+                if i_ == 3:
+                    raise RuntimeError("boom")
+                yield i_
+
+        with self.assertRaises(RuntimeError):
+            list(pipeline(range(1000), broken, double, maxsize=1))
+
+    def test_early_close(self):
+        out = pipeline(iter(range(10 ** 6)), double, maxsize=1)
+        self.assertEqual(next(out), 0)
+        out.close()
+
+    def test_scrapers_to_calendar(self):
+        catalog = Catalog.synthetic(5, n_videos=20, seed=2)
+        youtube = FakeYoutube(catalog)
+        calendar = FakeCalendar()
+        scrapers = [YoutubeScraper(ch_id, client=youtube)
+                    for ch_id in catalog.channels]
+        # the same channel twice: its events are deduplicated
+        scrapers.append(scrapers[0])
+
+        written = list(pipeline(
+            scrapers,
+            fetch_events, normalize_events, dedupe_events,
+            lambda events: write_events(events, client=calendar)
+        ))
+
+        self.assertGreater(len(written), 0)
+        self.assertEqual(len(written), len(calendar.stored))
+
+    def test_merge_duplicates(self):
+        store = EventStore(":memory:")
+        inserted = Event(start="2031-05-20T18:00:00Z",
+                         summary="Mahler Symphony 5", source="venue")
+        store.add_event(inserted)
+        store.mark_inserted(inserted.key, "evt1")
+
+        released = threading.Event()
+        recital = Event(start="2031-05-21T18:00:00Z",
+                        summary="Schubert recital", source="venue")
+
+        def source():
+            yield recital
+            released.wait(timeout=5)
+            yield recital.replace(summary="Schubert recital | Livestream",
+                                  source="channel")
+            yield inserted.replace(summary="Mahler - Symphony no. 5",
+                                   source="channel")
+            yield recital.replace(summary="Schubert recital (live)",
+                                  description="https://venue.example/1")
+
+        out = merge_duplicates(source(), store=store)
+        # let through before the input is exhausted
+        self.assertEqual(next(out), recital)
+        released.set()
+        # then again, with the description of a richer duplicate
+        richer, = list(out)
+        self.assertEqual(richer.key, recital.key)
+        self.assertEqual(richer.description, "https://venue.example/1")
+        self.assertEqual(store.execute(
+            "SELECT description FROM events WHERE key = ?", (recital.key,)),
+            [("https://venue.example/1",)])
+        self.assertEqual(store.execute(
+            "SELECT into_key FROM merged ORDER BY rowid"),
+            [(recital.key,), (inserted.key,), (recital.key,)])
+        store.close()
@@ -0,0 +1,93 @@
+import datetime
+import os
+import time
+import unittest
+
+import pytz
+
+from src.core import PageScraper
+from src.procpool import ParsePool, ResourceLimitExceeded, use_pool
+from src.seen import SeenIndex, attach
+from src.store import EventStore
+from src.transport import StaticTransport, use_transport
+
+PAGES = {
+    f"https://example.org/{i_}": f"<h1>Concert {i_}</h1>"
+                                 f"<time>2031-05-0{i_} 19:30</time>"
+    for i_ in range(1, 6)
+}
+
+
+class PageTestScraper(PageScraper):
+    """Parses `PAGES`, and misbehaves on some urls."""
+
+    def __init__(self):
+        super(PageTestScraper, self).__init__(pytz.timezone("Europe/Vienna"))
+
+    def get_upcoming_livestreams(self) -> list:
+        return list(PAGES)
+
+    def get_livestream_details(self, url: str) -> dict:
+        if url.endswith("/spin"):
+            while True:
+                pass
+        if url.endswith("/hog"):
+            return {"start": bytearray(4 * 2 ** 30)}
+        if url.endswith("/crash"):
+            os._exit(1)
+
+        soup = self.get_soup(url)
+        return {"start": datetime.datetime.strptime(soup.time.text,
+                                                    "%Y-%m-%d %H:%M"),
+                "summary": soup.h1.text,
+                "description": url}
+
+
+class TestParsePool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.scraper = PageTestScraper()
+        self.pages = dict(PAGES)
+
+    def test_same_events(self):
+        with use_transport(StaticTransport(self.pages)):
+            expected = self.scraper.get_events()
+            with use_pool(ParsePool(2)):
+                events = self.scraper.get_events()
+
+        self.assertEqual(len(events), 5)
+        self.assertEqual([e_.key for e_ in events],
+                         [e_.key for e_ in expected])
+        self.assertEqual(events[0].summary, "Concert 1")
+
+    def test_seen(self):
+        # the index, holding the store, stays in this process
+        store = EventStore(":memory:")
+        seen = SeenIndex(store, inserted=False)
+        scraper, = attach([self.scraper], seen)
+        with use_transport(StaticTransport(self.pages)), \
+                use_pool(ParsePool(2)):
+            events = scraper.get_events()
+        self.assertEqual(len(events), 5)
+        self.assertEqual(sorted(seen.pages()), sorted(PAGES))
+        self.assertIs(scraper.seen, seen)
+        store.close()
+
+    def test_limits(self):
+        bad = ["https://example.org/spin", "https://example.org/hog",
+               "https://example.org/crash"]
+        self.pages.update(dict.fromkeys(bad, b""))
+        refs = bad + list(PAGES)
+
+        pool = ParsePool(2, memory=2 * 2 ** 30, cpu=1)
+        start = time.monotonic()
+        with use_transport(StaticTransport(self.pages)), use_pool(pool):
+            res = dict(pool.extract(self.scraper, refs))
+
+        self.assertLess(time.monotonic() - start, 30)
+        self.assertIsInstance(res[bad[0]], ResourceLimitExceeded)
+        self.assertIsInstance(res[bad[1]], MemoryError)
+        self.assertIsInstance(res[bad[2]], Exception)
+        # the others are parsed regardless
+        self.assertEqual([res[u_]["summary"] for u_ in PAGES],
+                         [f"Concert {i_}" for i_ in range(1, 6)])
@@ -0,0 +1,64 @@
+import re
+import unittest
+
+from bs4 import BeautifulSoup
+
+from src.query import Document, Selector
+
+PAGE = """
+<html><body>
+<div class="entry-content">
+<p>Concerts <a href="/a"><span>2021. március 4</span> Brahms</a></p>
+<p><a href="/b">no date <!-- 2021. március 5 --></a></p>
+<article><a href="/c">Live stream: on 5 March 2021 at 19:00</a></article>
+<article>no link</article>
+</div>
+<div class="teaser"><span>L<b>ive stream</b></span>
+<p>Streamed on <span>6  March 2021 at 20:00</span></p></div>
+<script>var x = "ive stream";</script>
+</body></html>
+"""
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.soup = BeautifulSoup(PAGE, "html.parser")
+        self.doc = Document(self.soup)
+
+    def test_text(self):
+        for tag in self.soup.find_all(True):
+            if tag.name != "script":
+                self.assertEqual(self.doc.text(tag), tag.text)
+
+    def test_as_predicates(self):
+        # the same as the predicates of the scrapers
+        self.assertEqual(
+            self.doc.select(Selector("span", contains="ive stream")),
+            self.soup.find_all(lambda t_: t_.name == "span" and
+                               "ive stream" in t_.text)
+        )
+        self.assertEqual(
+            self.doc.select(Selector("article", has=Selector("a[href]"))),
+            self.soup.find_all(lambda t_: t_.name == "article" and
+                               t_.find("a", href=True) is not None)
+        )
+
+        expr = r"on +([0-9]+\s+[A-Za-z]+\s+[0-9]{4})\s+at ([0-9]{2}:[0-9]{2})"
+        tag = self.doc.select_one(Selector("p, span", search=expr))
+        self.assertEqual(tag, self.soup.find(
+            lambda t_: t_.name in ("p", "span") and re.search(expr, t_.text)
+        ))
+        self.assertEqual(tag.name, "p")
+
+        dated = Selector("div.entry-content a[href]",
+                         has=Selector(match="[0-9]{4}[.] [a-zá]+ [0-9]+"))
+        self.assertEqual([t_["href"] for t_ in self.doc.select(dated)],
+                         ["/a"])
+
+    def test_selectors(self):
+        self.assertEqual(len(self.doc.select(Selector("div p span"))), 2)
+        self.assertEqual(len(self.doc.select(Selector("div.teaser *"))), 4)
+        self.assertIsNone(self.doc.select_one(Selector("table")))
+        with self.assertRaises(ValueError):
+            Selector("div > p")
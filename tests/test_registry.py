@@ -0,0 +1,80 @@
+import unittest
+
+from src.core import PageScraper
+from src.registry import (Registry, ConformanceError, check_conformance,
+                          scan_module, registry)
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_scan_module(self):
+        names = scan_module("src.scrapers")
+
+        self.assertIn("HrScraper", names)
+        self.assertIn("PCMSScraper", names)
+        # stub, not implementing the interface
+        self.assertNotIn("ConcertgebouwScraper", names)
+
+    def test_all_builtin_conform(self):
+        for name in registry.names():
+            cls = registry.load(name)
+            self.assertTrue(callable(cls), name)
+
+    def test_lazy_import(self):
+        reg = Registry()
+        loaded = list()
+
+        def loader():
+            loaded.append(True)
+            return StubScraper
+
+        reg.register_lazy("stub", loader)
+        self.assertIn("stub", reg)
+        self.assertEqual(loaded, [])
+
+        self.assertIsInstance(reg.create("stub"), StubScraper)
+        reg.create("stub")
+        self.assertEqual(loaded, [True])
+
+    def test_conformance(self):
+        class Incomplete(PageScraper):
+            def __init__(self):
+                super(Incomplete, self).__init__(None)
+
+            def get_upcoming_livestreams(self) -> list:
+                return []
+
+        with self.assertRaises(ConformanceError):
+            check_conformance(Incomplete)
+        with self.assertRaises(ConformanceError):
+            Registry().register(Incomplete)
+
+        check_conformance(StubScraper)
+
+    def test_iter_scrapers(self):
+        reg = Registry()
+        reg.register(StubScraper)
+        reg.register_lazy("broken", lambda: 1 / 0)
+
+        res = list(reg.iter_scrapers("all"))
+        self.assertEqual(len(res), 1)
+
+        # one name, not its letters, even if starting with 'all'
+        reg.register(StubScraper, name="allstub")
+        self.assertEqual(len(list(reg.iter_scrapers("allstub"))), 1)
+        self.assertEqual(len(list(reg.iter_scrapers(["stub"]))), 1)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            Registry().load("nowhere")
+
+
+class StubScraper(PageScraper):
+    def __init__(self):
+        super(StubScraper, self).__init__(None)
+
+    def get_upcoming_livestreams(self) -> list:
+        return []
+
+    def get_livestream_details(self, url: str) -> dict:
+        return {}
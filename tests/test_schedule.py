@@ -0,0 +1,51 @@
+import unittest
+
+from src.schedule import Scheduler, DAY
+from src.store import EventStore
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.scheduler = Scheduler(self.store, min_interval=DAY,
+                                   max_interval=8 * DAY)
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_backoff(self):
+        self.store.record_poll("busy", 5, 2, ts=0.)
+        self.assertEqual(self.scheduler.next_poll("busy"), DAY)
+
+        # every quiet poll doubles the interval, up to the max
+        for i_, expected in enumerate((2, 4, 8, 8)):
+            self.store.record_poll("quiet", 5, 0, ts=float(i_))
+            self.assertEqual(self.scheduler.interval("quiet"),
+                             expected * DAY)
+
+        # new events reset it
+        self.store.record_poll("quiet", 6, 1, ts=10.)
+        self.assertEqual(self.scheduler.interval("quiet"), DAY)
+
+    def test_lead_time(self):
+        # events announced 4 days ahead: polled at least every 2 days
+        self.store.execute(
+            "INSERT INTO events (key, start_ts, end_ts, summary, source, "
+            "first_seen) VALUES ('k', ?, ?, 's', 'src', 0)",
+            (4 * DAY, 4 * DAY + 5400)
+        )
+        for i_ in range(5):
+            self.store.record_poll("src", 1, 0, ts=float(i_))
+        self.assertEqual(self.scheduler.interval("src"), 2 * DAY)
+
+    def test_plan(self):
+        now = 100 * DAY
+        # 'rich' found 10 events a day, 'poor' 1, 'late' is not due
+        for d_ in range(90, 99):
+            self.store.record_poll("rich", 10, 10, ts=d_ * DAY)
+            self.store.record_poll("poor", 1, 1, ts=d_ * DAY)
+        self.store.record_poll("late", 1, 1, ts=now - 1)
+
+        res = self.scheduler.plan(["poor", "late", "rich", "new"], now=now)
+        self.assertEqual(res, ["new", "rich", "poor"])
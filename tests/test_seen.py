@@ -0,0 +1,109 @@
+import datetime
+import unittest
+
+from src.events import Event
+from src.seen import DAY, SeenIndex, canonical_url
+from src.store import EventStore
+from src.transport import StaticTransport, use_transport
+from src.venues import SpecScraper, VenueSpec
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+def listed(days: float) -> str:
+    return (NOW + datetime.timedelta(days=days)).strftime("%d %B %Y")
+
+
+LISTING = f"""
+<div class="grid"><a href="/e/1">one</a><i>{listed(10)}</i></div>
+<div class="grid"><a href="/e/2">two</a><i>{listed(400)}</i></div>
+<div class="grid"><a href="/e/3">three</a></div>
+"""
+
+EVENT = f"""
+<html><head><title>Recital</title></head>
+<body><p class="when">{listed(10)} 19:30</p></body></html>
+"""
+
+
+class CountingTransport(StaticTransport):
+
+    def __init__(self, pages):
+        super(CountingTransport, self).__init__(pages)
+        self.fetched = list()
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        return super(CountingTransport, self).fetch(url)
+
+
+class TestSeenIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.index = SeenIndex(self.store)
+        self.url = "https://venue.example/e/1"
+        self.event = Event(start=NOW + datetime.timedelta(days=10),
+                           summary="Recital", source="venue", ref=self.url)
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_canonical_url(self):
+        self.assertEqual(
+            canonical_url("HTTPS://Venue.example:443/e/1/?b=2&utm_source=x"
+                          "&a=1#tickets"),
+            "https://venue.example/e/1?a=1&b=2"
+        )
+
+    def test_select(self):
+        now = NOW.timestamp()
+        listing = [(self.url, None, "v1"),
+                   ("https://venue.example/e/2", now + 400 * DAY, None),
+                   ("https://venue.example/e/3", now - DAY, None),
+                   (("row", "of a table"), None, None)]
+        self.assertEqual(self.index.select("venue", listing, now=now),
+                         [self.url, ("row", "of a table")])
+
+        # fetched, but its event is not in the calendar yet
+        self.store.add_event(self.event)
+        self.index.record(self.url, self.event, now=now)
+        self.assertEqual(self.index.select("venue", listing[:1], now=now),
+                         [self.url])
+
+        self.store.mark_inserted(self.event.key, "evt1")
+        self.assertEqual(self.index.select("venue", listing[:1], now=now),
+                         [])
+        # changed in the listing, or not fetched for long
+        self.assertEqual(
+            self.index.select("venue", [(self.url, None, "v2")], now=now),
+            [self.url]
+        )
+        self.assertEqual(
+            self.index.select("venue", listing[:1], now=now + 8 * DAY),
+            [self.url]
+        )
+
+    def test_spec_scraper(self):
+        spec = VenueSpec(name="test venue", url="https://venue.example/",
+                         tz="Europe/London", listing="div.grid",
+                         prefix="https://venue.example", date="p.when",
+                         date_format="%d %B %Y %H:%M", summary="title",
+                         listing_date="i", listing_date_format="%d %B %Y")
+        scraper = SpecScraper(spec)
+        scraper.seen = SeenIndex(self.store, inserted=False)
+        transport = CountingTransport({
+            spec.url: LISTING,
+            "https://venue.example/e/1": EVENT,
+            "https://venue.example/e/3": EVENT,
+        })
+
+        with use_transport(transport):
+            self.assertEqual(len(scraper.get_events()), 2)
+            # the second is beyond the horizon
+            self.assertEqual(transport.fetched,
+                             [spec.url, "https://venue.example/e/1",
+                              "https://venue.example/e/3"])
+            transport.fetched.clear()
+            self.assertEqual(scraper.get_events(), [])
+            self.assertEqual(transport.fetched, [spec.url])
@@ -0,0 +1,72 @@
+import unittest
+
+from src.shard import HashRing, Shard
+from src.store import EventStore
+
+
+class TestHashRing(unittest.TestCase):
+
+    def test_rebalance(self):
+        sources = [f"channel {i_}" for i_ in range(2000)]
+        ring = HashRing([f"w{i_}" for i_ in range(4)])
+        before = {s_: ring.owner(s_) for s_ in sources}
+
+        # each worker gets a fair share
+        for w_ in set(before.values()):
+            n = sum(1 for o_ in before.values() if o_ == w_)
+            self.assertGreater(n, 300)
+
+        # a new worker takes about its share, from the others only
+        ring.add("w4")
+        after = {s_: ring.owner(s_) for s_ in sources}
+        moved = [s_ for s_ in sources if before[s_] != after[s_]]
+        self.assertLess(len(moved), 0.3 * len(sources))
+        self.assertTrue(all(after[s_] == "w4" for s_ in moved))
+
+        # and gives them back when leaving
+        ring.remove("w4")
+        self.assertEqual({s_: ring.owner(s_) for s_ in sources}, before)
+        self.assertIsNone(HashRing().owner("channel 0"))
+
+
+class TestShard(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.sources = [f"channel {i_}" for i_ in range(100)]
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_disjoint(self):
+        a = Shard(self.store, "a")
+        b = Shard(self.store, "b")
+        a.join()
+        b.join()
+
+        res_a, res_b = a.claim(self.sources), b.claim(self.sources)
+        self.assertEqual(sorted(res_a + res_b), sorted(self.sources))
+        self.assertFalse(set(res_a) & set(res_b))
+
+    def test_overlapping_runs(self):
+        # a first run takes all sources; one started meanwhile takes none
+        a = Shard(self.store, "a")
+        self.assertEqual(a.claim(self.sources), self.sources)
+        b = Shard(self.store, "b")
+        self.assertEqual(b.claim(self.sources), [])
+
+        # until the leases expire
+        self.store.execute("UPDATE leases SET expires = 0")
+        self.assertGreater(len(b.claim(self.sources)), 0)
+
+    def test_members(self):
+        a = Shard(self.store, "a", ttl=60)
+        a.join()
+        self.store.execute("INSERT INTO workers VALUES ('gone', 0)")
+        self.assertEqual(a.members(), ["a"])
+        self.assertEqual(len(a.claim(self.sources)), len(self.sources))
+        a.leave()
+        self.assertEqual(a.members(), [])
+        # its sources go to the next worker, not held by its leases
+        b = Shard(self.store, "b", ttl=60)
+        self.assertEqual(len(b.claim(self.sources)), len(self.sources))
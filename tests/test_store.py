@@ -0,0 +1,95 @@
+import datetime
+import unittest
+
+from src.core import YoutubeScraper
+from src.emulator import Catalog, FakeYoutube, FakeCalendar
+from src.events import Event
+from src.pipeline import pipeline, fetch_events, write_events
+from src.store import EventStore
+
+
+class TestEventStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.event = Event(start="2021-05-20T18:00:00Z", summary="Recital",
+                           description="https://venue.example/e/1",
+                           source="SomeScraper",
+                           ref="https://venue.example/e/1")
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_add_event(self):
+        self.assertTrue(self.store.add_event(self.event))
+        self.assertFalse(self.store.add_event(self.event))
+        self.assertTrue(self.store.has_event(self.event.key))
+        self.assertTrue(self.store.has_url("https://venue.example/e/1"))
+        self.assertFalse(self.store.is_inserted(self.event.key))
+
+        self.store.mark_inserted(self.event.key, "evt1")
+        self.assertTrue(self.store.is_inserted(self.event.key))
+
+    def test_upcoming(self):
+        later = self.event.replace(
+            start=self.event.start + datetime.timedelta(days=1),
+            source="OtherScraper", ref=None
+        )
+        self.store.add_event(later)
+        self.store.add_event(self.event)
+
+        since = self.event.start - datetime.timedelta(hours=1)
+        self.assertEqual(self.store.upcoming(since), [self.event, later])
+        self.assertEqual(self.store.upcoming(since, source="OtherScraper"),
+                         [later])
+        self.assertEqual(self.store.upcoming(), [])
+
+    def test_second_run_is_local(self):
+        catalog = Catalog.synthetic(3, n_videos=20, seed=3)
+        youtube = FakeYoutube(catalog)
+        calendar = FakeCalendar()
+
+        def run():
+            scrapers = [YoutubeScraper(ch_id, client=youtube,
+                                       store=self.store)
+                        for ch_id in catalog.channels]
+            return list(pipeline(
+                scrapers,
+                lambda x: fetch_events(x, store=self.store, low_quota=True),
+                lambda x: write_events(x, client=calendar, store=self.store)
+            ))
+
+        self.assertGreater(len(run()), 0)
+        n_calls = sum(calendar.calls.values())
+        n_videos = youtube.calls["youtube.videos.list"]
+
+        # all known: no details fetched, calendar not asked
+        self.assertEqual(run(), [])
+        self.assertEqual(sum(calendar.calls.values()), n_calls)
+        # only the scan of uploads, one per channel
+        self.assertEqual(youtube.calls["youtube.videos.list"], n_videos + 3)
+        self.assertEqual(len(self.store.source_stats()), 3)
+
+    def test_rescheduled(self):
+        catalog = Catalog.synthetic(1, n_videos=40, seed=4)
+        youtube = FakeYoutube(catalog)
+        calendar = FakeCalendar()
+
+        def run():
+            scraper = YoutubeScraper(*catalog.channels, client=youtube,
+                                     store=self.store)
+            return list(pipeline(
+                [scraper],
+                lambda x: fetch_events(x, store=self.store, low_quota=True),
+                lambda x: write_events(x, client=calendar, store=self.store)
+            ))
+
+        first = run()
+        self.assertGreater(len(first), 0)
+        details = catalog.videos[first[0].ref]["liveStreamingDetails"]
+        start = first[0].start + datetime.timedelta(days=1)
+        details["scheduledStartTime"] = start.isoformat()
+
+        # only the premiere rescheduled is written again, at its new start
+        self.assertEqual([e_.start for e_ in run()], [start])
+        self.assertTrue(self.store.is_merged(first[0].key))
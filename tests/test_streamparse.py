@@ -0,0 +1,94 @@
+import unittest
+
+from src.streamparse import (Matcher, FirstTexts, NestedTableRows,
+                             StreamParser, SNIFF_SIZE, sniff_encoding,
+                             stream_extract)
+from src.transport import StaticTransport
+
+EVENT = """
+<html><head><title>Danika &amp; the Rose</title></head><body>
+<div><span itemprop="startDate">Sunday, May 23, 2021 -
+<b>3:00</b> PM</span></div>
+""" + "<p>filler</p>" * 10000 + "</body></html>"
+
+EVENTS = """
+<table><tr><td>menu</td><td>
+<table>
+<tr><td><strong>Monday 11 September, 3pm</strong> (free)</td>
+<td><strong>Alicja Fiderkiewicz (piano)</strong></td></tr>
+<tr><td><strong>Monday 18 September</strong></td><td>tbc</td></tr>
+</table>
+</td></tr></table>
+""" + "<table><tr><td>footer</td></tr></table>" * 10000
+
+
+class CountingTransport(StaticTransport):
+
+    def __init__(self, pages):
+        super(CountingTransport, self).__init__(pages)
+        self.chunks = 0
+
+    def stream(self, url, chunk_size=16384):
+        for c_ in super(CountingTransport, self).stream(url, chunk_size):
+            self.chunks += 1
+            yield c_
+
+
+class TestStreamParse(unittest.TestCase):
+
+    def test_matcher(self):
+        m = Matcher.from_css("span[itemprop=startDate]")
+        self.assertTrue(m.matches("span", [("itemprop", "startDate")]))
+        self.assertFalse(m.matches("span", [("itemprop", "endDate")]))
+        self.assertTrue(Matcher.from_css("div.a.b").matches(
+            "div", [("class", "b c a")]))
+        self.assertIsNone(Matcher.from_css("div.header h1"))
+        self.assertIsNone(Matcher.from_css("a > b"))
+
+    def test_first_texts(self):
+        transport = CountingTransport({"u": EVENT})
+        res = stream_extract("u", FirstTexts({
+            "summary": "title", "date": "span[itemprop=startDate]"
+        }), transport=transport, chunk_size=256)
+
+        self.assertEqual(res["summary"], "Danika & the Rose")
+        self.assertEqual(" ".join(res["date"].split()),
+                         "Sunday, May 23, 2021 - 3:00 PM")
+        # stopped right after the date, once the encoding was sniffed
+        self.assertLess(transport.chunks, SNIFF_SIZE // 256 + 3)
+
+    def test_not_found(self):
+        res = stream_extract("u", FirstTexts({"h": "h1"}),
+                             transport=StaticTransport({"u": EVENT}))
+        self.assertEqual(res, {"h": None})
+
+    def test_nested_table_rows(self):
+        transport = CountingTransport({"u": EVENTS})
+        res = stream_extract("u", NestedTableRows(cell_tag="strong"),
+                             transport=transport, chunk_size=256)
+
+        self.assertEqual(res, [
+            ("Monday 11 September, 3pm", "Alicja Fiderkiewicz (piano)"),
+            ("Monday 18 September", None),
+        ])
+        self.assertLess(transport.chunks, SNIFF_SIZE // 256 + 3)
+        self.assertTrue(all(isinstance(c_, (str, type(None)))
+                            for r_ in res for c_ in r_))
+
+    def test_encoding(self):
+        with self.assertRaises(TypeError):
+            StreamParser()
+
+        page = '<html><head><meta charset="iso-8859-2">' \
+               '<title>Zeneakadémia – Kodály Kórus</title></head></html>'
+        res = stream_extract("u", FirstTexts({"t": "title"}),
+                             transport=StaticTransport({
+                                 "u": page.replace("–", "-")
+                                          .encode("iso-8859-2")
+                             }), chunk_size=16)
+        self.assertEqual(res["t"], "Zeneakadémia - Kodály Kórus")
+
+        self.assertEqual(sniff_encoding("é".encode("utf-8")[:1]), "utf-8")
+        self.assertEqual(sniff_encoding("<p>Malmö Live</p>".encode("cp1252")),
+                         "cp1252")
+        self.assertEqual(sniff_encoding(b"\xef\xbb\xbf<p>"), "utf-8")
@@ -0,0 +1,99 @@
+import http.server
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.core import PageScraper
+from src.deadline import Deadline, DeadlineExceeded, use_deadline
+from src.transport import (Archive, RecordingTransport, ReplayTransport,
+                           FixtureNotFound, DeadlineHttp, use_transport,
+                           get_transport)
+
+
+class DictTransport:
+    """Serve pages from a dict, counting fetches."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.n_fetched = 0
+
+    def fetch(self, url):
+        self.n_fetched += 1
+        return self.pages[url]
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "SomeScraper")
+        self.web = DictTransport({
+            "https://venue.example/": b"<html><title>listing</title></html>",
+            "https://venue.example/e/1": b"<html><title>event</title></html>",
+        })
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_record_replay(self):
+        with use_transport(RecordingTransport(Archive(self.path), self.web)):
+            for url in self.web.pages:
+                PageScraper.get_soup(url)
+
+        self.assertEqual(self.web.n_fetched, 2)
+
+        # reload the archive from disk
+        with use_transport(ReplayTransport(Archive(self.path))):
+            soup = PageScraper.get_soup("https://venue.example/e/1")
+
+        self.assertEqual(soup.title.text, "event")
+        self.assertEqual(self.web.n_fetched, 2)
+
+    def test_replay_missing(self):
+        with self.assertRaises(FixtureNotFound):
+            ReplayTransport(Archive(self.path)).fetch("https://nowhere/")
+
+    def test_use_transport_restores(self):
+        previous = get_transport()
+        with use_transport(self.web):
+            self.assertIs(get_transport(), self.web)
+        self.assertIs(get_transport(), previous)
+
+
+    def test_deadline_http(self):
+        class Slow(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(float(self.path[1:]))
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Slow)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        try:
+            client = DeadlineHttp()
+            with use_deadline(Deadline(5)):
+                response, content = client.request(url + "0")
+            self.assertEqual(content, b"ok")
+
+            # the open connection too is cut short
+            started = time.monotonic()
+            with use_deadline(Deadline(0.2)):
+                with self.assertRaises(DeadlineExceeded):
+                    client.request(url + "2")
+            self.assertLess(time.monotonic() - started, 1.5)
+
+            # nothing sent once out of time
+            with use_deadline(Deadline(0)):
+                with self.assertRaises(DeadlineExceeded):
+                    client.request(url + "0")
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,82 @@
+import datetime
+import unittest
+
+from src.transport import StaticTransport, use_transport
+from src.venues import VenueSpec, SpecScraper
+
+LISTING = """
+<div class="grid"><a href="/e/1">one</a></div>
+<div class="grid"><a href="/e/2">two</a><a href="/e/2">two again</a></div>
+<div class="grid">no link</div>
+"""
+
+EVENT = """
+<html><head><title>Trio Recital</title></head>
+<body><p class="when">Sunday, 23 May 2021 &ndash; 15:00 BST</p></body>
+</html>
+"""
+
+
+class TestSpecScraper(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.spec = VenueSpec(
+            name="test venue",
+            url="https://venue.example/streams",
+            tz="Europe/London",
+            listing="div.grid",
+            prefix="https://venue.example",
+            date="p.when",
+            date_regex=r"([0-9]+ [A-Za-z]+ [0-9]{4}) . ([0-9:]{5})",
+            date_format="%d %B %Y %H:%M",
+            summary="title",
+            suffix=" at Venue",
+            description=["https://www.youtube.com/@venue"]
+        )
+        self.scraper = SpecScraper(self.spec)
+
+        self.transport = StaticTransport({
+            self.spec.url: LISTING,
+            "https://venue.ex/e/1": EVENT,
+            "https://venue.example/e/1": EVENT,
+            "https://venue.example/e/2": EVENT,
+        })
+
+    def test_get_upcoming_livestreams(self):
+        with use_transport(self.transport):
+            res = self.scraper.get_upcoming_livestreams()
+
+        self.assertEqual(res, ["https://venue.example/e/1",
+                               "https://venue.example/e/2"])
+
+    def test_get_livestream_details(self):
+        with use_transport(self.transport):
+            res = self.scraper.get_livestream_details("https://venue.ex/e/1")
+
+        self.assertEqual(res["start"], datetime.datetime(2021, 5, 23, 15))
+        self.assertEqual(res["summary"], "Trio Recital at Venue")
+        self.assertEqual(res["description"],
+                         "https://venue.ex/e/1\n"
+                         "https://www.youtube.com/@venue")
+
+    def test_get_events(self):
+        with use_transport(self.transport):
+            res = self.scraper.get_events()
+
+        self.assertEqual(len(res), 2)
+        self.assertEqual(res[0].start.isoformat(),
+                         "2021-05-23T14:00:00+00:00")
+        self.assertEqual(res[0].ref, "https://venue.example/e/1")
+
+    def test_stream_targets(self):
+        # event pages are read as a stream unless a selector is complex
+        self.assertIsNotNone(self.spec.stream_targets)
+        spec = VenueSpec.by_name("sco", path="data/venues.json")
+        self.assertIsNone(spec.stream_targets)
+
+    def test_by_name(self):
+        spec = VenueSpec.by_name("PCMS", path="data/venues.json")
+        self.assertEqual(spec.tz.zone, "America/New_York")
+
+        with self.assertRaises(ValueError):
+            VenueSpec.by_name("nowhere", path="data/venues.json")
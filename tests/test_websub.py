@@ -0,0 +1,126 @@
+import datetime
+import hashlib
+import hmac
+import unittest
+
+from src.emulator import Catalog, FakeYoutube, LocalHub
+from src.store import EventStore
+from src.websub import Subscriber, PushScraper, parse_notification, topic_of
+
+
+class TestWebSub(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = EventStore(":memory:")
+        self.catalog = Catalog.synthetic(2, n_videos=30, seed=5)
+        self.youtube = FakeYoutube(self.catalog)
+        self.hub = LocalHub()
+
+        self.subscriber = Subscriber(self.store, callback="", secret="s3",
+                                     post=self.hub.post)
+        self.server = self.subscriber.serve(port=0, host="127.0.0.1")
+        self.subscriber.callback = \
+            f"http://127.0.0.1:{self.server.server_address[1]}/websub"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+
+    def publish(self, video):
+        ch_id = video["snippet"]["channelId"]
+        return self.hub.publish(topic_of(ch_id), video["id"], ch_id)
+
+    def test_subscribe(self):
+        ch_id = list(self.catalog.channels)[0]
+        self.assertTrue(self.subscriber.subscribe(ch_id))
+
+        state, expires = self.subscriber.subscriptions()[ch_id]
+        self.assertEqual(state, "verified")
+        self.assertIn(self.subscriber.callback,
+                      self.hub.subscriptions[topic_of(ch_id)])
+
+        # renewed once about to expire
+        self.assertEqual(self.subscriber.renew(), [])
+        self.assertEqual(self.subscriber.renew(margin=10 * 86400), [ch_id])
+
+        # not asked for: refused, and still renewed
+        status, _ = self.subscriber.verify({"hub.mode": "unsubscribe",
+                                            "hub.topic": topic_of(ch_id),
+                                            "hub.challenge": "x"})
+        self.assertEqual(status, 404)
+        self.assertEqual(self.subscriber.subscriptions()[ch_id][0],
+                         "verified")
+        self.assertEqual(self.subscriber.renew(margin=10 * 86400), [ch_id])
+
+        self.subscriber.unsubscribe(ch_id)
+        self.assertEqual(self.subscriber.subscriptions(), {})
+        self.assertEqual(self.hub.subscriptions[topic_of(ch_id)], {})
+
+    def test_notifications(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for ch_id in self.catalog.channels:
+            self.subscriber.subscribe(ch_id)
+
+        videos = list(self.catalog.videos.values())
+        upcoming = [v_ for v_ in videos if "liveStreamingDetails" in v_ and
+                    v_["liveStreamingDetails"]["scheduledStartTime"] >
+                    now.isoformat()[:19]]
+        others = [v_ for v_ in videos if "liveStreamingDetails" not in v_]
+        for v_ in upcoming[:3] + others[:3] + upcoming[:1]:
+            self.assertEqual(self.publish(v_), 1)
+
+        scraper = PushScraper(self.subscriber, client=self.youtube)
+        events = scraper.get_events()
+        self.assertEqual(sorted(e_.ref for e_ in events),
+                         sorted(v_["id"] for v_ in upcoming[:3]))
+        self.assertEqual(self.youtube.calls["youtube.search.list"], 0)
+        self.assertEqual(self.youtube.calls["youtube.videos.list"], 1)
+
+        # the queue is empty now
+        self.assertEqual(scraper.get_events(), [])
+
+    def test_updates(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for ch_id in self.catalog.channels:
+            self.subscriber.subscribe(ch_id)
+        upcoming = [v_ for v_ in self.catalog.videos.values()
+                    if "liveStreamingDetails" in v_ and
+                    v_["liveStreamingDetails"]["scheduledStartTime"] >
+                    now.isoformat()[:19]]
+
+        # in the calendar already, but announced: looked up again
+        scraper = PushScraper(self.subscriber, client=self.youtube,
+                              store=self.store)
+        self.publish(upcoming[0])
+        for e_ in scraper.get_events():
+            self.store.add_event(e_)
+            self.store.mark_inserted(e_.key, "evt")
+        self.publish(upcoming[0])
+        events = scraper.get_events()
+        self.assertEqual([e_.ref for e_ in events], [upcoming[0]["id"]])
+        self.assertEqual(self.youtube.calls["youtube.videos.list"], 2)
+
+        # announcements outlive the subscriber
+        self.publish(upcoming[1])
+        subscriber = Subscriber(self.store, callback="", secret="s3")
+        self.assertEqual(subscriber.drain(), [upcoming[1]["id"]])
+        self.assertEqual(self.subscriber.drain(), [])
+
+    def test_signature(self):
+        body = LocalHub.FEED.format(video_id="v1", channel_id="UC1",
+                                    title="").encode()
+        self.assertEqual(parse_notification(body), [("v1", "UC1")])
+        self.assertEqual(self.subscriber.notify(body, "sha1=0"), [])
+        self.assertEqual(self.subscriber.notify(b"<feed", None), [])
+        self.assertEqual(self.subscriber.drain(), [])
+
+        # signed, but of a channel not subscribed to
+        signature = "sha1=" + hmac.new(b"s3", body, hashlib.sha1).hexdigest()
+        self.assertEqual(self.subscriber.notify(body, signature), [])
+        self.subscriber.subscribe("UC1")
+        self.assertEqual(self.subscriber.notify(body, signature), ["v1"])
+        self.assertEqual(self.subscriber.drain(), ["v1"])
+
+        with self.assertRaises(ValueError):
+            Subscriber(self.store, callback="", secret=None)